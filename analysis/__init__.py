@@ -1,3 +1,5 @@
 from .impact_analyzer import ImpactAnalyzer
+from .account_profiler import AccountProfiler
+from .risk_engine import RiskEngine
 
-__all__ = ['ImpactAnalyzer']
+__all__ = ['ImpactAnalyzer', 'AccountProfiler', 'RiskEngine']
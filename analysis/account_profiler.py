@@ -0,0 +1,160 @@
+"""
+Perfiles de cuenta - Actividad de una cuenta monitoreada (tipos de post, días, horas,
+engagement y hashtags), con el formato de psjcobre_analysis.json
+Los agregados se guardan por (cuenta, ventana) en account_profiles y se actualizan
+solo con los posts nuevos y los días cuyas métricas cambiaron
+"""
+
+import argparse
+import json
+import re
+import sys
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SocialDatabase
+from instrumentation import timed
+
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Tipos normalizados por parse_post (o crudos de Apify) -> nombres de psjcobre_analysis.json
+POST_TYPE_NAMES = {'image': 'Image', 'video': 'Video', 'carousel': 'Sidecar', 'sidecar': 'Sidecar'}
+
+_HASHTAG_RE = re.compile(r'#(\w+)')
+
+
+class AccountProfiler:
+    """Calcula y cachea el perfil de actividad de las cuentas monitoreadas"""
+
+    def __init__(self, db: SocialDatabase = None, top_hashtags: int = 15):
+        self.db = db or SocialDatabase()
+        self.top_hashtags = top_hashtags
+
+    @timed('analysis.account_profile')
+    def profile(self, platform: str, username: str, days: int = None) -> Dict:
+        """Perfil de la cuenta en los últimos `days` días (None = todo el historial)"""
+        username = username.lstrip('@')
+        window = days or 0
+        since_day = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d') if days else None
+
+        cached = self.db.get_account_profile_cache(platform, username, window)
+        if cached:
+            state, last_id, watermark = cached['state'], cached['last_post_id'], cached['watermark']
+        else:
+            state, last_id, watermark = {'cells': {}, 'hashtags': {}}, 0, None
+
+        changes = self.db.get_account_post_changes(platform, username, last_id, watermark)
+        dirty = changes['dirty_days']
+
+        # Días que salieron de la ventana o cuyas métricas cambiaron: se descartan
+        # (los segundos se vuelven a agregar completos)
+        stale = [day for day in state['cells']
+                 if (since_day and day < since_day) or day in dirty]
+        for day in stale:
+            state['cells'].pop(day, None)
+            state['hashtags'].pop(day, None)
+
+        if changes['max_id'] > last_id or dirty:
+            self._accumulate(state, platform, username, since_day, last_id, dirty)
+
+        if not cached or stale or changes['max_id'] > last_id or dirty:
+            self.db.save_account_profile_cache(platform, username, window, state,
+                                               changes['max_id'], changes['watermark'])
+
+        return self._summarize(state)
+
+    def _accumulate(self, state: Dict, platform: str, username: str,
+                    since_day: str, after_id: int, days: list) -> None:
+        """Suma al estado los posts con id > after_id y los de los días `days`"""
+        for day, post_type, hour, posts, likes, comments in self.db.get_account_activity(
+                platform, username, since_day, after_id, days):
+            cell = state['cells'].setdefault(day, {}).setdefault(f"{post_type}|{int(hour)}", [0, 0, 0])
+            cell[0] += posts
+            cell[1] += likes or 0
+            cell[2] += comments or 0
+
+        for day, content in self.db.get_account_contents(platform, username, since_day, after_id, days):
+            tags = state['hashtags'].setdefault(day, {})
+            for tag in _HASHTAG_RE.findall(content or ''):
+                tags[tag] = tags.get(tag, 0) + 1
+
+    def _summarize(self, state: Dict) -> Dict:
+        """Arma el perfil a partir de los agregados por (día, tipo, hora)"""
+        by_type, by_hour = Counter(), Counter()
+        by_weekday, engagement_by_weekday = Counter(), Counter()
+        total_likes = total_comments = 0
+
+        for day, cells in state['cells'].items():
+            weekday = WEEKDAYS[datetime.strptime(day, '%Y-%m-%d').weekday()]
+            for key, (posts, likes, comments) in cells.items():
+                post_type, hour = key.rsplit('|', 1)
+                by_type[POST_TYPE_NAMES.get(post_type.lower(), post_type)] += posts
+                by_hour[int(hour)] += posts
+                by_weekday[weekday] += posts
+                engagement_by_weekday[weekday] += likes + comments
+                total_likes += likes
+                total_comments += comments
+
+        hashtags = Counter()
+        for tags in state['hashtags'].values():
+            hashtags.update(tags)
+
+        total_posts = sum(by_type.values())
+        return {
+            'total_posts': total_posts,
+            'total_likes': total_likes,
+            'total_comments': total_comments,
+            'avg_likes': total_likes / total_posts if total_posts else 0.0,
+            'avg_comments': total_comments / total_posts if total_posts else 0.0,
+            'posts_by_type': dict(by_type.most_common()),
+            'posts_by_day': {day: by_weekday[day] for day in WEEKDAYS if by_weekday[day]},
+            'engagement_by_day': {
+                day: engagement_by_weekday[day] / by_weekday[day]
+                for day in WEEKDAYS if by_weekday[day]
+            },
+            'posts_by_hour': {str(hour): by_hour[hour] for hour in sorted(by_hour)},
+            'top_hashtags': dict(hashtags.most_common(self.top_hashtags)),
+        }
+
+    def profile_key_accounts(self, days: int = None) -> Dict[str, Dict]:
+        """Perfiles de todas las cuentas clave de monitored_accounts"""
+        profiles = {}
+        for account in self.db.get_monitored_accounts():
+            if not account.get('is_key_account'):
+                continue
+            username = account['username'].lstrip('@')
+            profiles[f"{account['platform']}/{username}"] = self.profile(account['platform'], username, days)
+        return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perfil de actividad de cuentas monitoreadas')
+    parser.add_argument('--platform', help='Plataforma de la cuenta (p. ej. instagram)')
+    parser.add_argument('--account', help='Usuario de la cuenta; sin --account se perfilan las cuentas clave')
+    parser.add_argument('--days', type=int, default=None, help='Ventana en días (default: todo el historial)')
+    parser.add_argument('--output', help='Archivo JSON de salida (p. ej. psjcobre_analysis.json)')
+    args = parser.parse_args()
+
+    profiler = AccountProfiler()
+    if args.account:
+        if not args.platform:
+            parser.error('--account requiere --platform')
+        result = profiler.profile(args.platform, args.account, args.days)
+    else:
+        result = profiler.profile_key_accounts(args.days)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Perfil guardado en {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Narrativas emergentes - Frases de 2 a 6 palabras cuya frecuencia crece de golpe
+Al ingresar, cada post suma sus frases al sketch count-min de su día (memoria fija
+por día) y a la lista acotada de frases más frecuentes del día. Las frases del último
+día que superan varias veces su línea base de los días anteriores se guardan en
+narratives con ocurrencias y primera/última aparición; los reportes cuentan sus
+apariciones en la ventana con los sketches de esos días.
+"""
+
+import heapq
+import re
+import sys
+import os
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SocialDatabase
+from analysis.text_stats import KNOWN_NARRATIVES, STOP_WORDS, categorize
+from instrumentation import timed
+
+
+MIN_WORDS, MAX_WORDS = 2, 6
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 4096     # 4 x 4096 contadores uint32 = 64 KB por día
+TOP_PHRASES = 300       # frases más frecuentes que se conservan por día
+BASELINE_DAYS = 7
+MIN_COUNT = 5           # apariciones mínimas en el día para marcar una frase
+SPIKE_RATIO = 3.0       # apariciones del día / esperadas según la línea base
+MAX_FLAGGED = 20
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_MENTION_RE = re.compile(r'@\w+')
+_WORD_RE = re.compile(r'\w+')
+_SENTENCE_RE = re.compile(r'[.!?¡¿;:\n]+')
+
+
+def phrases(text: str) -> set:
+    """
+    Frases de MIN_WORDS a MAX_WORDS palabras del texto (una vez por post).
+    Se descartan las que terminan en palabra vacía o no tienen ninguna palabra con contenido.
+    """
+    found = set()
+    text = _MENTION_RE.sub(' ', _URL_RE.sub(' ', (text or '').lower()))
+
+    # Las frases no cruzan oraciones
+    for sentence in _SENTENCE_RE.split(text):
+        words = _WORD_RE.findall(sentence)
+        content = [len(word) > 2 and word not in STOP_WORDS for word in words]
+        for size in range(MIN_WORDS, MAX_WORDS + 1):
+            for i in range(len(words) - size + 1):
+                if words[i + size - 1] in STOP_WORDS or not any(content[i:i + size]):
+                    continue
+                found.add(' '.join(words[i:i + size]))
+    return found
+
+
+def _is_known(phrase: str) -> bool:
+    """La frase es una consigna conocida o parte de una (ya se cuentan en text_stats)"""
+    return any(f" {phrase} " in f" {' '.join(_WORD_RE.findall(known.lower()))} " for known in KNOWN_NARRATIVES)
+
+
+def hash_columns(items: List[str]) -> np.ndarray:
+    """
+    Columna del sketch de cada frase en cada una de las SKETCH_DEPTH filas.
+    Dos hashes por frase combinados (h1 + fila * h2) en lugar de un hash por fila.
+    """
+    encoded = [item.encode('utf-8') for item in items]
+    h1 = np.fromiter((zlib.crc32(item) for item in encoded), dtype=np.int64, count=len(encoded))
+    h2 = np.fromiter((zlib.adler32(item) | 1 for item in encoded), dtype=np.int64, count=len(encoded))
+    columns = (h1[:, None] + np.arange(SKETCH_DEPTH) * h2[:, None]) % SKETCH_WIDTH
+    return columns.astype(np.intp)
+
+
+class CountMinSketch:
+    """Conteos aproximados (nunca por debajo del real) en una tabla de tamaño fijo"""
+
+    __slots__ = ('table',)
+
+    def __init__(self, table: np.ndarray = None):
+        self.table = table if table is not None else np.zeros((SKETCH_DEPTH, SKETCH_WIDTH), dtype=np.uint32)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CountMinSketch':
+        if not data:
+            return cls()
+        table = np.frombuffer(zlib.decompress(data), dtype=np.uint32).reshape(SKETCH_DEPTH, SKETCH_WIDTH)
+        return cls(table.copy())
+
+    def to_bytes(self) -> bytes:
+        # Nivel 1: el sketch se reescribe en cada lote y casi no se gana con más compresión
+        return zlib.compress(self.table.tobytes(), 1)
+
+    def add(self, columns: np.ndarray, counts: np.ndarray) -> None:
+        for row in range(SKETCH_DEPTH):
+            np.add.at(self.table[row], columns[:, row], counts.astype(np.uint32))
+
+    def estimate(self, columns: np.ndarray) -> np.ndarray:
+        if not len(columns):
+            return np.zeros(0, dtype=np.uint32)
+        return self.table[np.arange(SKETCH_DEPTH), columns].min(axis=1)
+
+
+@timed('emerging_narratives.index_pending_posts')
+def index_pending_posts(db: SocialDatabase, batch_size: int = 1000) -> int:
+    """Suma las frases de los posts nuevos a los sketches de su día"""
+    indexed = 0
+
+    while True:
+        pending = db.get_posts_pending_phrases(limit=batch_size)
+        if not pending:
+            break
+
+        daily_counts, daily_posts = {}, Counter()
+        for _, content, day in pending:
+            daily_counts.setdefault(day, Counter()).update(phrases(content))
+            daily_posts[day] += 1
+
+        stored = db.get_phrase_sketches(sorted(daily_counts))
+        sketches = {
+            day: _add_counts(stored.get(day, {'posts': 0, 'sketch': None, 'heavy_hitters': {}}),
+                             counts, daily_posts[day])
+            for day, counts in daily_counts.items()
+        }
+        db.save_phrase_sketches(sketches, [post_id for post_id, _, _ in pending])
+        indexed += len(pending)
+
+        if len(pending) < batch_size:
+            break
+
+    return indexed
+
+
+def _add_counts(stored: Dict, counts: Counter, posts: int) -> Dict:
+    sketch = CountMinSketch.from_bytes(stored['sketch'])
+    items = list(counts)
+    columns = hash_columns(items)
+    sketch.add(columns, np.fromiter(counts.values(), dtype=np.int64, count=len(items)))
+
+    # Frases más frecuentes: las ya conocidas más las del lote que pueden entrar al top
+    heavy_hitters = stored['heavy_hitters']
+    floor = min(heavy_hitters.values()) if len(heavy_hitters) >= TOP_PHRASES else 0
+    estimates = sketch.estimate(columns).tolist()
+    candidates = set(heavy_hitters) | {item for item, estimate in zip(items, estimates) if estimate > floor}
+    candidates = sorted(candidates)
+    refreshed = dict(zip(candidates, sketch.estimate(hash_columns(candidates)).tolist())) if candidates else {}
+
+    return {
+        'posts': stored['posts'] + posts,
+        'sketch': sketch.to_bytes(),
+        'heavy_hitters': dict(heapq.nlargest(TOP_PHRASES, refreshed.items(), key=lambda item: (item[1], item[0]))),
+    }
+
+
+def detect_emerging(db: SocialDatabase, day: str = None) -> List[Dict]:
+    """Frases frecuentes de `day` (default: el último con datos) que superan su línea base"""
+    day = day or db.get_latest_phrase_day()
+    if not day:
+        return []
+
+    current_day = date.fromisoformat(day)
+    baseline_days = [(current_day - timedelta(days=offset)).isoformat() for offset in range(1, BASELINE_DAYS + 1)]
+    sketches = db.get_phrase_sketches([day] + baseline_days)
+    current = sketches.get(day)
+    baseline = [sketches[d] for d in baseline_days if d in sketches]
+
+    # Sin días anteriores no hay con qué comparar
+    if not current or not current['heavy_hitters'] or not baseline:
+        return []
+
+    candidates = sorted(current['heavy_hitters'])
+    columns = hash_columns(candidates)
+    counts = CountMinSketch.from_bytes(current['sketch']).estimate(columns).astype(np.int64)
+    baseline_counts = sum(CountMinSketch.from_bytes(d['sketch']).estimate(columns).astype(np.int64) for d in baseline)
+    baseline_posts = sum(d['posts'] for d in baseline)
+
+    expected = baseline_counts / baseline_posts * current['posts'] if baseline_posts else np.zeros(len(candidates))
+    ratios = (counts + 1) / (expected + 1)
+
+    flagged = [
+        {'phrase': phrase, 'day': day, 'count': int(count),
+         'expected': round(float(exp), 2), 'ratio': round(float(ratio), 2)}
+        for phrase, count, exp, ratio in zip(candidates, counts, expected, ratios)
+        if count >= MIN_COUNT and ratio >= SPIKE_RATIO
+    ]
+
+    # Una frase contenida en otra marcada con casi las mismas apariciones es la misma consigna
+    flagged = [
+        item for item in flagged
+        if not any(other['phrase'] != item['phrase'] and f" {item['phrase']} " in f" {other['phrase']} "
+                   and other['count'] >= 0.8 * item['count'] for other in flagged)
+    ]
+    flagged.sort(key=lambda item: (-item['ratio'], -item['count']))
+    return flagged[:MAX_FLAGGED]
+
+
+@timed('emerging_narratives.update_narratives')
+def update_narratives(db: SocialDatabase, day: str = None) -> List[Dict]:
+    """Indexa los posts pendientes y guarda en narratives las frases emergentes del día"""
+    index_pending_posts(db)
+    flagged = [item for item in detect_emerging(db, day) if not _is_known(item['phrase'])]
+    if not flagged:
+        return []
+
+    # Ocurrencias y primera aparición según las frases más frecuentes guardadas de cada día
+    # (los días en que la frase no llegó al top no suman)
+    wanted = {item['phrase'] for item in flagged}
+    seen = {phrase: [] for phrase in wanted}
+    for history_day, heavy_hitters in db.get_phrase_history(flagged[0]['day']):
+        for phrase in wanted & set(heavy_hitters):
+            seen[phrase].append((history_day, heavy_hitters[phrase]))
+
+    narratives = []
+    for item in flagged:
+        days = seen[item['phrase']]
+        earlier = sum(count for history_day, count in days if history_day != item['day'])
+        item['occurrences'] = earlier + item['count']
+        narratives.append({
+            'narrative_text': item['phrase'],
+            'category': categorize(item['phrase']),
+            'occurrences': item['occurrences'],
+            'first_seen': days[0][0] if days else item['day'],
+            'last_seen': item['day'],
+        })
+
+    db.save_narratives(narratives)
+    return flagged
+
+
+def window_counts(db: SocialDatabase, days: int = 14) -> List[Tuple[str, int]]:
+    """
+    Frases emergentes guardadas en narratives con sus apariciones en los últimos `days`
+    días (suma de los sketches diarios; no usa las ocurrencias acumuladas de la tabla)
+    """
+    date_filter = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    wanted = sorted({
+        narrative['narrative_text'] for narrative in db.get_narratives()
+        if narrative['narrative_text'] and (narrative['last_seen'] or '') >= date_filter
+        and not _is_known(narrative['narrative_text'])
+    })
+    if not wanted:
+        return []
+
+    today = datetime.now().date()
+    window = [(today - timedelta(days=offset)).isoformat() for offset in range(days + 1)]
+    columns = hash_columns(wanted)
+    counts = np.zeros(len(wanted), dtype=np.int64)
+    for sketch in db.get_phrase_sketches(window).values():
+        counts += CountMinSketch.from_bytes(sketch['sketch']).estimate(columns)
+
+    ranked = [(phrase, int(count)) for phrase, count in zip(wanted, counts) if count > 0]
+    return sorted(ranked, key=lambda item: -item[1])
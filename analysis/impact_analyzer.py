@@ -6,12 +6,15 @@ Genera métricas consolidadas y evaluaciones de riesgo sociopolítico
 import sys
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
-from collections import Counter
+from typing import Dict, List, Optional, Tuple
 import json
 
+import numpy as np
+
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import SocialDatabase
+from analysis import emerging_narratives, near_duplicates, scoring, text_stats
+from instrumentation import timed
 
 
 class ImpactAnalyzer:
@@ -65,24 +68,25 @@ class ImpactAnalyzer:
 
     def calculate_total_reach(self, posts: List[Dict]) -> int:
         """Calcula el alcance total estimado de todas las publicaciones"""
-        total = sum(self.estimate_reach(post) for post in posts)
-        return total
+        columns = scoring.columns_from_posts(posts)
+        return int(scoring.estimate_reach(columns, self.reach_multipliers).sum())
+
+    @timed('analyzer.score_period')
+    def score_period(self, days: int = 14) -> Dict:
+        """Calcula alcance, engagement y niveles de alcance de todo el período en un lote"""
+        columns = scoring.load_columns(self.db, days=days)
+        return scoring.score_columns(columns, self.reach_multipliers, self.reach_thresholds)
 
+    @timed('analyzer.get_consolidated_metrics')
     def get_consolidated_metrics(self, days: int = 14) -> Dict:
         """Obtiene métricas consolidadas del período"""
         metrics = self.db.get_consolidated_metrics(days=days)
-        posts = self.db.get_posts(days=days, limit=500)
-
-        # Calcular alcance estimado
-        estimated_reach = self.calculate_total_reach(posts)
 
-        # Contar posts por nivel de alcance
-        reach_distribution = self.db.get_reach_distribution(days=days)
-
-        # Posts con convocatoria a movilización
-        mobilization_posts = sum(
-            1 for p in posts if p.get('has_mobilization_call')
-        )
+        # Alcance estimado, niveles y convocatorias sobre todos los posts del período
+        scores = self.score_period(days=days)
+        estimated_reach = scores['estimated_reach']
+        reach_distribution = scores['reach_distribution']
+        mobilization_posts = scores['mobilization_posts']
 
         return {
             'period_days': days,
@@ -101,6 +105,7 @@ class ImpactAnalyzer:
             'posts_low_reach': reach_distribution.get('BAJO', 0),
         }
 
+    @timed('analyzer.evaluate_risk')
     def evaluate_risk(self, days: int = 14) -> Dict:
         """Evalúa el nivel de riesgo sociopolítico"""
         metrics = self.get_consolidated_metrics(days=days)
@@ -108,15 +113,39 @@ class ImpactAnalyzer:
         # Obtener convocatorias detectadas
         mobilization_calls = self.db.get_mobilization_calls(days=days)
 
+        # Tendencia: comparar última semana vs semana anterior
+        recent = self.db.get_post_frame(['engagement_total'], days=7, limit=500)
+        period = self.db.get_post_frame(['engagement_total'], days=14, limit=500)
+        older = ~np.isin(period['id'], recent['id'])
+
+        recent_engagement = int(recent['engagement_total'].sum())
+        older_engagement = int(period['engagement_total'][older].sum())
+
+        risk = self.score_risk(
+            engagement=metrics['total_engagement'],
+            high_reach_posts=metrics.get('posts_high_reach', 0),
+            mobilization_count=len(mobilization_calls),
+            recent_engagement=recent_engagement,
+            older_engagement=older_engagement
+        )
+        risk.update({
+            'mobilization_calls': mobilization_calls,
+            'metrics': metrics
+        })
+        return risk
+
+    def score_risk(self, engagement: int, high_reach_posts: int, mobilization_count: int,
+                   recent_engagement: int, older_engagement: int) -> Dict:
+        """Puntaje y nivel de riesgo a partir de los cuatro factores"""
         # Evaluar factores de riesgo
         risk_factors = []
         risk_score = 0
 
         # Factor 1: Engagement total
-        if metrics['total_engagement'] >= self.risk_thresholds['alto']['engagement_total']:
+        if engagement >= self.risk_thresholds['alto']['engagement_total']:
             risk_factors.append(("Engagement muy alto", 3))
             risk_score += 3
-        elif metrics['total_engagement'] >= self.risk_thresholds['medio']['engagement_total']:
+        elif engagement >= self.risk_thresholds['medio']['engagement_total']:
             risk_factors.append(("Engagement elevado", 2))
             risk_score += 2
         else:
@@ -124,11 +153,10 @@ class ImpactAnalyzer:
             risk_score += 1
 
         # Factor 2: Posts de alto alcance
-        high_reach = metrics.get('posts_high_reach', 0)
-        if high_reach >= self.risk_thresholds['alto']['high_reach_posts']:
+        if high_reach_posts >= self.risk_thresholds['alto']['high_reach_posts']:
             risk_factors.append(("Múltiples publicaciones virales", 3))
             risk_score += 3
-        elif high_reach >= self.risk_thresholds['medio']['high_reach_posts']:
+        elif high_reach_posts >= self.risk_thresholds['medio']['high_reach_posts']:
             risk_factors.append(("Publicaciones con alto alcance", 2))
             risk_score += 2
         else:
@@ -136,7 +164,6 @@ class ImpactAnalyzer:
             risk_score += 1
 
         # Factor 3: Convocatorias a movilización
-        mobilization_count = len(mobilization_calls)
         if mobilization_count >= self.risk_thresholds['alto']['mobilization_posts']:
             risk_factors.append(("Múltiples convocatorias activas", 3))
             risk_score += 3
@@ -147,15 +174,7 @@ class ImpactAnalyzer:
             risk_factors.append(("Sin convocatorias significativas", 1))
             risk_score += 1
 
-        # Factor 4: Tendencia temporal
-        # Comparar última semana vs semana anterior
-        recent_posts = self.db.get_posts(days=7, limit=500)
-        older_posts = [p for p in self.db.get_posts(days=14, limit=500)
-                       if p not in recent_posts]
-
-        recent_engagement = sum(p.get('engagement_total', 0) for p in recent_posts)
-        older_engagement = sum(p.get('engagement_total', 0) for p in older_posts)
-
+        # Factor 4: Tendencia temporal (última semana vs semana anterior)
         if older_engagement > 0:
             growth_rate = (recent_engagement - older_engagement) / older_engagement
             if growth_rate > 0.5:  # >50% de crecimiento
@@ -191,84 +210,24 @@ class ImpactAnalyzer:
             'risk_percentage': round(risk_percentage, 1),
             'risk_description': risk_description,
             'risk_factors': risk_factors,
-            'mobilization_calls': mobilization_calls,
-            'metrics': metrics
         }
 
+    @timed('analyzer.analyze_narratives')
     def analyze_narratives(self, days: int = 14) -> Dict:
-        """Analiza las narrativas predominantes"""
-        posts = self.db.get_posts(days=days, limit=500)
-
-        # Obtener narrativas de la base de datos si existen
-        db_narratives = self.db.get_narratives()
-
-        # Narrativas conocidas y su frecuencia (inicializar desde DB o con 0)
-        known_narratives = {
-            "El agua vale más que el oro": 0,
-            "El agua de Mendoza no se negocia": 0,
-            "No a San Jorge": 0,
-            "La 7722 no se toca": 0,
-            "El agua es vida": 0,
-            "Mendoza es hija del agua": 0,
-            "La megaminería es saqueo": 0,
-            "No a la mina": 0,
-            "La 7722 se defiende en la calle": 0,
-        }
+        """Analiza las narrativas predominantes a partir de los conteos diarios acumulados"""
+        # Indexar posts que todavía no pasaron por el tokenizador
+        text_stats.index_pending_posts(self.db)
 
-        # Si hay narrativas en la DB, usar esos valores como base
-        if db_narratives:
-            for narr in db_narratives:
-                narr_text = narr.get('narrative_text', '')
-                narr_count = narr.get('occurrences', 0)
-                if narr_text in known_narratives:
-                    known_narratives[narr_text] = narr_count
-                elif narr_text:
-                    known_narratives[narr_text] = narr_count
+        # Narrativas conocidas y su frecuencia en el período
+        known_narratives = {narrative: 0 for narrative in text_stats.KNOWN_NARRATIVES}
+        for narrative, count in self.db.get_text_stats('narrative', days=days):
+            known_narratives[narrative] = known_narratives.get(narrative, 0) + count
 
         # Categorías de narrativa
-        categories = {
-            "anti_minera_tradicional": [],
-            "tecnico_ambiental": [],
-            "movilizacion": [],
-            "otros": []
-        }
-
-        # Palabras frecuentes (para nube de palabras)
-        word_counter = Counter()
-
-        stop_words = set([
-            'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'es', 'se', 'no',
-            'por', 'con', 'para', 'una', 'los', 'las', 'del', 'al', 'su',
-            'más', 'pero', 'como', 'ya', 'o', 'este', 'esta', 'sin', 'sobre',
-            'ser', 'son', 'muy', 'hasta', 'hay', 'donde', 'vez', 'puede',
-            'todos', 'así', 'nos', 'ni', 'si', 'porque', 'qué', 'cuando',
-            'https', 'http', 'www', 'com', 'instagram', 'facebook', 'tiktok'
-        ])
-
-        for post in posts:
-            content = (post.get('content') or '').lower()
-
-            # Contar narrativas conocidas
-            for narrative in known_narratives:
-                if narrative.lower() in content:
-                    known_narratives[narrative] += 1
-
-            # Categorizar contenido
-            if any(kw in content for kw in ['agua vale', 'no se negocia', 'no a la mina']):
-                categories["anti_minera_tradicional"].append(post)
-            elif any(kw in content for kw in ['dia', 'hidrogeol', 'principio precautorio', 'legal']):
-                categories["tecnico_ambiental"].append(post)
-            elif any(kw in content for kw in ['marcha', 'moviliza', 'convocatoria', 'calle']):
-                categories["movilizacion"].append(post)
-            else:
-                categories["otros"].append(post)
-
-            # Contar palabras
-            words = content.split()
-            for word in words:
-                word = word.strip('.,!?¿¡"\'()[]{}')
-                if len(word) > 3 and word not in stop_words:
-                    word_counter[word] += 1
+        categories = {category: 0 for category, _ in text_stats.NARRATIVE_CATEGORIES}
+        categories["otros"] = 0
+        for category, count in self.db.get_text_stats('category', days=days):
+            categories[category] = count
 
         # Ordenar narrativas por frecuencia
         sorted_narratives = sorted(
@@ -280,53 +239,95 @@ class ImpactAnalyzer:
         return {
             'narratives': sorted_narratives,
             'top_narratives': [n for n, c in sorted_narratives if c > 0][:5],
-            'categories': {
-                k: len(v) for k, v in categories.items()
-            },
-            'word_frequency': word_counter.most_common(50),
-            'total_posts_analyzed': len(posts)
+            'emerging_narratives': emerging_narratives.window_counts(self.db, days=days),
+            'categories': categories,
+            'word_frequency': self.db.get_text_stats('word', days=days, limit=50),
+            'total_posts_analyzed': sum(categories.values())
         }
 
-    def get_top_accounts(self, days: int = 14, limit: int = 10) -> List[Dict]:
-        """Obtiene las cuentas con mayor impacto"""
-        posts = self.db.get_posts(days=days, limit=500)
+    @timed('analyzer.get_duplicate_clusters')
+    def get_duplicate_clusters(self, days: int = 14, min_size: int = 2, limit: int = 20) -> List[Dict]:
+        """
+        Contenido repetido (casi-duplicados) del período: tamaño del cluster, cuentas
+        que lo publicaron y engagement sumado
+        """
+        # Firmar posts que todavía no pasaron por MinHash
+        near_duplicates.index_pending_posts(self.db)
+        return self.db.get_duplicate_clusters(days=days, min_size=min_size, limit=limit)
+
+    def get_coordinated_accounts(self, days: int = 14, min_accounts: int = 3, limit: int = 20) -> List[Dict]:
+        """Cuentas que publican contenido repetido por al menos `min_accounts` cuentas distintas"""
+        clusters = [
+            cluster for cluster in self.get_duplicate_clusters(days=days, limit=None)
+            if cluster['account_count'] >= min_accounts
+        ]
 
-        # Agrupar por cuenta
         accounts = {}
-        for post in posts:
-            username = post.get('author_username')
-            if not username:
-                continue
-
-            if username not in accounts:
-                accounts[username] = {
-                    'username': username,
-                    'platform': post.get('platform'),
-                    'posts': 0,
-                    'total_engagement': 0,
-                    'total_reach': 0,
-                    'followers': post.get('author_followers', 0)
-                }
-
-            accounts[username]['posts'] += 1
-            accounts[username]['total_engagement'] += post.get('engagement_total', 0)
-            accounts[username]['total_reach'] += self.estimate_reach(post)
-
-        # Ordenar por engagement
-        sorted_accounts = sorted(
-            accounts.values(),
-            key=lambda x: x['total_engagement'],
-            reverse=True
+        for cluster in clusters:
+            for account in cluster['accounts']:
+                entry = accounts.setdefault(account, {'account': account, 'clusters': 0,
+                                                      'cluster_ids': [], 'largest_cluster': 0})
+                entry['clusters'] += 1
+                entry['cluster_ids'].append(cluster['cluster_id'])
+                entry['largest_cluster'] = max(entry['largest_cluster'], cluster['size'])
+
+        ranked = sorted(accounts.values(), key=lambda entry: (-entry['clusters'], -entry['largest_cluster']))
+        return ranked[:limit]
+
+    @timed('analyzer.get_top_accounts')
+    def get_top_accounts(self, days: int = 14, limit: int = 10) -> List[Dict]:
+        """Obtiene las cuentas con mayor impacto"""
+        frame = self.db.get_post_frame(
+            ['platform', 'author_username', 'author_followers', 'likes', 'comments',
+             'shares', 'views', 'engagement_total'],
+            days=days, limit=500
         )
+        authors = frame['author_username']
+        valid = authors.codes >= 0
+        if not valid.any():
+            return []
+
+        # Agrupar por cuenta: los datos de plataforma y seguidores salen del primer post de
+        # cada cuenta (el de mayor engagement, por el orden de la consulta)
+        codes = authors.codes[valid]
+        groups = len(authors.categories)
+        first = np.full(groups, len(codes))
+        np.minimum.at(first, codes, np.arange(len(codes)))
+
+        reach = scoring.estimate_reach(
+            {col: frame[col][valid] for col in ('likes', 'comments', 'shares', 'views')},
+            self.reach_multipliers
+        )
+        posts = np.bincount(codes, minlength=groups)
+        engagement = np.bincount(codes, weights=frame['engagement_total'][valid], minlength=groups)
+        total_reach = np.bincount(codes, weights=reach, minlength=groups)
+
+        # Ordenar por engagement (a igual engagement, por orden de aparición)
+        by_appearance = np.argsort(first, kind='stable')
+        ranked = by_appearance[np.argsort(-engagement[by_appearance], kind='stable')]
+
+        platforms = frame['platform'].take(np.flatnonzero(valid))
+        followers = frame['author_followers'][valid]
+        return [
+            {
+                'username': authors.categories[group],
+                'platform': platforms[first[group]],
+                'posts': int(posts[group]),
+                'total_engagement': int(engagement[group]),
+                'total_reach': int(total_reach[group]),
+                'followers': int(followers[first[group]])
+            }
+            for group in ranked[:limit].tolist()
+        ]
 
-        return sorted_accounts[:limit]
-
+    @timed('analyzer.generate_full_report')
     def generate_full_report(self, days: int = 14) -> Dict:
         """Genera un reporte completo de análisis"""
         risk_analysis = self.evaluate_risk(days=days)
         narrative_analysis = self.analyze_narratives(days=days)
         top_accounts = self.get_top_accounts(days=days)
         top_posts = self.db.get_top_posts(limit=10, days=days)
+        duplicate_clusters = self.get_duplicate_clusters(days=days, limit=10)
 
         return {
             'report_date': datetime.now().isoformat(),
@@ -339,8 +340,10 @@ class ImpactAnalyzer:
             'narrative_analysis': narrative_analysis,
             'top_accounts': top_accounts,
             'top_posts': top_posts,
+            'duplicate_clusters': duplicate_clusters,
             'summary': {
                 'total_posts': risk_analysis['metrics']['total_posts'],
+                'duplicate_posts': self.db.get_duplicate_post_count(days=days),
                 'total_engagement': risk_analysis['metrics']['total_engagement'],
                 'estimated_reach': risk_analysis['metrics']['estimated_reach'],
                 'risk_level': risk_analysis['risk_level'],
@@ -348,9 +351,128 @@ class ImpactAnalyzer:
             }
         }
 
+    def get_report(self, days: int = 14) -> Dict:
+        """
+        Reporte del período desde el snapshot guardado en reports si no llegaron posts
+        ni convocatorias desde que se generó; si no, lo genera y guarda un snapshot nuevo.
+        """
+        data_version = self.db.get_data_version()
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        snapshot_id = self.db.find_report_snapshot(days, today, data_version)
+        if snapshot_id:
+            report = self.db.get_report_snapshot(snapshot_id)
+            if report:
+                return report
+
+        report = self.generate_full_report(days=days)
+        self.db.save_report_snapshot(report, days, data_version)
+        return report
+
+    def diff_reports(self, previous: Dict, current: Dict) -> Dict:
+        """Cambios entre dos reportes: totales, riesgo, cuentas, posts, convocatorias y narrativas"""
+        summary = {}
+        for field in ('total_posts', 'total_engagement', 'estimated_reach'):
+            before = previous['summary'].get(field, 0) or 0
+            after = current['summary'].get(field, 0) or 0
+            summary[field] = {'before': before, 'after': after, 'change': after - before}
+
+        def accounts(report):
+            return {(a['platform'], a['username']) for a in report.get('top_accounts', [])}
+
+        def post_urls(report):
+            return {p.get('post_url') for p in report.get('top_posts', [])}
+
+        def calls(report):
+            return {c.get('id') for c in report['risk_evaluation'].get('mobilization_calls', [])}
+
+        before_narratives = dict(map(tuple, previous['narrative_analysis']['narratives']))
+        narratives = {}
+        for narrative, count in current['narrative_analysis']['narratives']:
+            change = count - before_narratives.get(narrative, 0)
+            if change:
+                narratives[narrative] = change
+
+        new_calls = calls(current) - calls(previous)
+        return {
+            'from': previous['report_date'],
+            'to': current['report_date'],
+            'summary': summary,
+            'risk_level': {
+                'before': previous['risk_evaluation']['risk_level'],
+                'after': current['risk_evaluation']['risk_level'],
+            },
+            'risk_score_change': current['risk_evaluation']['risk_score'] - previous['risk_evaluation']['risk_score'],
+            'new_top_accounts': sorted(accounts(current) - accounts(previous)),
+            'dropped_top_accounts': sorted(accounts(previous) - accounts(current)),
+            'new_top_posts': sorted(url for url in post_urls(current) - post_urls(previous) if url),
+            'new_mobilization_calls': [
+                c for c in current['risk_evaluation']['mobilization_calls'] if c.get('id') in new_calls
+            ],
+            'narratives': narratives,
+        }
+
+    def report_changes(self, days: int = 14) -> Optional[Dict]:
+        """Cambios entre los dos últimos snapshots de la ventana (None si hay menos de dos)"""
+        snapshots = self.db.get_report_snapshots(window_days=days, limit=2)
+        if len(snapshots) < 2:
+            return None
+
+        current = self.db.get_report_snapshot(snapshots[0]['id'])
+        previous = self.db.get_report_snapshot(snapshots[1]['id'])
+        if not current or not previous:
+            return None
+        return self.diff_reports(previous, current)
+
+    @timed('analyzer.live_panel')
+    def get_live_panel(self, hours: int = 48, top_accounts: int = 8) -> Dict:
+        """
+        Panel de las últimas `hours` horas: convocatorias, indicadores de actividad,
+        cuentas más activas y variación respecto de las `hours` horas anteriores
+        """
+        now = datetime.now()
+        start = now - timedelta(hours=hours)
+        previous_start = start - timedelta(hours=hours)
+        high_reach = self.reach_thresholds['alto']
+
+        current = self.db.get_window_activity(start.isoformat(), high_reach_engagement=high_reach)
+        previous = self.db.get_window_activity(previous_start.isoformat(), start.isoformat(),
+                                               high_reach_engagement=high_reach)
+        news_current, news_previous = self.db.get_news_window_counts(hours)
+
+        fields = ('posts', 'engagement', 'high_reach_posts', 'mobilization_posts', 'active_accounts')
+        trends = {field: current[field] - previous[field] for field in fields}
+        trends['news'] = news_current - news_previous
+
+        by_platform = []
+        for platform in sorted(set(current['by_platform']) | set(previous['by_platform'])):
+            now_row = current['by_platform'].get(platform, {})
+            before_row = previous['by_platform'].get(platform, {})
+            by_platform.append({
+                'platform': platform,
+                'posts': now_row.get('posts', 0),
+                'posts_change': now_row.get('posts', 0) - before_row.get('posts', 0),
+                'engagement': now_row.get('engagement', 0),
+                'engagement_change': now_row.get('engagement', 0) - before_row.get('engagement', 0),
+            })
+
+        return {
+            'generated_at': now.isoformat(),
+            'hours': hours,
+            'activity': {field: current[field] for field in fields},
+            'previous_activity': {field: previous[field] for field in fields},
+            'news': news_current,
+            'previous_news': news_previous,
+            'trends': trends,
+            'by_platform': by_platform,
+            'mobilization_calls': self.db.get_window_mobilization_calls(start.isoformat()),
+            'upcoming_calls': self.db.get_upcoming_mobilization_calls(now.strftime('%Y-%m-%d')),
+            'top_accounts': self.db.get_window_top_accounts(start.isoformat(), limit=top_accounts),
+        }
+
     def print_report(self, days: int = 14):
         """Imprime un reporte en consola"""
-        report = self.generate_full_report(days=days)
+        report = self.get_report(days=days)
 
         print("\n" + "="*80)
         print("INFORME DE ANÁLISIS DE REDES SOCIALES - MINERÍA MENDOZA")
@@ -364,6 +486,7 @@ class ImpactAnalyzer:
         print(f"Total publicaciones: {report['summary']['total_posts']}")
         print(f"Total interacciones: {report['summary']['total_engagement']:,}")
         print(f"Alcance estimado: {report['summary']['estimated_reach']:,} personas")
+        print(f"Posts repetidos (casi-duplicados): {report['summary'].get('duplicate_posts', 0)}")
         print(f"Nivel de riesgo: {report['summary']['risk_level']}")
 
         # Evaluación de riesgo
@@ -385,6 +508,10 @@ class ImpactAnalyzer:
             if count > 0:
                 print(f"  - \"{narrative}\": {count} menciones")
 
+        # Frases emergentes (los reportes anteriores no las tienen)
+        for phrase, count in report['narrative_analysis'].get('emerging_narratives', [])[:5]:
+            print(f"  - \"{phrase}\" (emergente): {count} menciones")
+
         # Top cuentas
         print("\n" + "-"*80)
         print("CUENTAS CON MAYOR IMPACTO")
@@ -393,6 +520,15 @@ class ImpactAnalyzer:
             print(f"  {i}. @{account['username']} ({account['platform']})")
             print(f"     Posts: {account['posts']} | Engagement: {account['total_engagement']:,}")
 
+        # Contenido repetido entre cuentas (los reportes anteriores no lo tienen)
+        if report.get('duplicate_clusters'):
+            print("\n" + "-"*80)
+            print("CONTENIDO REPETIDO")
+            print("-"*80)
+            for cluster in report['duplicate_clusters'][:5]:
+                print(f"  - {cluster['size']} posts de {cluster['account_count']} cuentas: "
+                      f"\"{(cluster['sample_content'] or '')[:60]}\"")
+
         # Convocatorias
         if report['risk_evaluation']['mobilization_calls']:
             print("\n" + "-"*80)
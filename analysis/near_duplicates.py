@@ -0,0 +1,138 @@
+"""
+Casi-duplicados - Contenido de campaña copiado entre cuentas y plataformas
+Cada post recibe al ingresar una firma MinHash de sus shingles de palabras; la firma
+se parte en bandas y cada banda se guarda como bucket LSH en lsh_buckets. Un post
+nuevo solo se compara con los representantes de sus buckets (sin comparar todos
+contra todos) y se une al cluster del primero cuya similitud estimada supera el umbral.
+"""
+
+import hashlib
+import re
+import sys
+import os
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SocialDatabase
+from instrumentation import timed
+
+
+SHINGLE_SIZE = 3       # palabras por shingle
+MIN_WORDS = 5          # textos más cortos no se agrupan (captions vacíos, "No a la mina")
+NUM_PERM = 64          # valores de la firma
+BANDS = 16             # bandas de 4 valores: pares con Jaccard ~0.5 o más comparten un bucket
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.6        # similitud estimada mínima para unir un post a un cluster
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_MENTION_RE = re.compile(r'@\w+')
+_WORD_RE = re.compile(r'\w+')
+
+# Permutaciones h(x) = (a*x + b) mod p; semilla fija para que las firmas guardadas sigan siendo comparables
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(7722)
+_A = _rng.randint(1, (1 << 31) - 1, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, (1 << 31) - 1, NUM_PERM).astype(np.uint64)
+
+
+def shingles(text: str) -> set:
+    """Secuencias de SHINGLE_SIZE palabras del texto normalizado (sin URLs ni menciones)"""
+    words = _WORD_RE.findall(_MENTION_RE.sub(' ', _URL_RE.sub(' ', (text or '').lower())))
+    if len(words) < MIN_WORDS:
+        return set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """Firma MinHash (NUM_PERM valores uint32) o None si el texto es demasiado corto"""
+    items = shingles(text)
+    if not items:
+        return None
+    hashes = np.fromiter((zlib.crc32(item.encode('utf-8')) for item in items),
+                         dtype=np.uint64, count=len(items))
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[tuple]:
+    """(banda, bucket) de cada banda de la firma; bucket es un hash de 64 bits con signo"""
+    return [
+        (band, int.from_bytes(hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(),
+                                              digest_size=8).digest(), 'big', signed=True))
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Jaccard estimado: fracción de valores iguales de las firmas"""
+    return float(np.mean(sig_a == sig_b))
+
+
+@timed('near_duplicates.index_pending_posts')
+def index_pending_posts(db: SocialDatabase, batch_size: int = 1000) -> int:
+    """Calcula firma, buckets y cluster de los posts nuevos"""
+    indexed = 0
+
+    while True:
+        pending = db.get_posts_pending_minhash(limit=batch_size)
+        if not pending:
+            break
+        _index_batch(db, pending)
+        indexed += len(pending)
+
+        if len(pending) < batch_size:
+            break
+
+    return indexed
+
+
+def _index_batch(db: SocialDatabase, pending: List[tuple]) -> None:
+    signatures = {post_id: signature(content) for post_id, content in pending}
+    keys = {post_id: band_keys(sig) for post_id, sig in signatures.items() if sig is not None}
+
+    # Representantes de los buckets ya guardados y sus firmas
+    buckets = db.get_lsh_candidates(sorted({key for post_keys in keys.values() for key in post_keys}))
+    known = {
+        post_id: (cluster_id, np.frombuffer(sig, dtype=np.uint32))
+        for post_id, (cluster_id, sig) in db.get_minhash_signatures(sorted(set(buckets.values()))).items()
+    }
+
+    # Clusters fusionados durante el lote: cluster absorbido -> cluster que queda
+    merged: Dict[int, int] = {}
+
+    def resolve(cluster_id: int) -> int:
+        while cluster_id in merged:
+            cluster_id = merged[cluster_id]
+        return cluster_id
+
+    rows, new_buckets = [], []
+    for post_id, _ in pending:
+        sig = signatures[post_id]
+        if sig is None:
+            rows.append((post_id, post_id, None))
+            continue
+
+        clusters = set()
+        for candidate in {buckets[key] for key in keys[post_id] if key in buckets}:
+            cluster_id, candidate_sig = known[candidate]
+            if similarity(sig, candidate_sig) >= THRESHOLD:
+                clusters.add(resolve(cluster_id))
+
+        # El cluster se identifica por su post más antiguo (puede ser este, si llegó tarde
+        # desde una partición vieja); si el post une varios, se fusionan
+        cluster_id = min(clusters | {post_id})
+        for other in clusters - {cluster_id}:
+            merged[other] = cluster_id
+
+        known[post_id] = (cluster_id, sig)
+        rows.append((post_id, cluster_id, sig.tobytes()))
+        for key in keys[post_id]:
+            if key not in buckets:
+                buckets[key] = post_id
+                new_buckets.append((*key, post_id))
+
+    rows = [(post_id, resolve(cluster_id), sig) for post_id, cluster_id, sig in rows]
+    merges = [(resolve(old), old) for old in merged]
+    db.save_minhash(rows, new_buckets, merges)
@@ -0,0 +1,105 @@
+"""
+Serie del índice de riesgo - Un bucket por día con el riesgo evaluado sobre la ventana
+que termina ese día, guardado en risk_timeseries
+Solo se recalculan los buckets cuya ventana incluye posts nuevos o actualizados
+"""
+
+import sys
+import os
+from datetime import date, timedelta
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import timed
+
+
+class RiskEngine:
+    """Mantiene actualizada la serie diaria del índice de riesgo de ImpactAnalyzer"""
+
+    def __init__(self, analyzer, window_days: int = 14, history_days: int = 90):
+        self.analyzer = analyzer
+        self.db = analyzer.db
+        self.window_days = window_days
+        self.history_days = history_days
+
+    def _days(self, start: date, end: date) -> List[date]:
+        return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+    def touched_buckets(self) -> tuple:
+        """Buckets a recalcular y el updated_at máximo de los posts"""
+        today = date.today()
+        first = today - timedelta(days=self.history_days - 1)
+
+        latest = self.db.get_latest_risk(self.window_days)
+        changes = self.db.get_risk_changes(since=self.db.get_risk_watermark(self.window_days))
+
+        if latest is None:
+            return set(self._days(first, today)), changes['watermark']
+
+        # Días nuevos desde el último bucket (la ventana se desplaza aunque no haya datos)
+        buckets = set(self._days(date.fromisoformat(latest['bucket']) + timedelta(days=1), today))
+
+        # Un post del día d cambia los buckets d .. d + ventana - 1
+        for day in changes['days']:
+            start = max(date.fromisoformat(day), first)
+            end = min(date.fromisoformat(day) + timedelta(days=self.window_days - 1), today)
+            if start <= end:
+                buckets.update(self._days(start, end))
+
+        return buckets, changes['watermark']
+
+    @timed('analysis.risk_update')
+    def update(self) -> int:
+        """Recalcula los buckets afectados por datos nuevos; devuelve cuántos se recalcularon"""
+        buckets, watermark = self.touched_buckets()
+        if not buckets:
+            return 0
+
+        start = min(buckets) - timedelta(days=self.window_days - 1)
+        rollups = self.db.get_risk_rollups(
+            start.isoformat(), max(buckets).isoformat(),
+            high_reach_engagement=self.analyzer.reach_thresholds['alto']
+        )
+
+        recent_days = self.window_days // 2
+        rows = []
+        for bucket in sorted(buckets):
+            window = [rollups.get((bucket - timedelta(days=offset)).isoformat(), {})
+                      for offset in range(self.window_days)]
+            totals = {
+                field: sum(day.get(field, 0) for day in window)
+                for field in ('posts', 'engagement', 'high_reach_posts', 'mobilization_calls')
+            }
+            recent = sum(day.get('engagement', 0) for day in window[:recent_days])
+            prior = sum(day.get('engagement', 0) for day in window[recent_days:])
+
+            risk = self.analyzer.score_risk(
+                engagement=totals['engagement'],
+                high_reach_posts=totals['high_reach_posts'],
+                mobilization_count=totals['mobilization_calls'],
+                recent_engagement=recent,
+                older_engagement=prior
+            )
+            rows.append({
+                'bucket': bucket.isoformat(),
+                'window_days': self.window_days,
+                **totals,
+                'recent_engagement': recent,
+                'prior_engagement': prior,
+                'risk_score': risk['risk_score'],
+                'risk_percentage': risk['risk_percentage'],
+                'risk_level': risk['risk_level'],
+                'risk_factors': risk['risk_factors'],
+                'watermark': watermark,
+            })
+
+        self.db.save_risk_buckets(rows)
+        return len(rows)
+
+    def current(self) -> Dict:
+        """Bucket de hoy (actualiza la serie antes si hay datos nuevos)"""
+        self.update()
+        return self.db.get_latest_risk(self.window_days)
+
+    def history(self, days: int = 30) -> List[Dict]:
+        return self.db.get_risk_timeseries(days=days, window_days=self.window_days)
@@ -0,0 +1,73 @@
+"""
+Scoring vectorizado - Alcance, engagement y nivel de alcance por lotes
+Carga las métricas de los posts en arrays NumPy una vez por reporte
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+
+# Columnas numéricas que se cargan por lote (en este orden)
+METRIC_COLUMNS = ('likes', 'comments', 'shares', 'views', 'has_mobilization_call')
+
+
+def columns_from_rows(rows: List[tuple]) -> Dict[str, np.ndarray]:
+    """Convierte filas (likes, comments, shares, views, has_mobilization_call) en columnas"""
+    if not rows:
+        return {col: np.zeros(0, dtype=np.int64) for col in METRIC_COLUMNS}
+
+    matrix = np.array(rows, dtype=np.int64)
+    return {col: matrix[:, i] for i, col in enumerate(METRIC_COLUMNS)}
+
+
+def columns_from_posts(posts: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convierte una lista de posts (dicts) en columnas"""
+    return columns_from_rows([
+        tuple(int(post.get(col) or 0) for col in METRIC_COLUMNS)
+        for post in posts
+    ])
+
+
+def load_columns(db, days: int = 14, platform: str = None) -> Dict[str, np.ndarray]:
+    """Carga las métricas de todos los posts del período en columnas"""
+    return columns_from_rows(db.get_post_metric_rows(days=days, platform=platform))
+
+
+def engagement(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Engagement por post: likes + comentarios + shares"""
+    return columns['likes'] + columns['comments'] + columns['shares']
+
+
+def estimate_reach(columns: Dict[str, np.ndarray], multipliers: Dict[str, int]) -> np.ndarray:
+    """Alcance estimado por post con los multiplicadores de ImpactAnalyzer"""
+    return (
+        columns['likes'] * multipliers['likes'] +
+        columns['comments'] * multipliers['comments'] +
+        columns['shares'] * multipliers['shares'] +
+        columns['views'] * multipliers['views']
+    )
+
+
+def reach_levels(engagement_values: np.ndarray, thresholds: Dict[str, int]) -> np.ndarray:
+    """Nivel de alcance (ALTO/MEDIO/BAJO) por post según los umbrales de engagement"""
+    return np.where(
+        engagement_values >= thresholds['alto'], 'ALTO',
+        np.where(engagement_values >= thresholds['medio'], 'MEDIO', 'BAJO')
+    )
+
+
+def score_columns(columns: Dict[str, np.ndarray], multipliers: Dict[str, int],
+                  thresholds: Dict[str, int]) -> Dict:
+    """Calcula totales de alcance, engagement y distribución de niveles de un lote"""
+    eng = engagement(columns)
+    reach = estimate_reach(columns, multipliers)
+    levels, counts = np.unique(reach_levels(eng, thresholds), return_counts=True)
+
+    return {
+        'posts': int(eng.size),
+        'total_engagement': int(eng.sum()),
+        'estimated_reach': int(reach.sum()),
+        'mobilization_posts': int(np.count_nonzero(columns['has_mobilization_call'])),
+        'reach_distribution': {str(level): int(count) for level, count in zip(levels, counts)},
+    }
@@ -0,0 +1,107 @@
+"""
+Estadísticas de texto incrementales - Frecuencia de palabras, narrativas y categorías
+Cada post se tokeniza una sola vez al ingresar y sus conteos se acumulan por día
+"""
+
+import re
+import sys
+import os
+from collections import Counter
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SocialDatabase
+from instrumentation import timed
+
+
+# Consignas conocidas (texto de presentación; se buscan en minúsculas)
+KNOWN_NARRATIVES = [
+    "El agua vale más que el oro",
+    "El agua de Mendoza no se negocia",
+    "No a San Jorge",
+    "La 7722 no se toca",
+    "El agua es vida",
+    "Mendoza es hija del agua",
+    "La megaminería es saqueo",
+    "No a la mina",
+    "La 7722 se defiende en la calle",
+]
+
+# Categorías de narrativa: la primera que coincide define la categoría del post
+NARRATIVE_CATEGORIES = [
+    ("anti_minera_tradicional", ['agua vale', 'no se negocia', 'no a la mina']),
+    ("tecnico_ambiental", ['dia', 'hidrogeol', 'principio precautorio', 'legal']),
+    ("movilizacion", ['marcha', 'moviliza', 'convocatoria', 'calle']),
+]
+
+STOP_WORDS = frozenset([
+    'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'es', 'se', 'no',
+    'por', 'con', 'para', 'una', 'los', 'las', 'del', 'al', 'su', 'sus',
+    'más', 'pero', 'como', 'ya', 'o', 'este', 'esta', 'estos', 'estas', 'sin', 'sobre',
+    'ser', 'son', 'muy', 'hasta', 'hay', 'donde', 'vez', 'puede',
+    'todos', 'todas', 'así', 'nos', 'ni', 'si', 'porque', 'qué', 'cuando',
+    'desde', 'entre', 'también', 'fue', 'era', 'está', 'están', 'tiene', 'hace',
+    'nuestro', 'nuestra', 'nuestros', 'nuestras', 'ellos', 'ellas', 'pero', 'solo',
+    'https', 'http', 'www', 'com', 'instagram', 'facebook', 'tiktok'
+])
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_MENTION_RE = re.compile(r'@\w+')
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokeniza texto en español: minúsculas, sin URLs ni menciones, conserva acentos y ñ"""
+    if not text:
+        return []
+
+    text = _MENTION_RE.sub(' ', _URL_RE.sub(' ', text.lower()))
+    return [
+        token for token in _TOKEN_RE.findall(text)
+        if len(token) > 3 and token not in STOP_WORDS and not token.startswith('_')
+    ]
+
+
+def categorize(text_lower: str) -> str:
+    """Asigna la categoría de narrativa de un texto ya en minúsculas"""
+    for category, keywords in NARRATIVE_CATEGORIES:
+        if any(kw in text_lower for kw in keywords):
+            return category
+    return "otros"
+
+
+def post_statistics(content: str) -> Counter:
+    """Conteos (tipo, término) de un post: palabras, narrativas y su categoría"""
+    text_lower = (content or '').lower()
+    counts = Counter(('word', token) for token in tokenize(content))
+
+    for narrative in KNOWN_NARRATIVES:
+        if narrative.lower() in text_lower:
+            counts[('narrative', narrative)] += 1
+
+    counts[('category', categorize(text_lower))] += 1
+    return counts
+
+
+@timed('text_stats.index_pending_posts')
+def index_pending_posts(db: SocialDatabase, batch_size: int = 1000) -> int:
+    """Tokeniza los posts aún no indexados y acumula sus conteos por día"""
+    indexed = 0
+
+    while True:
+        pending = db.get_posts_pending_text_stats(limit=batch_size)
+        if not pending:
+            break
+
+        daily_counts = {}
+        for post_id, content, post_date in pending:
+            day = (post_date or '')[:10] or None
+            daily_counts.setdefault(day, Counter()).update(post_statistics(content))
+
+        db.add_text_stats(daily_counts, [row[0] for row in pending])
+        indexed += len(pending)
+
+        if len(pending) < batch_size:
+            break
+
+    return indexed
@@ -15,8 +15,10 @@ import subprocess
 import json
 
 from database import SocialDatabase
+from delta_store import has_deltas, import_deltas
 from analysis.impact_analyzer import ImpactAnalyzer
-from news_scraper import MineriaNewsScraper
+from analysis.risk_engine import RiskEngine
+from jobs import JobRunner
 
 # Importar scrapers solo si hay APIFY_TOKEN (para Streamlit Cloud)
 SCRAPING_ENABLED = bool(os.getenv('APIFY_TOKEN'))
@@ -26,6 +28,10 @@ if SCRAPING_ENABLED:
     except Exception:
         SCRAPING_ENABLED = False
 
+# Con deltas, los posts llegan de la corrida diaria: un scraping desde el dashboard solo
+# escribiría en la copia local de la base, no se exporta y la próxima importación lo pisa
+DELTAS_IN_USE = has_deltas()
+
 # Configuración de página
 st.set_page_config(
     page_title="Monitor Social - Minería Mendoza",
@@ -264,9 +270,96 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Inicializar componentes
-db = SocialDatabase()
+@st.cache_resource
+def load_database():
+    """Base de datos completada con los archivos de data/deltas que todavía no se aplicaron"""
+    database = SocialDatabase()
+    since_days = os.getenv('DELTAS_SINCE_DAYS')
+    import_deltas(database, since_days=int(since_days) if since_days else None)
+    return database
+
+
+@st.cache_resource
+def load_job_runner():
+    """Un ejecutor de trabajos por proceso, compartido entre sesiones"""
+    return JobRunner(load_database())
+
+
+db = load_database()
 analyzer = ImpactAnalyzer()
-news_scraper = MineriaNewsScraper()
+job_runner = load_job_runner()
+
+
+def describe_job_result(job: dict) -> str:
+    result = job['result'] or {}
+    if job['kind'] == 'news':
+        return f"Top Stories: {result.get('new_top_stories', 0)} nuevas | Noticias: {result.get('new_news', 0)} nuevas"
+    new = sum(platform.get('new', 0) for platform in result.values())
+    updated = sum(platform.get('updated', 0) for platform in result.values())
+    return f"{new} posts nuevos, {updated} actualizados"
+
+
+def render_job_status(kind: str) -> None:
+    """Estado del último trabajo de `kind`; mientras está activo se refresca solo cada 2 segundos"""
+    job = job_runner.latest(kind)
+    if not job:
+        return
+    was_active = job_runner.is_active(job)
+
+    @st.fragment(run_every=2 if was_active else None)
+    def job_status():
+        current = job_runner.status(job['id'])
+        if job_runner.is_active(current):
+            label = current['message'] or ("En cola..." if current['status'] == 'queued' else "Iniciando...")
+            st.progress(min(int(current['progress'] or 0), 100), text=label)
+        elif was_active:
+            # Terminó mientras se mostraba: recargar la página con los datos nuevos
+            st.rerun()
+        elif current['status'] == 'failed':
+            st.warning(f"Última actualización fallida: {current['error']}")
+        else:
+            st.caption(f"Última actualización ({(current['finished_at'] or '')[:16]} UTC): {describe_job_result(current)}")
+
+    job_status()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_live_panel(hours: int = 48) -> dict:
+    """Panel de las últimas horas; se recalcula como mucho cada 5 minutos"""
+    return analyzer.get_live_panel(hours=hours)
+
+
+def render_news_page(table: str, key: str, source: str = None, hours: int = None, page_size: int = 25) -> None:
+    """Muestra solo la página visible de noticias; los cursores de las páginas visitadas quedan en session_state"""
+    state_key = f"{key}_{source}_{hours}"
+    cursors = st.session_state.setdefault(state_key, [None])
+    page = db.get_news_page(table, source=source, hours=hours, page_size=page_size, after=cursors[-1])
+
+    df_page = pd.DataFrame(page['items'], columns=['title', 'source', 'link'])
+    df_page.columns = ['Título', 'Medio', 'URL']
+    st.dataframe(
+        df_page,
+        column_config={
+            "URL": st.column_config.LinkColumn("URL"),
+            "Título": st.column_config.TextColumn("Título", width="large"),
+            "Medio": st.column_config.TextColumn("Medio", width="medium")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    total = db.count_news(table, source=source, hours=hours)
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("← Anterior", key=f"{state_key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Página {len(cursors)} de {max(1, -(-total // page_size))} ({total} noticias)")
+    with col_next:
+        if st.button("Siguiente →", key=f"{state_key}_next", disabled=page['next_cursor'] is None):
+            cursors.append(page['next_cursor'])
+            st.rerun()
 
 # Sidebar
 with st.sidebar:
@@ -308,9 +401,16 @@ with st.sidebar:
     st.markdown("---")
 
     # Botón de actualización
+    # Botón de actualización: encola el scraping de redes y muestra el avance sin bloquear la página
     if st.button("🔄 Actualizar Datos", type="primary", use_container_width=True):
-        with st.spinner("Actualizando datos de redes sociales..."):
-            st.session_state['updating'] = True
+        if not SCRAPING_ENABLED:
+            st.warning("Scraping de redes deshabilitado: configura APIFY_TOKEN")
+        elif DELTAS_IN_USE:
+            st.warning("Los datos de redes se actualizan con la corrida diaria (data/deltas); "
+                       "ejecuta `python run_scraper.py` y exporta los deltas para actualizarlos")
+        else:
+            job_runner.submit('social')
+    render_job_status('social')
 
     # Info
     st.markdown("---")
@@ -331,8 +431,10 @@ if page == "Análisis 48 Horas":
     st.header("Indice de Riesgo de Movilizacion - Ultimas 48 Horas")
 
     # ===== INDICE DE RIESGO PRINCIPAL =====
-    # Nivel actual: MEDIO - Post aprobacion, sin convocatorias masivas nuevas
-    riesgo_nivel = "MEDIO"  # ALTO, MEDIO, BAJO
+    # Nivel actual: último bucket de la serie de riesgo (se recalcula solo con datos nuevos)
+    risk_engine = RiskEngine(analyzer)
+    riesgo_actual = risk_engine.current()
+    riesgo_nivel = riesgo_actual['risk_level'] if riesgo_actual else "MEDIO"  # ALTO, MEDIO, BAJO
     riesgo_color = "#f59e0b"  # amarillo para MEDIO
     riesgo_icon = "⚠️"
 
@@ -364,6 +466,20 @@ if page == "Análisis 48 Horas":
     </div>
     """, unsafe_allow_html=True)
 
+    # Evolución del índice (ventana de 14 días que termina cada día)
+    riesgo_historial = risk_engine.history(days=30)
+    if riesgo_historial:
+        df_riesgo = pd.DataFrame(riesgo_historial)
+        fig_riesgo = px.line(
+            df_riesgo, x='bucket', y='risk_percentage', markers=True,
+            hover_data=['risk_level', 'engagement', 'mobilization_calls'],
+            labels={'bucket': 'Día', 'risk_percentage': 'Riesgo (%)'}
+        )
+        fig_riesgo.add_hline(y=70, line_dash="dash", line_color="#dc2626")
+        fig_riesgo.add_hline(y=40, line_dash="dash", line_color="#f59e0b")
+        fig_riesgo.update_layout(height=250, margin=dict(l=20, r=20, t=20, b=20))
+        st.plotly_chart(fig_riesgo, use_container_width=True)
+
     # ===== EXPLICACION DEL NIVEL =====
     col_exp1, col_exp2, col_exp3 = st.columns(3)
 
@@ -394,15 +510,21 @@ if page == "Análisis 48 Horas":
     st.markdown("---")
 
     # ===== SITUACION ACTUAL =====
-    st.subheader("Situacion Actual (11 de Diciembre)")
+    panel = load_live_panel(48)
+    actividad, tendencia = panel['activity'], panel['trends']
+    convocatorias_48h = panel['mobilization_calls']
 
-    st.warning("""
-    **POST-APROBACION - DIA 2**
+    st.subheader(f"Situacion Actual ({datetime.fromisoformat(panel['generated_at']).strftime('%d/%m/%Y %H:%M')})")
 
-    Segunda marcha masiva el 10/12 con miles de personas en el microcentro mendocino.
-    Manifestantes marcharon hasta el nudo vial. Sin convocatorias nuevas detectadas.
-    Gobierno promociona el proyecto en Londres (Latorre en Business Design Centre).
-    """)
+    situacion = (
+        f"**Ultimas 48 horas:** {actividad['posts']:,} publicaciones ({tendencia['posts']:+,} vs. 48 horas previas), "
+        f"{actividad['engagement']:,} interacciones ({tendencia['engagement']:+,}), "
+        f"{len(convocatorias_48h)} convocatorias detectadas y {panel['news']} noticias nuevas en medios."
+    )
+    if convocatorias_48h:
+        st.warning(situacion)
+    else:
+        st.info(situacion)
 
     # ===== CONVOCATORIAS DETECTADAS =====
     st.markdown("---")
@@ -412,62 +534,78 @@ if page == "Análisis 48 Horas":
 
     with col_conv1:
         st.markdown("**Ultimas 48 horas:**")
-        st.markdown("""
-        | Fecha | Evento | Convocantes |
-        |-------|--------|-------------|
-        | 10/12 | Marcha microcentro hasta nudo vial | Asambleas |
-        | 9/12 | Concentracion Legislatura (AM) | Multisectorial |
-        | 9/12 | Marcha KM 0 hacia nudo vial (19hs) | Asambleas |
-        | 8-9/12 | Gesta del Agua (+100km a pie) | Asamblea Uspallata |
-        """)
+        if convocatorias_48h:
+            df_conv = pd.DataFrame(convocatorias_48h[:15])
+            df_conv['post_date'] = df_conv['post_date'].str[:16].str.replace('T', ' ')
+            df_conv = df_conv[['post_date', 'event_date', 'author_username', 'platform', 'description', 'post_url']]
+            df_conv.columns = ['Publicado', 'Fecha evento', 'Convocante', 'Red', 'Descripcion', 'URL']
+            st.dataframe(
+                df_conv,
+                column_config={"URL": st.column_config.LinkColumn("URL")},
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.markdown("Sin convocatorias en publicaciones de las ultimas 48 horas.")
 
     with col_conv2:
         st.markdown("**Proximas convocatorias:**")
-        st.markdown("""
-        | Fecha | Evento | Estado |
-        |-------|--------|--------|
-        | - | Sin convocatorias masivas detectadas | - |
-
-        **Nota:** Asambleas declararon "alerta y movilizacion permanente".
-        Proximo foco: presentacion de recursos judiciales (amparos).
-        """)
+        if panel['upcoming_calls']:
+            df_prox = pd.DataFrame(panel['upcoming_calls'])
+            df_prox = df_prox[['event_date', 'author_username', 'platform', 'description', 'post_url']]
+            df_prox.columns = ['Fecha', 'Convocante', 'Red', 'Descripcion', 'URL']
+            st.dataframe(
+                df_prox,
+                column_config={"URL": st.column_config.LinkColumn("URL")},
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.markdown("Sin convocatorias con fecha futura detectadas.")
 
     # ===== INDICADORES DE ACTIVIDAD =====
     st.markdown("---")
     st.subheader("Indicadores de Actividad")
+    st.caption("Variacion respecto de las 48 horas anteriores")
 
-    col_ind1, col_ind2, col_ind3, col_ind4 = st.columns(4)
+    col_ind1, col_ind2, col_ind3 = st.columns(3)
 
     with col_ind1:
-        st.metric("Convocatorias activas", "0", delta="Sin nuevas", delta_color="off")
+        st.metric("Posts con convocatoria", actividad['mobilization_posts'],
+                  delta=tendencia['mobilization_posts'], delta_color="inverse")
+        st.metric("Publicaciones", f"{actividad['posts']:,}", delta=f"{tendencia['posts']:+,}")
 
     with col_ind2:
-        st.metric("Marchas ultimas 48h", "2", delta="9/12 y 10/12")
+        st.metric("Interacciones", f"{actividad['engagement']:,}", delta=f"{tendencia['engagement']:+,}")
+        st.metric("Posts de alto alcance", actividad['high_reach_posts'],
+                  delta=tendencia['high_reach_posts'], delta_color="inverse")
 
     with col_ind3:
-        st.metric("Cobertura mediatica", "Intensa", delta="Nacional + internacional")
-
-    with col_ind4:
-        st.metric("Frente judicial", "26 incumplimientos", delta="Amparos en preparacion")
+        st.metric("Cuentas activas", f"{actividad['active_accounts']:,}", delta=f"{tendencia['active_accounts']:+,}")
+        st.metric("Noticias en medios", panel['news'], delta=tendencia['news'])
 
     # ===== ANALISIS DE TENDENCIA =====
     st.markdown("---")
     st.subheader("Analisis de Tendencia")
 
-    st.markdown("""
-    **Factores que bajan el riesgo:**
-    - La batalla legislativa termino (29 a favor, 6 en contra, 1 abstencion).
-    - No hay nuevas convocatorias masivas detectadas para los proximos dias.
-    - El movimiento transiciona hacia estrategia judicial (amparos por 26 incumplimientos en EIA).
-    - Gobierno avanza con promocion internacional (Latorre en Londres).
-
-    **Factores que mantienen riesgo MEDIO (no BAJO):**
-    - Segunda marcha masiva el 10/12: miles marcharon hasta el nudo vial.
-    - Cobertura mediatica intensa: Pagina12, Perfil, BigBang, medios internacionales.
-    - Greenpeace advierte sobre "falta de licencia social" y riesgo hidrico.
-    - Facultad de Ciencias Medicas alerto sobre sustancias toxicas (xantatos, poliacrilamidas).
-    - Proximo hito nacional: debate por Ley de Glaciares puede reactivar movilizacion.
-    """)
+    col_tend1, col_tend2 = st.columns([3, 2])
+
+    with col_tend1:
+        st.markdown("**Actividad por red (48 horas y variacion):**")
+        if panel['by_platform']:
+            df_plat = pd.DataFrame(panel['by_platform'])
+            df_plat.columns = ['Red', 'Posts', 'Var. posts', 'Interacciones', 'Var. interacciones']
+            st.dataframe(df_plat, hide_index=True, use_container_width=True)
+        else:
+            st.markdown("Sin publicaciones en las ultimas 96 horas.")
+
+    with col_tend2:
+        st.markdown(f"**Factores del nivel {riesgo_nivel} (ventana de 14 dias):**")
+        factores = riesgo_actual['risk_factors'] if riesgo_actual else []
+        if factores:
+            st.markdown("\n".join(f"- {factor} (+{puntos})" for factor, puntos in factores))
+        else:
+            st.markdown("Sin datos suficientes para evaluar factores.")
 
     # ===== ESCENARIOS PROXIMAS 48-72 HORAS =====
     st.markdown("---")
@@ -504,22 +642,23 @@ if page == "Análisis 48 Horas":
     col_act1, col_act2 = st.columns(2)
 
     with col_act1:
-        st.markdown("**Organizaciones clave:**")
-        st.markdown("""
-        - Asamblea por el Agua de Uspallata
-        - Asambleas del Valle de Uco
-        - Multisectorial por el Agua
-        - Organizaciones de izquierda (PTS, MST)
-        """)
+        st.markdown("**Cuentas con mas interacciones (48 horas):**")
+        if panel['top_accounts']:
+            df_top_cuentas = pd.DataFrame(panel['top_accounts'])
+            df_top_cuentas = df_top_cuentas[['username', 'platform', 'posts', 'total_engagement', 'mobilization_posts']]
+            df_top_cuentas.columns = ['Cuenta', 'Red', 'Posts', 'Interacciones', 'Convocatorias']
+            st.dataframe(df_top_cuentas, hide_index=True, use_container_width=True)
+        else:
+            st.markdown("Sin actividad en las ultimas 48 horas.")
 
     with col_act2:
-        st.markdown("**Cuentas en redes:**")
-        st.markdown("""
-        - @asamblea.uspallata (Instagram)
-        - @marcelo_romano0 (influencer antiminero)
-        - @cuyo.ambiental
-        - Grupos de Facebook de San Carlos y Uspallata
-        """)
+        st.markdown("**Cuentas clave monitoreadas:**")
+        activas = {(cuenta['platform'], cuenta['username'].lower()) for cuenta in panel['top_accounts']}
+        st.markdown("\n".join(
+            f"- @{cuenta['username']} ({cuenta['platform'].capitalize()})"
+            + (" - entre las mas activas de las ultimas 48 horas" if (cuenta['platform'], cuenta['username'].lower()) in activas else "")
+            for cuenta in db.get_monitored_accounts() if cuenta.get('is_key_account')
+        ))
 
     # ===== RECOMENDACIONES =====
     st.markdown("---")
@@ -536,7 +675,7 @@ if page == "Análisis 48 Horas":
 
     # Timestamp con más detalle
     st.markdown("---")
-    st.caption(f"Análisis generado: {datetime.now().strftime('%d/%m/%Y %H:%M')} | Fuentes: {db.get_post_count():,} posts de redes + {db.get_article_count('news_results')} noticias de medios")
+    st.caption(f"Análisis generado: {datetime.fromisoformat(panel['generated_at']).strftime('%d/%m/%Y %H:%M')} | Fuentes: {db.get_post_count():,} posts de redes + {db.get_article_count('news_results')} noticias de medios")
 
 # ========== PÁGINA: DATOS DE MEDIOS ==========
 elif page == "Datos de Medios":
@@ -555,23 +694,19 @@ elif page == "Datos de Medios":
     col_btn, col_info = st.columns([1, 3])
     with col_btn:
         if st.button("Actualizar Noticias", type="primary", use_container_width=True):
-            with st.spinner("Buscando nuevas noticias sobre minería..."):
-                summary = news_scraper.run()
-                if 'error' in summary:
-                    st.warning(f"Scraping limitado: {summary['error']}")
-                else:
-                    st.success(f"Top Stories: {summary['new_top_stories']} nuevas | Noticias: {summary['new_news']} nuevas")
-                st.rerun()
+            # Se ejecuta en segundo plano; un segundo clic mientras corre reutiliza el mismo trabajo
+            job_runner.submit('news')
+        render_job_status('news')
 
     with col_info:
         st.info("Las noticias se actualizan automáticamente. Puedes hacer clic en el botón para forzar una actualización manual.")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # Obtener datos - Top Stories (todas) y Noticias (últimas 7 días)
-    top_stories = news_scraper.get_top_stories(limit=500)
-    all_news = news_scraper.get_all_news(limit=500, hours=168)  # Últimos 7 días (168 horas)
-    all_news_total = news_scraper.get_all_news(limit=500)  # Todas las noticias para estadísticas
+    # Conteos en SQL - Top Stories (todas) y Noticias (últimos 7 días = 168 horas)
+    top_stories_count = db.count_news('top_stories')
+    news_count = db.count_news('news_results', hours=168)
+    news_total_count = db.get_article_count('news_results')
 
     # ========== SECCIÓN 1: TOP STORIES ==========
     st.subheader("Noticias destacadas en Google Top Stories")
@@ -593,23 +728,9 @@ elif page == "Datos de Medios":
     </div>
     """, unsafe_allow_html=True)
 
-    if top_stories:
-        df_top = pd.DataFrame(top_stories)
-
-        # Mostrar tabla
-        df_top_display = df_top[['title', 'source', 'link']].copy()
-        df_top_display.columns = ['Título', 'Medio', 'URL']
-
-        st.dataframe(
-            df_top_display,
-            column_config={
-                "URL": st.column_config.LinkColumn("URL"),
-                "Título": st.column_config.TextColumn("Título", width="large"),
-                "Medio": st.column_config.TextColumn("Medio", width="medium")
-            },
-            hide_index=True,
-            use_container_width=True
-        )
+    if top_stories_count:
+        # Mostrar tabla (solo la página visible)
+        render_news_page('top_stories', key='top_stories_page')
 
         # Gráfico de distribución por medio
         st.subheader("Medios que más hablan de minería en Top Stories")
@@ -632,8 +753,8 @@ elif page == "Datos de Medios":
                 st.plotly_chart(fig, use_container_width=True)
 
             with col_stats:
-                st.metric("Total Top Stories", len(df_top))
-                st.metric("Medios Únicos", df_top['source'].nunique())
+                st.metric("Total Top Stories", top_stories_count)
+                st.metric("Medios Únicos", len(media_stats))
         else:
             st.info("No hay suficientes datos para mostrar estadísticas de medios")
     else:
@@ -660,34 +781,17 @@ elif page == "Datos de Medios":
     </div>
     """, unsafe_allow_html=True)
 
-    if all_news:
-        df_news = pd.DataFrame(all_news)
-
-        st.success(f"Se encontraron **{len(all_news)} noticias** en los últimos 7 días")
+    if news_count:
+        st.success(f"Se encontraron **{news_count} noticias** en los últimos 7 días")
 
-        # Filtro por medio
-        all_sources = ["Todos"] + sorted(df_news['source'].dropna().unique().tolist())
+        # Filtro por medio (medios y conteos de los últimos 7 días desde SQL)
+        week_sources = db.get_media_stats('news_results', hours=168)
+        all_sources = ["Todos"] + sorted(stat['source'] for stat in week_sources)
         selected_source = st.selectbox("Filtrar por medio:", all_sources)
+        source_filter = None if selected_source == "Todos" else selected_source
 
-        if selected_source != "Todos":
-            df_news_filtered = df_news[df_news['source'] == selected_source]
-        else:
-            df_news_filtered = df_news
-
-        # Mostrar tabla
-        df_news_display = df_news_filtered[['title', 'source', 'link']].copy()
-        df_news_display.columns = ['Título', 'Medio', 'URL']
-
-        st.dataframe(
-            df_news_display,
-            column_config={
-                "URL": st.column_config.LinkColumn("URL"),
-                "Título": st.column_config.TextColumn("Título", width="large"),
-                "Medio": st.column_config.TextColumn("Medio", width="medium")
-            },
-            hide_index=True,
-            use_container_width=True
-        )
+        # Mostrar tabla (solo la página visible, filtrada en SQL)
+        render_news_page('news_results', key='news_page', source=source_filter, hours=168)
 
         # Gráfico de distribución por medio
         st.subheader("Medios que más hablan de minería en general")
@@ -710,16 +814,16 @@ elif page == "Datos de Medios":
                 st.plotly_chart(fig2, use_container_width=True)
 
             with col_stats2:
-                st.metric("Noticias (7 días)", len(df_news_filtered))
-                st.metric("Total Histórico", len(all_news_total))
-                st.metric("Medios Únicos", df_news_filtered['source'].nunique())
+                st.metric("Noticias (7 días)", db.count_news('news_results', source=source_filter, hours=168))
+                st.metric("Total Histórico", news_total_count)
+                st.metric("Medios Únicos", 1 if source_filter else len(week_sources))
         else:
             st.info("No hay suficientes datos para mostrar estadísticas de medios")
     else:
         # No hay noticias en los últimos 7 días
         st.warning("No hay noticias de los últimos 7 días. La última actualización fue hace más de 7 días.")
-        if all_news_total:
-            st.info(f"Hay **{len(all_news_total)} noticias** en el histórico. Haz clic en 'Actualizar Noticias' para obtener las más recientes.")
+        if news_total_count:
+            st.info(f"Hay **{news_total_count} noticias** en el histórico. Haz clic en 'Actualizar Noticias' para obtener las más recientes.")
 
 
 
@@ -0,0 +1,3 @@
+"""
+Benchmarks del Monitor Social - generador sintético y escenarios cronometrados
+"""
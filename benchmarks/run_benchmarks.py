@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks end-to-end del Monitor Social (sin Apify ni SerpAPI)
+Uso: python -m benchmarks.run_benchmarks [--size 10000] [--baseline benchmarks/baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform as platform_info
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SyntheticGenerator, NEWS_SOURCES, PLATFORMS
+from database import canonical_url
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "last_run.json")
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def timed(func: Callable, repeat: int = 1) -> float:
+    """Ejecuta `func` `repeat` veces y devuelve el mejor tiempo en segundos"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def walk_pages(fetch_page: Callable, pages: int) -> None:
+    """Recorre `pages` páginas siguiendo el cursor de cada respuesta"""
+    after = None
+    for _ in range(pages):
+        after = fetch_page(after)['next_cursor']
+        if after is None:
+            break
+
+
+def bulk_load_posts(db, generator: SyntheticGenerator, start: int, count: int, batch_size: int = 20_000) -> None:
+    """Carga posts normalizados directamente con executemany (relleno hasta el tamaño pedido)"""
+    conn = sqlite3.connect(db.db_path)
+    cursor = conn.cursor()
+
+    for batch_start in range(start, start + count, batch_size):
+        rows = []
+        for i in range(batch_start, min(batch_start + batch_size, start + count)):
+            post = generator.post_row(i)
+            engagement = post['likes'] + post['comments'] + post['shares']
+            rows.append((
+                post['platform'], post['post_id'], post['post_url'], canonical_url(post['post_url']),
+                post['author_username'],
+                post['author_name'], post['author_followers'], post['content'], post['post_type'],
+                post['likes'], post['comments'], post['shares'], post['views'], engagement,
+                db._calculate_reach_level(engagement), post['sentiment'],
+                post['has_mobilization_call'], '[]', post['post_date']
+            ))
+
+        cursor.executemany('''
+            INSERT OR IGNORE INTO posts (
+                platform, post_id, post_url, url_key, author_username, author_name,
+                author_followers, content, post_type, likes, comments, shares,
+                views, engagement_total, reach_level, sentiment,
+                has_mobilization_call, keywords_matched, post_date
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    # Convocatorias asociadas a los posts con llamado a movilización
+    cursor.execute('''
+        INSERT INTO mobilization_calls (post_id, event_date, description)
+        SELECT id, substr(post_date, 1, 10), substr(content, 1, 200)
+        FROM posts WHERE has_mobilization_call = 1
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def run_suite(size: int, seed: int, ingest_limit: int, repeat: int) -> Dict[str, float]:
+    """
+    Genera la base sintética en un directorio temporal y cronometra todos los escenarios.
+    Al terminar borra el directorio y restaura SOCIAL_MONITOR_DB.
+    """
+    workdir = tempfile.mkdtemp(prefix="social_monitor_bench_")
+    previous_db = os.environ.get('SOCIAL_MONITOR_DB')
+    os.environ['SOCIAL_MONITOR_DB'] = os.path.join(workdir, "bench.db")
+    try:
+        return _run_scenarios(size, seed, ingest_limit, repeat)
+    finally:
+        if previous_db is None:
+            os.environ.pop('SOCIAL_MONITOR_DB', None)
+        else:
+            os.environ['SOCIAL_MONITOR_DB'] = previous_db
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_scenarios(size: int, seed: int, ingest_limit: int, repeat: int) -> Dict[str, float]:
+    """Cronometra los escenarios sobre la base de SOCIAL_MONITOR_DB"""
+    results = {}
+
+    from database import SocialDatabase
+    from scrapers import InstagramScraper, FacebookScraper, TikTokScraper, TwitterScraper
+    from analysis import ImpactAnalyzer
+    from analysis.emerging_narratives import update_narratives
+
+    generator = SyntheticGenerator(seed=seed)
+    db = SocialDatabase()
+
+    # ===== 1. Ingesta: parse + enriquecimiento + escritura por plataforma =====
+    scrapers = {
+        'instagram': InstagramScraper(),
+        'facebook': FacebookScraper(),
+        'tiktok': TikTokScraper(),
+        'twitter': TwitterScraper(),
+    }
+    ingest_per_platform = max(1, min(size, ingest_limit) // len(PLATFORMS))
+    ingested = 0
+
+    for platform in PLATFORMS:
+        raw = generator.raw_posts(platform, ingest_per_platform, start=ingested)
+        results[f'ingest.process_and_store.{platform}'] = timed(
+            lambda: scrapers[platform].process_and_store(raw)
+        )
+        ingested += ingest_per_platform
+
+    # Segunda pasada: los mismos posts de TikTok con métricas nuevas (ruta de actualización)
+    tiktok_start = PLATFORMS.index('tiktok') * ingest_per_platform
+    raw = generator.raw_posts('tiktok', ingest_per_platform, start=tiktok_start)
+    results['ingest.process_and_store.update_path'] = timed(
+        lambda: scrapers['tiktok'].process_and_store(raw)
+    )
+
+    # Tercera pasada en la misma corrida: repetidos descartados por la caché de dedup
+    results['ingest.process_and_store.dedup_path'] = timed(
+        lambda: scrapers['tiktok'].process_and_store(raw)
+    )
+
+    # Corrida nueva sin cambios: solo se comparan métricas contra la BD
+    scrapers['tiktok'].dedup.clear()
+    results['ingest.process_and_store.unchanged_path'] = timed(
+        lambda: scrapers['tiktok'].process_and_store(raw)
+    )
+
+    # ===== 2. Enriquecimiento aislado =====
+    scraper = scrapers['twitter']
+    contents = [generator.raw_post('twitter', i)['full_text'] for i in range(min(size, 5000))]
+    results['enrich.analyze_sentiment'] = timed(lambda: [scraper.analyze_sentiment(c) for c in contents])
+    results['enrich.detect_mobilization_call'] = timed(lambda: [scraper.detect_mobilization_call(c) for c in contents], repeat)
+    results['enrich.match_keywords'] = timed(lambda: [scraper.match_keywords(c) for c in contents], repeat)
+    results['enrich.extract_narratives'] = timed(lambda: [scraper.extract_narratives(c) for c in contents], repeat)
+
+    # ===== 3. Relleno hasta el tamaño pedido =====
+    results['load.bulk_posts'] = timed(lambda: bulk_load_posts(db, generator, ingested, max(0, size - ingested)))
+
+    for i in range(min(size, 20_000)):
+        db.insert_news_result(generator.news_article(i))
+        if i % 10 == 0:
+            article = generator.news_article(i)
+            db.insert_top_story({**article, 'source': article['source']['name']})
+
+    conn = sqlite3.connect(db.db_path)
+    conn.executemany(
+        'INSERT INTO youtube_viewers_history (video_id, viewers_count, recorded_at) VALUES (?, ?, ?)',
+        generator.viewer_samples(min(size, 100_000))
+    )
+    conn.commit()
+    conn.close()
+    db.backfill_youtube_viewers_rollups()
+
+    # ===== 4. Consultas de SocialDatabase =====
+    queries = {
+        'get_posts': lambda: db.get_posts(days=14, limit=500),
+        'get_posts.platform': lambda: db.get_posts(platform='tiktok', days=14, limit=500),
+        'get_post_frame': lambda: db.get_post_frame(
+            ['platform', 'reach_level', 'sentiment', 'likes', 'comments', 'shares', 'views'], days=14
+        ),
+        'get_top_posts': lambda: db.get_top_posts(limit=10, days=14),
+        'get_post_metric_rows': lambda: db.get_post_metric_rows(days=14),
+        'get_consolidated_metrics': lambda: db.get_consolidated_metrics(days=14),
+        'get_reach_distribution': lambda: db.get_reach_distribution(days=14),
+        'get_sentiment_distribution': lambda: db.get_sentiment_distribution(days=14),
+        'get_mobilization_calls': lambda: db.get_mobilization_calls(days=14),
+        'get_narratives': lambda: db.get_narratives(),
+        'get_monitored_accounts': lambda: db.get_monitored_accounts(),
+        'get_active_keywords': lambda: db.get_active_keywords(),
+        'get_news_results': lambda: db.get_news_results(limit=500),
+        'get_news_results.hours': lambda: db.get_news_results(limit=500, hours=168),
+        'get_news_page': lambda: db.get_news_page('news_results', page_size=25),
+        'get_news_page.source': lambda: db.get_news_page('news_results', source=NEWS_SOURCES[0], page_size=25),
+        'get_news_page.deep': lambda: walk_pages(
+            lambda after: db.get_news_page('news_results', page_size=25, after=after), 40
+        ),
+        'count_news': lambda: db.count_news('news_results'),
+        'count_news.source_hours': lambda: db.count_news('news_results', source=NEWS_SOURCES[0], hours=168),
+        'get_posts_page': lambda: db.get_posts_page(days=14, page_size=25),
+        'get_posts_page.platform': lambda: db.get_posts_page(platform='tiktok', days=14, page_size=25),
+        'get_posts_page.deep': lambda: walk_pages(
+            lambda after: db.get_posts_page(days=14, page_size=25, after=after), 40
+        ),
+        'get_top_stories_news': lambda: db.get_top_stories_news(limit=500),
+        'get_media_stats': lambda: db.get_media_stats('news_results'),
+        'get_post_count': lambda: db.get_post_count(),
+        'get_youtube_viewers_history': lambda: db.get_youtube_viewers_history('live0', hours=24),
+        'get_youtube_viewers_history.minute': lambda: db.get_youtube_viewers_history('live0', hours=24, resolution='minute'),
+        'get_youtube_viewers_stats': lambda: db.get_youtube_viewers_stats('live0'),
+    }
+    for name, query in queries.items():
+        results[f'db.{name}'] = timed(query, repeat)
+
+    # ===== 5. Reporte completo de ImpactAnalyzer =====
+    analyzer = ImpactAnalyzer()
+    results['report.analyze_narratives.first'] = timed(lambda: analyzer.analyze_narratives(days=14))
+    results['report.get_consolidated_metrics'] = timed(lambda: analyzer.get_consolidated_metrics(days=14), repeat)
+    results['report.evaluate_risk'] = timed(lambda: analyzer.evaluate_risk(days=14), repeat)
+    results['report.analyze_narratives'] = timed(lambda: analyzer.analyze_narratives(days=14), repeat)
+    results['report.get_duplicate_clusters.first'] = timed(lambda: analyzer.get_duplicate_clusters(days=14))
+    results['report.get_duplicate_clusters'] = timed(lambda: analyzer.get_duplicate_clusters(days=14), repeat)
+    results['report.update_narratives.first'] = timed(lambda: update_narratives(analyzer.db))
+    results['report.update_narratives'] = timed(lambda: update_narratives(analyzer.db), repeat)
+    results['report.get_top_accounts'] = timed(lambda: analyzer.get_top_accounts(days=14), repeat)
+    results['report.get_live_panel'] = timed(lambda: analyzer.get_live_panel(hours=48), repeat)
+    results['report.generate_full_report'] = timed(lambda: analyzer.generate_full_report(days=14), repeat)
+
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            threshold: float, min_delta: float) -> list:
+    """Devuelve los escenarios más lentos que el baseline por encima del umbral"""
+    regressions = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = seconds / base
+        if ratio > threshold and seconds - base > min_delta:
+            regressions.append({'scenario': name, 'baseline': base, 'current': seconds, 'ratio': round(ratio, 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del Monitor Social')
+    parser.add_argument('--size', '-s', choices=list(SIZES.keys()), default='10k',
+                        help='Cantidad de posts sintéticos (default: 10k)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla del generador (default: 42)')
+    parser.add_argument('--ingest-limit', type=int, default=10_000,
+                        help='Máximo de posts que pasan por process_and_store (default: 10000)')
+    parser.add_argument('--repeat', '-r', type=int, default=3,
+                        help='Repeticiones por consulta, se toma el mejor tiempo (default: 3)')
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT, help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', '-b', default=DEFAULT_BASELINE, help='Baseline JSON a comparar')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como baseline')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Relación actual/baseline a partir de la cual se marca regresión (default: 1.25)')
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help='Diferencia mínima en segundos para marcar regresión (default: 0.005)')
+    args = parser.parse_args()
+
+    size = SIZES[args.size]
+    print(f"Benchmark con {size:,} posts sintéticos (semilla {args.seed})...")
+
+    results = run_suite(size, args.seed, args.ingest_limit, args.repeat)
+
+    report = {
+        'meta': {
+            'size': args.size,
+            'seed': args.seed,
+            'python': platform_info.python_version(),
+            'machine': platform_info.machine(),
+            'timestamp': datetime.now().isoformat(),
+        },
+        'results': results,
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Escenario':<48} {'Segundos':>10}")
+    print("-" * 60)
+    for name, seconds in results.items():
+        print(f"{name:<48} {seconds:>10.4f}")
+    print(f"\nResultados guardados en: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline guardado en: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Sin baseline para comparar (usar --save-baseline para crearlo)")
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    if baseline.get('meta', {}).get('size') != args.size:
+        print(f"Aviso: el baseline es de tamaño {baseline.get('meta', {}).get('size')}, no {args.size}")
+
+    regressions = compare(results, baseline.get('results', {}), args.threshold, args.min_delta)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regresiones detectadas:")
+        for reg in regressions:
+            print(f"  - {reg['scenario']}: {reg['baseline']:.4f}s -> {reg['current']:.4f}s (x{reg['ratio']})")
+        sys.exit(1)
+
+    print("\n✓ Sin regresiones respecto al baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Generador sintético de datos para benchmarks
+Posts en español con el formato crudo de cada actor de Apify, noticias y viewers
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+
+PLATFORMS = ['instagram', 'facebook', 'tiktok', 'twitter']
+
+VOCABULARY = [
+    'agua', 'minería', 'mendoza', 'cobre', 'proyecto', 'legislatura', 'uspallata',
+    'glaciares', 'ambiente', 'desarrollo', 'empleo', 'inversión', 'asamblea',
+    'vecinos', 'sesión', 'diputados', 'senadores', 'votación', 'audiencia',
+    'pública', 'riesgo', 'hídrico', 'cordillera', 'montaña', 'futuro', 'trabajo',
+    'licencia', 'social', 'provincia', 'gobierno', 'empresa', 'impacto', 'estudio',
+    'informe', 'defensa', 'territorio', 'comunidad', 'jornada', 'debate', 'derechos',
+]
+
+NARRATIVES = [
+    "el agua vale más que el oro",
+    "el agua de mendoza no se negocia",
+    "no a san jorge",
+    "la 7722 no se toca",
+    "el agua es vida",
+    "mendoza es hija del agua",
+    "no a la mina",
+]
+
+MOBILIZATION_PHRASES = [
+    "convocatoria a la plaza independencia",
+    "nos vemos en la legislatura el 26/11",
+    "marcha a las 19hs desde el km 0",
+    "todos a la calle este 10 de diciembre",
+]
+
+HASHTAGS = ['#AguaParaMendoza', '#NoALaMina', '#PSJCobreMendocino', '#Ley7722', '#Uspallata']
+
+NEWS_SOURCES = ['Los Andes', 'MDZ Online', 'El Sol', 'Página 12', 'Infobae', 'Unidiversidad', 'Perfil']
+
+
+class SyntheticGenerator:
+    """Genera datos reproducibles a partir de una semilla"""
+
+    def __init__(self, seed: int = 42, days: int = 30, authors_per_platform: int = 500):
+        self.rng = random.Random(seed)
+        self.now = datetime.now()
+        self.days = days
+        self.authors = {
+            platform: [f"{platform[:2]}_user_{i}" for i in range(authors_per_platform)]
+            for platform in PLATFORMS
+        }
+
+    def _text(self) -> str:
+        """Texto de un post: palabras del vocabulario, a veces con consignas y convocatorias"""
+        rng = self.rng
+        words = rng.choices(VOCABULARY, k=rng.randint(8, 40))
+        if rng.random() < 0.3:
+            words.insert(rng.randint(0, len(words)), rng.choice(NARRATIVES))
+        if rng.random() < 0.05:
+            words.append(rng.choice(MOBILIZATION_PHRASES))
+        if rng.random() < 0.5:
+            words.extend(rng.sample(HASHTAGS, rng.randint(1, 3)))
+        return " ".join(words).capitalize()
+
+    def _date(self) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randint(0, self.days * 86400))
+
+    def _metrics(self) -> Dict:
+        """Métricas con distribución de cola larga (pocos posts virales)"""
+        rng = self.rng
+        likes = int(rng.paretovariate(1.2) * 20)
+        return {
+            'likes': likes,
+            'comments': int(likes * rng.uniform(0, 0.2)),
+            'shares': int(likes * rng.uniform(0, 0.1)),
+            'views': int(likes * rng.uniform(5, 40)),
+        }
+
+    def raw_post(self, platform: str, index: int) -> Dict:
+        """Un post con la estructura que devuelve el actor de Apify de la plataforma"""
+        rng = self.rng
+        author = rng.choice(self.authors[platform])
+        m = self._metrics()
+        date = self._date()
+        post_id = f"{platform}{index}"
+
+        if platform == 'instagram':
+            return {
+                'id': post_id,
+                'shortCode': f"SC{index:09d}",
+                'ownerUsername': author,
+                'ownerFullName': author.replace('_', ' ').title(),
+                'caption': self._text(),
+                'likesCount': m['likes'],
+                'commentsCount': m['comments'],
+                'videoViewCount': m['views'] if rng.random() < 0.3 else 0,
+                'type': rng.choice(['Image', 'Sidecar', 'Video']),
+                'timestamp': date.isoformat(),
+            }
+        if platform == 'facebook':
+            return {
+                'postId': post_id,
+                'postUrl': f"https://www.facebook.com/{author}/posts/{index}",
+                'user': {'id': author, 'name': author.replace('_', ' ').title()},
+                'text': self._text(),
+                'likes': m['likes'],
+                'comments': m['comments'],
+                'shares': m['shares'],
+                'time': date.isoformat(),
+            }
+        if platform == 'tiktok':
+            return {
+                'id': post_id,
+                'webVideoUrl': f"https://www.tiktok.com/@{author}/video/{index}",
+                'authorMeta': {'name': author, 'nickName': author.title(), 'fans': rng.randint(0, 200000)},
+                'text': self._text(),
+                'diggCount': m['likes'],
+                'commentCount': m['comments'],
+                'shareCount': m['shares'],
+                'playCount': m['views'],
+                'createTime': int(date.timestamp()),
+            }
+        return {
+            'id': post_id,
+            'url': f"https://twitter.com/{author}/status/{index}",
+            'user': {'screen_name': author, 'name': author.title(), 'followers_count': rng.randint(0, 50000)},
+            'full_text': self._text(),
+            'favorite_count': m['likes'],
+            'reply_count': m['comments'],
+            'retweet_count': m['shares'],
+            'views': m['views'],
+            'created_at': date.strftime("%a %b %d %H:%M:%S +0000 %Y"),
+        }
+
+    def raw_posts(self, platform: str, n: int, start: int = 0) -> List[Dict]:
+        return [self.raw_post(platform, start + i) for i in range(n)]
+
+    def post_row(self, index: int) -> Dict:
+        """Un post ya normalizado (formato de SocialDatabase) para carga masiva"""
+        rng = self.rng
+        platform = PLATFORMS[index % len(PLATFORMS)]
+        m = self._metrics()
+        content = self._text()
+        return {
+            'platform': platform,
+            'post_id': f"{platform}{index}",
+            'post_url': f"https://synthetic.local/{platform}/{index}",
+            'author_username': rng.choice(self.authors[platform]),
+            'author_name': None,
+            'author_followers': rng.randint(0, 100000),
+            'content': content,
+            'post_type': rng.choice(['image', 'video', 'carousel', 'tweet']),
+            'likes': m['likes'],
+            'comments': m['comments'],
+            'shares': m['shares'],
+            'views': m['views'],
+            'sentiment': rng.choice(['positivo', 'negativo', 'neutral']),
+            'has_mobilization_call': any(p in content.lower() for p in MOBILIZATION_PHRASES),
+            'post_date': self._date().isoformat(),
+        }
+
+    def news_article(self, index: int) -> Dict:
+        """Un resultado de Google News con el formato de SerpAPI"""
+        rng = self.rng
+        return {
+            'title': f"{rng.choice(VOCABULARY).capitalize()} y minería en Mendoza: {' '.join(rng.choices(VOCABULARY, k=6))}",
+            'link': f"https://news.synthetic.local/{index}",
+            'source': {'name': rng.choice(NEWS_SOURCES)},
+            'snippet': " ".join(rng.choices(VOCABULARY, k=25)),
+            'date': self._date().strftime('%m/%d/%Y'),
+            'thumbnail': None,
+        }
+
+    def viewer_samples(self, n: int, videos: int = 5) -> List[tuple]:
+        """Muestras (video_id, viewers, recorded_at) cada 30 segundos por video"""
+        rng = self.rng
+        start = self.now - timedelta(seconds=30 * (n // videos))
+        samples = []
+        for i in range(n):
+            video = f"live{i % videos}"
+            recorded_at = start + timedelta(seconds=30 * (i // videos))
+            samples.append((video, max(0, int(rng.gauss(3000, 800))), recorded_at.strftime('%Y-%m-%d %H:%M:%S')))
+        return samples
@@ -6,13 +6,50 @@ Almacena publicaciones de Instagram, Facebook, TikTok y Twitter
 import sqlite3
 import shutil
 import os
+import zlib
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
 import json
 
+from instrumentation import instrumented
+from post_frame import FRAME_COLUMNS, PostFrame
+
+
+# Dominios equivalentes de una misma plataforma
+HOST_ALIASES = {
+    'x.com': 'twitter.com',
+    'mobile.twitter.com': 'twitter.com',
+    'm.facebook.com': 'facebook.com',
+    'web.facebook.com': 'facebook.com',
+    'vm.tiktok.com': 'tiktok.com',
+}
+
+# Parámetros que identifican el post (p. ej. permalink.php?story_fbid=...&id=...)
+URL_KEY_PARAMS = {'story_fbid', 'fbid', 'id', 'v'}
+
+
+def canonical_url(url: str) -> str:
+    """URL comparable: sin esquema, www, barra final ni parámetros que no identifican el post"""
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    host = HOST_ALIASES.get(host, host)
+    # En Instagram un reel también es accesible como /p/<shortcode>/
+    path = parts.path.replace('/reel/', '/p/') if host == 'instagram.com' else parts.path
+    params = sorted((name, value) for name, value in parse_qsl(parts.query) if name in URL_KEY_PARAMS)
+    return f"{host}{path.rstrip('/')}" + (f"?{urlencode(params)}" if params else '')
+
 
 def get_db_path():
     """Obtiene la ruta de la base de datos, copiando a tmp si es necesario para Streamlit Cloud"""
+    # Ruta explícita (benchmarks, bases alternativas)
+    if os.getenv('SOCIAL_MONITOR_DB'):
+        return os.getenv('SOCIAL_MONITOR_DB')
+
     original_db = os.path.join(os.path.dirname(__file__), "social_monitor.db")
 
     # En Streamlit Cloud, el filesystem es read-only, copiamos a /tmp
@@ -34,6 +71,7 @@ def get_db_path():
     return original_db
 
 
+@instrumented('db')
 class SocialDatabase:
     def __init__(self, db_path: str = None):
         self.db_path = db_path or get_db_path()
@@ -187,6 +225,15 @@ class SocialDatabase:
             )
         ''')
 
+        # Índices para paginar noticias por (created_at, id), con o sin filtro de medio
+        for table in ('top_stories', 'news_results'):
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_created ON {table} (created_at, id)
+            ''')
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_source ON {table} (source, created_at, id)
+            ''')
+
         # Tabla para historico de viewers de YouTube Live
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS youtube_viewers_history (
@@ -199,6 +246,382 @@ class SocialDatabase:
             )
         ''')
 
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_youtube_viewers_video_time
+            ON youtube_viewers_history (video_id, recorded_at)
+        ''')
+
+        # Agregados de viewers por minuto y por hora (min/max/promedio)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS youtube_viewers_rollup (
+                video_id TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                bucket_start TIMESTAMP NOT NULL,
+                min_viewers INTEGER,
+                max_viewers INTEGER,
+                sum_viewers INTEGER DEFAULT 0,
+                samples INTEGER DEFAULT 0,
+                PRIMARY KEY (video_id, resolution, bucket_start)
+            )
+        ''')
+
+        # Estadísticas acumuladas por video, mantenidas en cada registro
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS youtube_viewers_stats (
+                video_id TEXT PRIMARY KEY,
+                video_title TEXT,
+                max_viewers INTEGER,
+                min_viewers INTEGER,
+                sum_viewers INTEGER DEFAULT 0,
+                total_records INTEGER DEFAULT 0,
+                last_viewers INTEGER,
+                first_record TIMESTAMP,
+                last_record TIMESTAMP,
+                first_sample_id INTEGER
+            )
+        ''')
+
+        # Tablas para transcripciones de YouTube (sesiones legislativas)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcripts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id TEXT NOT NULL,
+                video_url TEXT,
+                language TEXT,
+                method TEXT,
+                model TEXT,
+                is_live BOOLEAN DEFAULT 0,
+                segment_count INTEGER DEFAULT 0,
+                duration REAL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcript_segments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transcript_id INTEGER NOT NULL,
+                start_time REAL NOT NULL,
+                end_time REAL,
+                text TEXT NOT NULL,
+                FOREIGN KEY (transcript_id) REFERENCES transcripts(id)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transcripts_video
+            ON transcripts (video_id, created_at)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transcript_segments_time
+            ON transcript_segments (transcript_id, start_time)
+        ''')
+
+        # Índice de texto completo de los segmentos (FTS5, mantenido por triggers); si el
+        # SQLite instalado no trae FTS5 la búsqueda cae a LIKE
+        self.transcript_fts = self._create_transcript_fts(cursor)
+
+        # Métricas de instrumentación de cada corrida de scraping
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                span TEXT NOT NULL,
+                calls INTEGER DEFAULT 0,
+                total_seconds REAL DEFAULT 0,
+                max_seconds REAL DEFAULT 0,
+                rows INTEGER DEFAULT 0,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scrape_metrics_run
+            ON scrape_metrics (run_id, total_seconds)
+        ''')
+
+        # Conteos diarios de palabras, narrativas y categorías (ver analysis/text_stats.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS text_stats_daily (
+                day TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                term TEXT NOT NULL,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (day, kind, term)
+            )
+        ''')
+
+        # Llamadas a actores de Apify con su costo (ver scrapers/budget.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS apify_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                platform TEXT NOT NULL,
+                actor_id TEXT NOT NULL,
+                apify_run_id TEXT,
+                status TEXT,
+                requested_items INTEGER DEFAULT 0,
+                items INTEGER DEFAULT 0,
+                compute_units REAL DEFAULT 0,
+                usage_usd REAL DEFAULT 0,
+                called_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_apify_calls_time
+            ON apify_calls (called_at, platform)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_apify_calls_actor
+            ON apify_calls (actor_id, called_at)
+        ''')
+
+        # Salud de los actores de Apify (circuit breaker, ver scrapers/actor_registry.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS actor_health (
+                actor_id TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                state TEXT DEFAULT 'closed',
+                consecutive_failures INTEGER DEFAULT 0,
+                total_calls INTEGER DEFAULT 0,
+                total_failures INTEGER DEFAULT 0,
+                health_score REAL DEFAULT 1.0,
+                avg_seconds REAL DEFAULT 0,
+                cooldown_minutes INTEGER DEFAULT 0,
+                last_error TEXT,
+                last_success_at TIMESTAMP,
+                last_failure_at TIMESTAMP,
+                retry_at TIMESTAMP,
+                probe_started_at TIMESTAMP
+            )
+        ''')
+
+        # Exportación incremental (ver delta_store.py): hash de cada fila ya exportada/importada
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS delta_state (
+                table_name TEXT NOT NULL,
+                row_key TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                PRIMARY KEY (table_name, row_key)
+            )
+        ''')
+
+        # Archivos de delta ya aplicados o escritos por esta base
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS delta_files (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Perfiles de cuenta cacheados por ventana (0 = todo el historial)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS account_profiles (
+                platform TEXT NOT NULL,
+                username TEXT NOT NULL,
+                window_days INTEGER NOT NULL,
+                state TEXT,
+                last_post_id INTEGER DEFAULT 0,
+                watermark TEXT,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (platform, username, window_days)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_posts_author
+            ON posts (platform, author_username COLLATE NOCASE)
+        ''')
+
+        # Serie del índice de riesgo: un bucket por día, evaluado sobre la ventana que termina ese día
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS risk_timeseries (
+                bucket TEXT NOT NULL,
+                window_days INTEGER NOT NULL,
+                posts INTEGER DEFAULT 0,
+                engagement INTEGER DEFAULT 0,
+                high_reach_posts INTEGER DEFAULT 0,
+                mobilization_calls INTEGER DEFAULT 0,
+                recent_engagement INTEGER DEFAULT 0,
+                prior_engagement INTEGER DEFAULT 0,
+                risk_score INTEGER,
+                risk_percentage REAL,
+                risk_level TEXT,
+                risk_factors JSON,
+                watermark TEXT,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (bucket, window_days)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_posts_updated ON posts (updated_at)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_posts_scraped ON posts (scraped_at, id)
+        ''')
+
+        # Ventanas por fecha de publicación (panel de 48 horas) y convocatorias por fecha de evento
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_posts_post_date ON posts (post_date)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mobilization_calls_event
+            ON mobilization_calls (event_date)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mobilization_calls_post
+            ON mobilization_calls (post_id)
+        ''')
+
+        # Firmas MinHash del contenido y cluster de casi-duplicados de cada post
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS post_minhash (
+                post_id INTEGER PRIMARY KEY,
+                cluster_id INTEGER NOT NULL,
+                signature BLOB
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_post_minhash_cluster ON post_minhash (cluster_id)
+        ''')
+
+        # Buckets LSH: (banda, hash de la banda) -> primer post que cayó en el bucket
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                post_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket)
+            ) WITHOUT ROWID
+        ''')
+
+        # Sketch count-min y frases más frecuentes (2 a 6 palabras) de cada día
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS phrase_sketches (
+                day TEXT PRIMARY KEY,
+                posts INTEGER DEFAULT 0,
+                sketch BLOB,
+                heavy_hitters TEXT
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_narratives_text ON narratives (narrative_text)
+        ''')
+
+        # Trabajos en segundo plano lanzados desde el dashboard (scraping de noticias y redes)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress REAL DEFAULT 0,
+                message TEXT,
+                result JSON,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                heartbeat_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                runner_id TEXT
+            )
+        ''')
+
+        # Un solo trabajo activo por (tipo, parámetros): los pedidos repetidos reciben el existente
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active
+            ON jobs (kind, params) WHERE status IN ('queued', 'running')
+        ''')
+
+        # Columnas agregadas después de la primera versión del esquema
+        self._add_column_if_missing(cursor, 'posts', 'text_indexed', 'BOOLEAN DEFAULT 0')
+        self._add_column_if_missing(cursor, 'actor_health', 'probe_started_at', 'TIMESTAMP')
+        self._add_column_if_missing(cursor, 'jobs', 'runner_id', 'TEXT')
+
+        # URL canónica de cada post: el mismo post llega con URLs distintas según el actor
+        # (x.com / twitter.com, /reel/ y /p/). Si dos posts viejos comparten la URL
+        # canónica, solo el primero la recibe.
+        self._add_column_if_missing(cursor, 'posts', 'url_key', 'TEXT')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_posts_url_key ON posts (url_key)
+        ''')
+        cursor.executemany(
+            'UPDATE OR IGNORE posts SET url_key = ? WHERE id = ?',
+            [(canonical_url(url), post_id) for post_id, url in cursor.execute(
+                'SELECT id, post_url FROM posts WHERE url_key IS NULL ORDER BY id').fetchall()]
+        )
+
+        # Primer registro de viewers sumado en línea a los agregados de cada video; los
+        # registros anteriores todavía no están en los agregados (0 = ya consolidados)
+        self._add_column_if_missing(cursor, 'youtube_viewers_stats', 'first_sample_id', 'INTEGER')
+        cursor.execute('''
+            UPDATE youtube_viewers_stats
+            SET first_sample_id = COALESCE(
+                (SELECT MIN(h.id) FROM youtube_viewers_history h
+                 WHERE h.video_id = youtube_viewers_stats.video_id
+                   AND h.recorded_at >= youtube_viewers_stats.first_record), 0)
+            WHERE first_sample_id IS NULL
+        ''')
+
+        # Snapshots de reportes: ventana y versión de los datos con que se generaron
+        self._add_column_if_missing(cursor, 'reports', 'window_days', 'INTEGER')
+        self._add_column_if_missing(cursor, 'reports', 'data_version', 'TEXT')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reports_snapshot
+            ON reports (window_days, report_date_end, data_version)
+        ''')
+
+        # Registro detallado por tarea en scraping_logs
+        for column, definition in [
+            ('run_id', 'TEXT'),
+            ('target', 'TEXT'),
+            ('apify_run_id', 'TEXT'),
+            ('compute_units', 'REAL DEFAULT 0'),
+            ('items_fetched', 'INTEGER DEFAULT 0'),
+            ('posts_updated', 'INTEGER DEFAULT 0'),
+            ('mobilization_hits', 'INTEGER DEFAULT 0'),
+            ('engagement', 'INTEGER DEFAULT 0'),
+            ('fetch_seconds', 'REAL DEFAULT 0'),
+            ('parse_seconds', 'REAL DEFAULT 0'),
+            ('enrich_seconds', 'REAL DEFAULT 0'),
+            ('db_seconds', 'REAL DEFAULT 0'),
+            ('duration_seconds', 'REAL DEFAULT 0'),
+        ]:
+            self._add_column_if_missing(cursor, 'scraping_logs', column, definition)
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scraping_logs_source
+            ON scraping_logs (platform, scrape_type, target, started_at)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_posts_text_pending
+            ON posts (id) WHERE text_indexed = 0
+        ''')
+
+        # Posts ya sumados a phrase_sketches. Las bases anteriores marcaban solo el último
+        # post contado (last_post_id): se marcan los posts hasta ese id y se deja de usar.
+        self._add_column_if_missing(cursor, 'posts', 'phrases_indexed', 'BOOLEAN DEFAULT 0')
+        cursor.execute('PRAGMA table_info(phrase_sketches)')
+        if 'last_post_id' in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('''
+                UPDATE posts SET phrases_indexed = 1
+                WHERE phrases_indexed = 0
+                  AND id <= (SELECT COALESCE(MAX(last_post_id), 0) FROM phrase_sketches)
+            ''')
+            cursor.execute('UPDATE phrase_sketches SET last_post_id = 0 WHERE last_post_id > 0')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_posts_phrases_pending
+            ON posts (id) WHERE phrases_indexed = 0
+        ''')
+
         # Insertar palabras clave por defecto
         default_keywords = [
             ("minería Mendoza", "general"),
@@ -244,17 +667,81 @@ class SocialDatabase:
         conn.commit()
         conn.close()
 
+    def _create_transcript_fts(self, cursor) -> bool:
+        """Crea transcript_segments_fts y sus triggers; indexa los segmentos existentes la primera vez"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'transcript_segments_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS transcript_segments_fts USING fts5(
+                    text, content='transcript_segments', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"Búsqueda de transcripciones sin FTS5 ({e})")
+            return False
+
+        cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_insert
+            AFTER INSERT ON transcript_segments BEGIN
+                INSERT INTO transcript_segments_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_delete
+            AFTER DELETE ON transcript_segments BEGIN
+                INSERT INTO transcript_segments_fts (transcript_segments_fts, rowid, text)
+                VALUES ('delete', old.id, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_update
+            AFTER UPDATE OF text ON transcript_segments BEGIN
+                INSERT INTO transcript_segments_fts (transcript_segments_fts, rowid, text)
+                VALUES ('delete', old.id, old.text);
+                INSERT INTO transcript_segments_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+        ''')
+        if not exists:
+            cursor.execute("INSERT INTO transcript_segments_fts (transcript_segments_fts) VALUES ('rebuild')")
+        return True
+
+    def _add_column_if_missing(self, cursor, table: str, column: str, definition: str) -> None:
+        """Agrega una columna a una tabla existente si todavía no la tiene"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
     # ========== MÉTODOS PARA POSTS ==========
 
     def post_exists(self, post_url: str) -> bool:
-        """Verifica si un post ya existe"""
+        """Verifica si un post ya existe (por URL canónica)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM posts WHERE post_url = ?', (post_url,))
+        cursor.execute('SELECT COUNT(*) FROM posts WHERE url_key = ?', (canonical_url(post_url),))
         count = cursor.fetchone()[0]
         conn.close()
         return count > 0
 
+    def get_posts_metrics(self, post_urls: List[str]) -> Dict[str, tuple]:
+        """
+        Métricas guardadas (likes, comments, shares, views) de varios posts en una consulta,
+        por URL canónica (canonical_url)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        metrics = {}
+        keys = list({canonical_url(url) for url in post_urls})
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            cursor.execute(f'''
+                SELECT url_key, likes, comments, shares, views FROM posts
+                WHERE url_key IN ({', '.join('?' for _ in chunk)})
+            ''', chunk)
+            for key, likes, comments, shares, views in cursor.fetchall():
+                metrics[key] = (likes or 0, comments or 0, shares or 0, views or 0)
+
+        conn.close()
+        return metrics
+
     def insert_post(self, post_data: Dict) -> bool:
         """Inserta un nuevo post"""
         if self.post_exists(post_data.get('post_url', '')):
@@ -276,15 +763,16 @@ class SocialDatabase:
 
             cursor.execute('''
                 INSERT INTO posts (
-                    platform, post_id, post_url, author_username, author_name,
+                    platform, post_id, post_url, url_key, author_username, author_name,
                     author_followers, content, post_type, likes, comments, shares,
                     views, engagement_total, reach_level, sentiment,
                     has_mobilization_call, keywords_matched, post_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 post_data.get('platform'),
                 post_data.get('post_id'),
                 post_data.get('post_url'),
+                canonical_url(post_data.get('post_url')),
                 post_data.get('author_username'),
                 post_data.get('author_name'),
                 post_data.get('author_followers', 0),
@@ -310,6 +798,80 @@ class SocialDatabase:
             conn.close()
             return False
 
+    def bulk_upsert_posts(self, posts: List[Dict]) -> Dict[str, int]:
+        """
+        Inserta o actualiza un lote de posts en una sola transacción.
+        Los posts que ya existen solo actualizan métricas (se conserva su análisis).
+        Devuelve el id de cada post del lote por URL (la del lote, aunque el post se
+        haya guardado antes con otra URL equivalente).
+        """
+        if not posts:
+            return {}
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        rows = []
+        for post_data in posts:
+            engagement = (
+                (post_data.get('likes') or 0) +
+                (post_data.get('comments') or 0) +
+                (post_data.get('shares') or 0)
+            )
+            rows.append((
+                post_data.get('platform'),
+                post_data.get('post_id'),
+                post_data.get('post_url'),
+                canonical_url(post_data.get('post_url')),
+                post_data.get('author_username'),
+                post_data.get('author_name'),
+                post_data.get('author_followers', 0),
+                post_data.get('content'),
+                post_data.get('post_type'),
+                post_data.get('likes', 0),
+                post_data.get('comments', 0),
+                post_data.get('shares', 0),
+                post_data.get('views', 0),
+                engagement,
+                self._calculate_reach_level(engagement),
+                post_data.get('sentiment'),
+                post_data.get('has_mobilization_call', False),
+                json.dumps(post_data.get('keywords_matched', [])),
+                post_data.get('post_date')
+            ))
+
+        try:
+            cursor.executemany('''
+                INSERT INTO posts (
+                    platform, post_id, post_url, url_key, author_username, author_name,
+                    author_followers, content, post_type, likes, comments, shares,
+                    views, engagement_total, reach_level, sentiment,
+                    has_mobilization_call, keywords_matched, post_date
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url_key) DO UPDATE SET
+                    likes = excluded.likes, comments = excluded.comments,
+                    shares = excluded.shares, views = excluded.views,
+                    engagement_total = excluded.engagement_total,
+                    reach_level = excluded.reach_level, updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+            conn.commit()
+        except Exception as e:
+            print(f"Error guardando lote de posts: {e}")
+            conn.close()
+            return {}
+
+        ids_by_key = {}
+        keys = list({row[3] for row in rows})
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            cursor.execute(f'''
+                SELECT url_key, id FROM posts WHERE url_key IN ({', '.join('?' for _ in chunk)})
+            ''', chunk)
+            ids_by_key.update(cursor.fetchall())
+
+        conn.close()
+        return {row[2]: ids_by_key[row[3]] for row in rows if row[3] in ids_by_key}
+
     def update_post(self, post_data: Dict) -> bool:
         """Actualiza métricas de un post existente"""
         conn = sqlite3.connect(self.db_path)
@@ -327,7 +889,7 @@ class SocialDatabase:
                 UPDATE posts SET
                     likes = ?, comments = ?, shares = ?, views = ?,
                     engagement_total = ?, reach_level = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE post_url = ?
+                WHERE url_key = ?
             ''', (
                 post_data.get('likes', 0),
                 post_data.get('comments', 0),
@@ -335,7 +897,7 @@ class SocialDatabase:
                 post_data.get('views', 0),
                 engagement,
                 reach_level,
-                post_data.get('post_url')
+                canonical_url(post_data.get('post_url'))
             ))
 
             conn.commit()
@@ -389,6 +951,57 @@ class SocialDatabase:
         conn.close()
         return posts
 
+    def get_post_frame(self, columns: List[str], platform: str = None, days: int = 14,
+                       limit: int = None, filter_by_post_date: bool = True) -> PostFrame:
+        """
+        Posts del período en columnas (solo las pedidas, más id), ordenados por engagement.
+        El contenido no se lee acá: PostFrame.content() lo carga bajo demanda.
+        """
+        unknown = [name for name in columns if name not in FRAME_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas para get_post_frame: {', '.join(unknown)}")
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        names = ['id'] + [name for name in columns if name != 'id']
+        date_column = "post_date" if filter_by_post_date else "scraped_at"
+        date_filter = datetime.now() - timedelta(days=days)
+        platform_filter = "AND platform = ?" if platform else ""
+        params = [date_filter.isoformat()] + ([platform] if platform else [])
+
+        cursor.execute(f'''
+            SELECT {', '.join(names)} FROM posts
+            WHERE {date_column} >= ? {platform_filter}
+            ORDER BY engagement_total DESC
+            LIMIT ?
+        ''', params + [limit if limit else -1])
+
+        frame = PostFrame.from_cursor(names, cursor, self.db_path)
+        conn.close()
+        return frame
+
+    def get_post_metric_rows(self, days: int = 14, platform: str = None) -> List[tuple]:
+        """Obtiene solo las métricas numéricas de los posts del período (por fecha de publicación)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+        platform_filter = "AND platform = ?" if platform else ""
+        params = (date_filter.isoformat(), platform) if platform else (date_filter.isoformat(),)
+
+        cursor.execute(f'''
+            SELECT
+                COALESCE(likes, 0), COALESCE(comments, 0), COALESCE(shares, 0),
+                COALESCE(views, 0), COALESCE(has_mobilization_call, 0)
+            FROM posts
+            WHERE post_date >= ? {platform_filter}
+        ''', params)
+
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
     def get_top_posts(self, limit: int = 10, only_relevant: bool = True, days: int = 14) -> List[Dict]:
         """Obtiene los posts con mayor engagement (filtrado por fecha de publicación)"""
         conn = sqlite3.connect(self.db_path)
@@ -433,20 +1046,407 @@ class SocialDatabase:
         conn.close()
         return narratives
 
-    # ========== MÉTODOS PARA ESTADÍSTICAS ==========
-
-    def get_consolidated_metrics(self, days: int = 14, only_relevant: bool = True) -> Dict:
-        """Obtiene métricas consolidadas de todas las redes (filtrado por fecha de publicación)"""
+    def save_narratives(self, narratives: List[Dict]) -> None:
+        """Crea o actualiza narrativas (por texto) con sus ocurrencias y primera/última aparición"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        for narrative in narratives:
+            cursor.execute('''
+                UPDATE narratives SET occurrences = ?1, first_seen = MIN(COALESCE(first_seen, ?2), ?2), last_seen = ?3
+                WHERE narrative_text = ?4
+            ''', (narrative['occurrences'], narrative['first_seen'], narrative['last_seen'],
+                  narrative['narrative_text']))
+            if cursor.rowcount == 0:
+                cursor.execute('''
+                    INSERT INTO narratives (narrative_text, category, occurrences, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (narrative['narrative_text'], narrative['category'], narrative['occurrences'],
+                      narrative['first_seen'], narrative['last_seen']))
+        conn.commit()
+        conn.close()
 
-        date_filter = datetime.now() - timedelta(days=days)
+    # ========== MÉTODOS PARA FRASES POR DÍA ==========
 
-        # Filtro de relevancia: Incluir todas las plataformas (el campo is_mendoza_relevant no está bien marcado)
-        # Por ahora desactivamos el filtro ya que todos los datos son relevantes para Mendoza
-        relevance_filter = ""
+    def get_posts_pending_phrases(self, limit: int = 1000) -> List[tuple]:
+        """(id, content, día) de los posts que todavía no se sumaron a phrase_sketches"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, content, COALESCE(date(post_date), date(scraped_at), date('now')) FROM posts
+            WHERE phrases_indexed = 0
+            ORDER BY id
+            LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
 
-        # Usar post_date para filtrar por fecha real de publicación
+    def get_phrase_sketches(self, days: List[str]) -> Dict[str, Dict]:
+        """{día: {'posts', 'sketch', 'heavy_hitters'}} de los días pedidos que tienen datos"""
+        if not days:
+            return {}
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT day, posts, sketch, heavy_hitters FROM phrase_sketches
+            WHERE day IN ({', '.join('?' for _ in days)})
+        ''', days)
+        sketches = {
+            day: {'posts': posts, 'sketch': sketch, 'heavy_hitters': json.loads(heavy_hitters or '{}')}
+            for day, posts, sketch, heavy_hitters in cursor.fetchall()
+        }
+        conn.close()
+        return sketches
+
+    def save_phrase_sketches(self, sketches: Dict[str, Dict], post_ids: List[int]) -> None:
+        """Guarda los sketches de los días del lote y marca sus posts como contados"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO phrase_sketches (day, posts, sketch, heavy_hitters)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (day, sketch['posts'], sketch['sketch'], json.dumps(sketch['heavy_hitters'], ensure_ascii=False))
+            for day, sketch in sketches.items()
+        ])
+        cursor.executemany(
+            'UPDATE posts SET phrases_indexed = 1 WHERE id = ?',
+            [(post_id,) for post_id in post_ids]
+        )
+        conn.commit()
+        conn.close()
+
+    def get_latest_phrase_day(self) -> Optional[str]:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(day) FROM phrase_sketches')
+        day = cursor.fetchone()[0]
+        conn.close()
+        return day
+
+    def get_phrase_history(self, until_day: str) -> List[tuple]:
+        """(día, frases más frecuentes) de todos los días hasta until_day, en orden"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT day, heavy_hitters FROM phrase_sketches WHERE day <= ? ORDER BY day
+        ''', (until_day,))
+        history = [(day, json.loads(heavy_hitters or '{}')) for day, heavy_hitters in cursor.fetchall()]
+        conn.close()
+        return history
+
+    # ========== MÉTODOS PARA ESTADÍSTICAS DE TEXTO ==========
+
+    def get_posts_pending_text_stats(self, limit: int = 1000) -> List[tuple]:
+        """Obtiene (id, content, post_date) de posts cuyo texto aún no fue indexado"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, content, post_date FROM posts
+            WHERE text_indexed = 0
+            ORDER BY id
+            LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def add_text_stats(self, daily_counts: Dict, post_ids: List[int]) -> None:
+        """Acumula conteos {día: {(tipo, término): n}} y marca los posts como indexados"""
+        rows = [
+            (day, kind, term, count)
+            for day, counts in daily_counts.items() if day
+            for (kind, term), count in counts.items()
+        ]
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO text_stats_daily (day, kind, term, count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(day, kind, term) DO UPDATE SET count = count + excluded.count
+        ''', rows)
+        cursor.executemany(
+            'UPDATE posts SET text_indexed = 1 WHERE id = ?',
+            [(post_id,) for post_id in post_ids]
+        )
+        conn.commit()
+        conn.close()
+
+    def get_text_stats(self, kind: str, days: int = 14, limit: int = None) -> List[tuple]:
+        """Suma los conteos diarios de un tipo ('word', 'narrative', 'category') en el período"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+        cursor.execute('''
+            SELECT term, SUM(count) as total
+            FROM text_stats_daily
+            WHERE kind = ? AND day >= ?
+            GROUP BY term
+            ORDER BY total DESC
+            LIMIT ?
+        ''', (kind, date_filter, limit if limit else -1))
+
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    # ========== MÉTODOS PARA CASI-DUPLICADOS ==========
+
+    def get_posts_pending_minhash(self, limit: int = 1000) -> List[tuple]:
+        """(id, content) de los posts sin fila en post_minhash (incluye posts viejos cargados tarde)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT p.id, p.content FROM posts p
+            LEFT JOIN post_minhash m ON m.post_id = p.id
+            WHERE m.post_id IS NULL
+            ORDER BY p.id
+            LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def get_lsh_candidates(self, keys: List[tuple]) -> Dict[tuple, int]:
+        """Post representante de cada bucket (banda, bucket) ya ocupado"""
+        by_band = {}
+        for band, bucket in keys:
+            by_band.setdefault(band, []).append(bucket)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        found = {}
+        # Una consulta por banda con bucket IN (...) usa la clave primaria (band, bucket)
+        for band, buckets in by_band.items():
+            for start in range(0, len(buckets), 500):
+                chunk = buckets[start:start + 500]
+                cursor.execute(f'''
+                    SELECT bucket, post_id FROM lsh_buckets
+                    WHERE band = ? AND bucket IN ({', '.join('?' for _ in chunk)})
+                ''', [band] + chunk)
+                for bucket, post_id in cursor.fetchall():
+                    found[(band, bucket)] = post_id
+        conn.close()
+        return found
+
+    def get_minhash_signatures(self, post_ids: List[int]) -> Dict[int, tuple]:
+        """{post_id: (cluster_id, firma)} de posts ya indexados"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        signatures = {}
+        for start in range(0, len(post_ids), 500):
+            chunk = post_ids[start:start + 500]
+            cursor.execute(f'''
+                SELECT post_id, cluster_id, signature FROM post_minhash
+                WHERE post_id IN ({', '.join('?' for _ in chunk)})
+            ''', chunk)
+            for post_id, cluster_id, signature in cursor.fetchall():
+                signatures[post_id] = (cluster_id, signature)
+        conn.close()
+        return signatures
+
+    def save_minhash(self, rows: List[tuple], buckets: List[tuple], merges: List[tuple]) -> None:
+        """
+        Guarda firmas (post_id, cluster_id, firma), buckets nuevos (banda, bucket, post_id)
+        y fusiones de clusters (cluster que queda, cluster absorbido)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO post_minhash (post_id, cluster_id, signature) VALUES (?, ?, ?)
+        ''', rows)
+        cursor.executemany('''
+            INSERT OR IGNORE INTO lsh_buckets (band, bucket, post_id) VALUES (?, ?, ?)
+        ''', buckets)
+        cursor.executemany(
+            'UPDATE post_minhash SET cluster_id = ? WHERE cluster_id = ?', merges
+        )
+        conn.commit()
+        conn.close()
+
+    def get_duplicate_clusters(self, days: int = 14, min_size: int = 2, limit: int = 20) -> List[Dict]:
+        """Clusters de casi-duplicados con al menos `min_size` posts publicados en el período"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+
+        cursor.execute('''
+            SELECT m.cluster_id, COUNT(*) AS size,
+                   COUNT(DISTINCT p.platform || '/' || COALESCE(p.author_username, '')) AS account_count,
+                   GROUP_CONCAT(DISTINCT p.platform || '/' || COALESCE(p.author_username, '')) AS accounts,
+                   SUM(p.engagement_total) AS total_engagement,
+                   MIN(p.post_date) AS first_post_date,
+                   MAX(p.post_date) AS last_post_date
+            FROM posts p
+            JOIN post_minhash m ON m.post_id = p.id
+            WHERE p.post_date >= ?
+            GROUP BY m.cluster_id
+            HAVING COUNT(*) >= ?
+            ORDER BY size DESC, total_engagement DESC
+            LIMIT ?
+        ''', (date_filter.isoformat(), min_size, limit if limit else -1))
+
+        columns = [desc[0] for desc in cursor.description]
+        clusters = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        # Texto de ejemplo: el post que originó el cluster
+        for cluster in clusters:
+            cursor.execute('SELECT content, post_url FROM posts WHERE id = ?', (cluster['cluster_id'],))
+            row = cursor.fetchone()
+            cluster['sample_content'], cluster['sample_url'] = row if row else (None, None)
+            cluster['accounts'] = sorted((cluster['accounts'] or '').split(','))
+
+        conn.close()
+        return clusters
+
+    def get_duplicate_post_count(self, days: int = 14) -> int:
+        """Posts del período que repiten contenido de otro post del mismo cluster en el período"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+
+        cursor.execute('''
+            SELECT COUNT(*) - COUNT(DISTINCT m.cluster_id)
+            FROM posts p
+            JOIN post_minhash m ON m.post_id = p.id
+            WHERE p.post_date >= ?
+        ''', (date_filter.isoformat(),))
+        duplicates = cursor.fetchone()[0] or 0
+        conn.close()
+        return duplicates
+
+    # ========== MÉTODOS PARA PERFILES DE CUENTA ==========
+
+    # Día y hora de publicación (si no hay fecha de publicación, la de scraping)
+    _POST_DAY = "COALESCE(date(post_date), date(scraped_at))"
+    _POST_HOUR = "COALESCE(strftime('%H', post_date), strftime('%H', scraped_at))"
+
+    def _account_filter(self, platform: str, username: str, since_day: str = None,
+                        after_id: int = 0, days: List[str] = None) -> tuple:
+        """WHERE de los posts de una cuenta: los del período con id > after_id o de los días `days`"""
+        where = "platform = ? AND author_username = ? COLLATE NOCASE"
+        params = [platform, username]
+        if since_day:
+            where += f" AND {self._POST_DAY} >= ?"
+            params.append(since_day)
+
+        scope = ["id > ?"]
+        params.append(after_id)
+        if days:
+            scope.append(f"{self._POST_DAY} IN ({', '.join('?' for _ in days)})")
+            params.extend(days)
+        return f"{where} AND ({' OR '.join(scope)})", params
+
+    def get_account_post_changes(self, platform: str, username: str,
+                                 after_id: int = 0, updated_since: str = None) -> Dict:
+        """
+        Estado de los posts de una cuenta para recalcular su perfil:
+        id y updated_at máximos, y días con posts ya procesados (id <= after_id)
+        cuyas métricas cambiaron desde updated_since.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT MAX(id), MAX(updated_at) FROM posts
+            WHERE platform = ? AND author_username = ? COLLATE NOCASE
+        ''', (platform, username))
+        max_id, watermark = cursor.fetchone()
+
+        dirty_days = []
+        if after_id and updated_since:
+            cursor.execute(f'''
+                SELECT DISTINCT {self._POST_DAY} FROM posts
+                WHERE platform = ? AND author_username = ? COLLATE NOCASE
+                  AND id <= ? AND updated_at >= ?
+            ''', (platform, username, after_id, updated_since))
+            dirty_days = [row[0] for row in cursor.fetchall()]
+
+        conn.close()
+        return {'max_id': max_id or 0, 'watermark': watermark, 'dirty_days': dirty_days}
+
+    def get_account_activity(self, platform: str, username: str, since_day: str = None,
+                             after_id: int = 0, days: List[str] = None) -> List[tuple]:
+        """Posts, likes y comentarios de una cuenta agrupados por (día, tipo, hora)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        where, params = self._account_filter(platform, username, since_day, after_id, days)
+        cursor.execute(f'''
+            SELECT {self._POST_DAY} as day, COALESCE(post_type, 'unknown'), {self._POST_HOUR} as hour,
+                   COUNT(*), SUM(likes), SUM(comments)
+            FROM posts
+            WHERE {where}
+            GROUP BY 1, 2, 3
+        ''', params)
+
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def get_account_contents(self, platform: str, username: str, since_day: str = None,
+                             after_id: int = 0, days: List[str] = None) -> List[tuple]:
+        """(día, contenido) de los posts de una cuenta que tienen hashtags"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        where, params = self._account_filter(platform, username, since_day, after_id, days)
+        cursor.execute(f'''
+            SELECT {self._POST_DAY}, content FROM posts
+            WHERE {where} AND content LIKE '%#%'
+        ''', params)
+
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def get_account_profile_cache(self, platform: str, username: str, window_days: int) -> Optional[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT state, last_post_id, watermark, computed_at FROM account_profiles
+            WHERE platform = ? AND username = ? AND window_days = ?
+        ''', (platform, username, window_days))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+        return {'state': json.loads(row[0]), 'last_post_id': row[1],
+                'watermark': row[2], 'computed_at': row[3]}
+
+    def save_account_profile_cache(self, platform: str, username: str, window_days: int,
+                                   state: Dict, last_post_id: int, watermark: str) -> None:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO account_profiles
+            (platform, username, window_days, state, last_post_id, watermark, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (platform, username, window_days, json.dumps(state, ensure_ascii=False),
+              last_post_id, watermark))
+        conn.commit()
+        conn.close()
+
+    # ========== MÉTODOS PARA ESTADÍSTICAS ==========
+
+    def get_consolidated_metrics(self, days: int = 14, only_relevant: bool = True) -> Dict:
+        """Obtiene métricas consolidadas de todas las redes (filtrado por fecha de publicación)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+
+        # Filtro de relevancia: Incluir todas las plataformas (el campo is_mendoza_relevant no está bien marcado)
+        # Por ahora desactivamos el filtro ya que todos los datos son relevantes para Mendoza
+        relevance_filter = ""
+
+        # Usar post_date para filtrar por fecha real de publicación
         cursor.execute(f'''
             SELECT
                 COUNT(*) as total_posts,
@@ -550,133 +1550,882 @@ class SocialDatabase:
             SELECT keyword, category FROM search_keywords WHERE is_active = 1
         ''')
 
-        keywords = [{'keyword': row[0], 'category': row[1]} for row in cursor.fetchall()]
+        keywords = [{'keyword': row[0], 'category': row[1]} for row in cursor.fetchall()]
+
+        conn.close()
+        return keywords
+
+    def add_keyword(self, keyword: str, category: str = "custom") -> bool:
+        """Agrega una nueva palabra clave"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT OR IGNORE INTO search_keywords (keyword, category)
+                VALUES (?, ?)
+            ''', (keyword, category))
+            conn.commit()
+            conn.close()
+            return True
+        except:
+            conn.close()
+            return False
+
+    # ========== MÉTODOS PARA CUENTAS ==========
+
+    def get_monitored_accounts(self, platform: str = None) -> List[Dict]:
+        """Obtiene cuentas monitoreadas"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        if platform:
+            cursor.execute('''
+                SELECT * FROM monitored_accounts WHERE platform = ?
+                ORDER BY is_key_account DESC, followers DESC
+            ''', (platform,))
+        else:
+            cursor.execute('''
+                SELECT * FROM monitored_accounts
+                ORDER BY is_key_account DESC, followers DESC
+            ''')
+
+        columns = [desc[0] for desc in cursor.description]
+        accounts = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        conn.close()
+        return accounts
+
+    def add_monitored_account(self, platform: str, username: str,
+                              display_name: str = None, account_type: str = None,
+                              is_key: bool = False) -> bool:
+        """Agrega una cuenta para monitorear"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT OR REPLACE INTO monitored_accounts
+                (platform, username, display_name, account_type, is_key_account)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (platform, username, display_name, account_type, is_key))
+            conn.commit()
+            conn.close()
+            return True
+        except:
+            conn.close()
+            return False
+
+    # ========== MÉTODOS PARA CONVOCATORIAS ==========
+
+    def add_mobilization_call(self, post_id: int, event_date: str = None,
+                               location: str = None, event_type: str = None,
+                               description: str = None) -> bool:
+        """Registra una convocatoria a movilización"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT INTO mobilization_calls
+                (post_id, event_date, event_location, event_type, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (post_id, event_date, location, event_type, description))
+            conn.commit()
+            conn.close()
+            return True
+        except:
+            conn.close()
+            return False
+
+    def get_mobilization_calls(self, days: int = 14) -> List[Dict]:
+        """Obtiene convocatorias detectadas"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+
+        cursor.execute('''
+            SELECT mc.*, p.post_url, p.platform, p.author_username, p.content
+            FROM mobilization_calls mc
+            JOIN posts p ON mc.post_id = p.id
+            WHERE mc.detected_at >= ?
+            ORDER BY mc.event_date ASC
+        ''', (date_filter.isoformat(),))
+
+        columns = [desc[0] for desc in cursor.description]
+        calls = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        conn.close()
+        return calls
+
+    # ========== MÉTODOS PARA REPORTES ==========
+
+    def get_data_version(self) -> str:
+        """
+        Versión de los datos que alimentan los reportes (cambia con cada post, convocatoria
+        o narrativa nueva o actualizada)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), MAX(id), MAX(updated_at) FROM posts')
+        posts = cursor.fetchone()
+        cursor.execute('SELECT COUNT(*), MAX(id) FROM mobilization_calls')
+        calls = cursor.fetchone()
+        cursor.execute('SELECT COUNT(*), MAX(last_seen), SUM(occurrences) FROM narratives')
+        narratives = cursor.fetchone()
+        conn.close()
+        return (f"{posts[0]}:{posts[1] or 0}:{posts[2] or ''}:{calls[0]}:{calls[1] or 0}:"
+                f"{narratives[0]}:{narratives[1] or ''}:{narratives[2] or 0}")
+
+    def save_report_snapshot(self, report: Dict, window_days: int, data_version: str) -> int:
+        """Guarda un reporte comprimido (zlib) con sus totales sin comprimir; devuelve el id"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        summary = report.get('summary', {})
+        cursor.execute('''
+            INSERT INTO reports
+            (report_date_start, report_date_end, total_posts, total_interactions, estimated_reach,
+             risk_level, report_data, window_days, data_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            report['period']['start'],
+            report['period']['end'],
+            summary.get('total_posts', 0),
+            summary.get('total_engagement', 0),
+            summary.get('estimated_reach', 0),
+            summary.get('risk_level'),
+            zlib.compress(json.dumps(report, default=str, ensure_ascii=False).encode('utf-8')),
+            window_days,
+            data_version
+        ))
+        snapshot_id = cursor.lastrowid
+
+        conn.commit()
+        conn.close()
+        return snapshot_id
+
+    def find_report_snapshot(self, window_days: int, report_date_end: str, data_version: str) -> Optional[int]:
+        """Id del snapshot generado con la misma ventana, día y versión de datos"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id FROM reports
+            WHERE window_days = ? AND report_date_end = ? AND data_version = ?
+            ORDER BY id DESC LIMIT 1
+        ''', (window_days, report_date_end, data_version))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def get_report_snapshot(self, snapshot_id: int) -> Optional[Dict]:
+        """Reporte completo de un snapshot (descomprimido)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT report_data FROM reports WHERE id = ?', (snapshot_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row or row[0] is None:
+            return None
+        data = row[0]
+        if isinstance(data, bytes):
+            data = zlib.decompress(data).decode('utf-8')
+        return json.loads(data)
+
+    def get_report_snapshots(self, window_days: int = 14, limit: int = 10) -> List[Dict]:
+        """Snapshots de una ventana, del más reciente al más viejo (solo totales, sin el reporte)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, report_date_start, report_date_end, total_posts, total_interactions,
+                   estimated_reach, risk_level, data_version, created_at
+            FROM reports
+            WHERE window_days = ?
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (window_days, limit))
+
+        columns = [desc[0] for desc in cursor.description]
+        snapshots = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        conn.close()
+        return snapshots
+
+    # ========== MÉTODOS PARA SERIE DE RIESGO ==========
+
+    def get_risk_changes(self, since: str = None) -> Dict:
+        """Días de publicación de los posts creados o actualizados desde `since` y el updated_at máximo"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT MAX(updated_at) FROM posts')
+        watermark = cursor.fetchone()[0]
+
+        days = []
+        if since:
+            cursor.execute('''
+                SELECT DISTINCT date(post_date) FROM posts
+                WHERE updated_at >= ? AND post_date IS NOT NULL
+            ''', (since,))
+            days = sorted(row[0] for row in cursor.fetchall() if row[0])
+
+        conn.close()
+        return {'days': days, 'watermark': watermark}
+
+    def get_risk_rollups(self, start_day: str, end_day: str, high_reach_engagement: int) -> Dict[str, Dict]:
+        """Posts, engagement, posts de alto alcance y convocatorias por día de publicación"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        end = (datetime.strptime(end_day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        rollups = {}
+
+        cursor.execute('''
+            SELECT date(post_date), COUNT(*), SUM(engagement_total),
+                   SUM(CASE WHEN engagement_total >= ? THEN 1 ELSE 0 END)
+            FROM posts
+            WHERE post_date >= ? AND post_date < ?
+            GROUP BY 1
+        ''', (high_reach_engagement, start_day, end))
+        for day, posts, engagement, high_reach in cursor.fetchall():
+            rollups[day] = {'posts': posts, 'engagement': engagement or 0,
+                            'high_reach_posts': high_reach or 0, 'mobilization_calls': 0}
+
+        cursor.execute('''
+            SELECT date(p.post_date), COUNT(*)
+            FROM mobilization_calls mc
+            JOIN posts p ON mc.post_id = p.id
+            WHERE p.post_date >= ? AND p.post_date < ?
+            GROUP BY 1
+        ''', (start_day, end))
+        for day, calls in cursor.fetchall():
+            rollups.setdefault(day, {'posts': 0, 'engagement': 0, 'high_reach_posts': 0})
+            rollups[day]['mobilization_calls'] = calls
+
+        conn.close()
+        return rollups
+
+    def save_risk_buckets(self, buckets: List[Dict]) -> None:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO risk_timeseries
+            (bucket, window_days, posts, engagement, high_reach_posts, mobilization_calls,
+             recent_engagement, prior_engagement, risk_score, risk_percentage, risk_level,
+             risk_factors, watermark, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', [(
+            bucket['bucket'], bucket['window_days'], bucket['posts'], bucket['engagement'],
+            bucket['high_reach_posts'], bucket['mobilization_calls'], bucket['recent_engagement'],
+            bucket['prior_engagement'], bucket['risk_score'], bucket['risk_percentage'],
+            bucket['risk_level'], json.dumps(bucket['risk_factors'], ensure_ascii=False),
+            bucket['watermark']
+        ) for bucket in buckets])
+        conn.commit()
+        conn.close()
+
+    def get_risk_watermark(self, window_days: int = 14) -> Optional[str]:
+        """updated_at máximo de los posts ya considerados en la serie"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(watermark) FROM risk_timeseries WHERE window_days = ?', (window_days,))
+        watermark = cursor.fetchone()[0]
+        conn.close()
+        return watermark
+
+    def get_risk_timeseries(self, days: int = 30, window_days: int = 14) -> List[Dict]:
+        """Buckets de riesgo de los últimos `days` días (del más viejo al más reciente)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        cursor.execute('''
+            SELECT * FROM risk_timeseries
+            WHERE window_days = ? AND bucket > ?
+            ORDER BY bucket ASC
+        ''', (window_days, date_filter))
+
+        columns = [desc[0] for desc in cursor.description]
+        buckets = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for bucket in buckets:
+            bucket['risk_factors'] = json.loads(bucket['risk_factors'] or '[]')
+
+        conn.close()
+        return buckets
+
+    def get_latest_risk(self, window_days: int = 14) -> Optional[Dict]:
+        """Último bucket de la serie de riesgo"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM risk_timeseries WHERE window_days = ?
+            ORDER BY bucket DESC LIMIT 1
+        ''', (window_days,))
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return None
+
+        bucket = dict(zip([desc[0] for desc in cursor.description], row))
+        bucket['risk_factors'] = json.loads(bucket['risk_factors'] or '[]')
+        conn.close()
+        return bucket
+
+    # ========== MÉTODOS PARA PANEL DE 48 HORAS ==========
+
+    def _window_filter(self, start: str, end: str = None) -> tuple:
+        if end:
+            return "p.post_date >= ? AND p.post_date < ?", [start, end]
+        return "p.post_date >= ?", [start]
+
+    def get_window_activity(self, start: str, end: str = None, high_reach_engagement: int = 5000) -> Dict:
+        """Posts, engagement, alcance alto, convocatorias y cuentas activas publicados en [start, end)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        where, params = self._window_filter(start, end)
+
+        cursor.execute(f'''
+            SELECT p.platform, COUNT(*), SUM(p.engagement_total),
+                   SUM(CASE WHEN p.engagement_total >= ? THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN p.has_mobilization_call THEN 1 ELSE 0 END),
+                   COUNT(DISTINCT p.author_username)
+            FROM posts p
+            WHERE {where}
+            GROUP BY p.platform
+        ''', [high_reach_engagement] + params)
+
+        activity = {'posts': 0, 'engagement': 0, 'high_reach_posts': 0,
+                    'mobilization_posts': 0, 'active_accounts': 0, 'by_platform': {}}
+        for platform, posts, engagement, high_reach, mobilization, accounts in cursor.fetchall():
+            row = {'posts': posts, 'engagement': engagement or 0, 'high_reach_posts': high_reach or 0,
+                   'mobilization_posts': mobilization or 0, 'active_accounts': accounts}
+            activity['by_platform'][platform] = row
+            for field, value in row.items():
+                activity[field] += value
+
+        conn.close()
+        return activity
+
+    def get_window_top_accounts(self, start: str, end: str = None, limit: int = 10) -> List[Dict]:
+        """Cuentas con más engagement entre los posts publicados en [start, end)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        where, params = self._window_filter(start, end)
+
+        cursor.execute(f'''
+            SELECT p.platform, p.author_username AS username, COUNT(*) AS posts,
+                   SUM(p.engagement_total) AS total_engagement,
+                   MAX(p.author_followers) AS followers,
+                   SUM(CASE WHEN p.has_mobilization_call THEN 1 ELSE 0 END) AS mobilization_posts
+            FROM posts p
+            WHERE {where} AND p.author_username IS NOT NULL
+            GROUP BY p.platform, p.author_username
+            ORDER BY total_engagement DESC
+            LIMIT ?
+        ''', params + [limit])
+
+        columns = [desc[0] for desc in cursor.description]
+        accounts = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.close()
+        return accounts
+
+    def get_window_mobilization_calls(self, start: str, end: str = None) -> List[Dict]:
+        """Convocatorias de los posts publicados en [start, end), de la más reciente a la más vieja"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        where, params = self._window_filter(start, end)
+
+        cursor.execute(f'''
+            SELECT mc.event_date, mc.event_type, mc.event_location, mc.description,
+                   p.post_url, p.platform, p.author_username, p.engagement_total, p.post_date
+            FROM posts p
+            JOIN mobilization_calls mc ON mc.post_id = p.id
+            WHERE {where}
+            ORDER BY p.post_date DESC
+        ''', params)
+
+        columns = [desc[0] for desc in cursor.description]
+        calls = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.close()
+        return calls
+
+    def get_upcoming_mobilization_calls(self, from_day: str, limit: int = 20) -> List[Dict]:
+        """Convocatorias con fecha de evento desde from_day (YYYY-MM-DD), las más próximas primero"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT mc.event_date, mc.event_type, mc.event_location, mc.description,
+                   p.post_url, p.platform, p.author_username, p.engagement_total
+            FROM mobilization_calls mc
+            JOIN posts p ON mc.post_id = p.id
+            WHERE mc.event_date >= ?
+            ORDER BY mc.event_date ASC, p.engagement_total DESC
+            LIMIT ?
+        ''', (from_day, limit))
+
+        columns = [desc[0] for desc in cursor.description]
+        calls = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.close()
+        return calls
+
+    def get_news_window_counts(self, hours: int = 48) -> tuple:
+        """Noticias guardadas en las últimas `hours` horas y en las `hours` horas anteriores"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT SUM(CASE WHEN created_at >= datetime('now', ?) THEN 1 ELSE 0 END), COUNT(*)
+            FROM news_results
+            WHERE created_at >= datetime('now', ?)
+        ''', (f'-{hours} hours', f'-{hours * 2} hours'))
+        current, total = cursor.fetchone()
+        conn.close()
+        return current or 0, (total or 0) - (current or 0)
+
+    # ========== MÉTODOS PARA TRABAJOS EN SEGUNDO PLANO ==========
+
+    def create_job(self, kind: str, params: Dict = None, runner_id: str = None) -> tuple:
+        """
+        Encola un trabajo a cargo de `runner_id`. Si ya hay uno activo con el mismo tipo
+        y parámetros devuelve ese; retorna (id, creado)
+        """
+        params_json = json.dumps(params or {}, sort_keys=True, ensure_ascii=False)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        while True:
+            try:
+                cursor.execute('''
+                    INSERT INTO jobs (kind, params, runner_id) VALUES (?, ?, ?)
+                ''', (kind, params_json, runner_id))
+                conn.commit()
+                job_id, created = cursor.lastrowid, True
+                break
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                cursor.execute('''
+                    SELECT id FROM jobs
+                    WHERE kind = ? AND params = ? AND status IN ('queued', 'running')
+                ''', (kind, params_json))
+                row = cursor.fetchone()
+                # El trabajo activo pudo terminar entre el INSERT y el SELECT: reintentar
+                if row:
+                    job_id, created = row[0], False
+                    break
+        conn.close()
+        return job_id, created
+
+    def start_job(self, job_id: int) -> None:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP,
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (job_id,))
+        conn.commit()
+        conn.close()
+
+    def update_job_progress(self, job_id: int, progress: float, message: str = None) -> None:
+        """Guarda el avance (0-100) de un trabajo en curso"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'running'
+        ''', (progress, message, job_id))
+        conn.commit()
+        conn.close()
+
+    def finish_job(self, job_id: int, result: Dict = None, error: str = None) -> None:
+        """Cierra un trabajo como 'done' o, si hay error, como 'failed'"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET status = ?, progress = CASE WHEN ? IS NULL THEN 100 ELSE progress END,
+                result = ?, error = ?, finished_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', ('failed' if error else 'done', error,
+              json.dumps(result, default=str, ensure_ascii=False) if result is not None else None,
+              error, job_id))
+        conn.commit()
+        conn.close()
+
+    def fail_orphaned_jobs(self, runner_id: str) -> int:
+        """
+        Marca como fallidos los trabajos activos de otros ejecutores (un proceso anterior
+        que se reinició o se cortó): ningún hilo los va a terminar
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET status = 'failed', error = 'Trabajo interrumpido', finished_at = CURRENT_TIMESTAMP
+            WHERE status IN ('queued', 'running') AND (runner_id IS NULL OR runner_id != ?)
+        ''', (runner_id,))
+        failed = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return failed
+
+    def _job_from_row(self, cursor, row) -> Optional[Dict]:
+        if not row:
+            return None
+        job = dict(zip([desc[0] for desc in cursor.description], row))
+        job['params'] = json.loads(job['params'] or '{}')
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        job = self._job_from_row(cursor, cursor.fetchone())
+        conn.close()
+        return job
+
+    def get_latest_job(self, kind: str) -> Optional[Dict]:
+        """Último trabajo de un tipo (el activo, si hay uno)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM jobs WHERE kind = ?
+            ORDER BY status IN ('queued', 'running') DESC, id DESC LIMIT 1
+        ''', (kind,))
+        job = self._job_from_row(cursor, cursor.fetchone())
+        conn.close()
+        return job
+
+    # ========== MÉTODOS PARA LOGS ==========
+
+    def log_scrape(self, platform: str, scrape_type: str, status: str,
+                   posts_found: int = 0, posts_new: int = 0,
+                   error_message: str = None, started_at: str = None,
+                   completed_at: str = None, run_id: str = None, target: str = None,
+                   apify_run_id: str = None, compute_units: float = 0,
+                   items_fetched: int = 0, posts_updated: int = 0,
+                   mobilization_hits: int = 0, engagement: int = 0,
+                   fetch_seconds: float = 0,
+                   parse_seconds: float = 0, enrich_seconds: float = 0,
+                   db_seconds: float = 0) -> None:
+        """Registra una operación de scraping (una tarea o el resumen de una plataforma)"""
+        now = datetime.now().isoformat()
+        started_at = started_at or now
+        completed_at = completed_at or now
+
+        try:
+            duration = (datetime.fromisoformat(completed_at) - datetime.fromisoformat(started_at)).total_seconds()
+        except ValueError:
+            duration = 0
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO scraping_logs
+            (platform, scrape_type, status, posts_found, posts_new, error_message,
+             started_at, completed_at, run_id, target, apify_run_id, compute_units,
+             items_fetched, posts_updated, mobilization_hits, engagement, fetch_seconds,
+             parse_seconds, enrich_seconds, db_seconds, duration_seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (platform, scrape_type, status, posts_found, posts_new, error_message,
+              started_at, completed_at, run_id, target, apify_run_id, compute_units or 0,
+              items_fetched, posts_updated, mobilization_hits, engagement, fetch_seconds,
+              parse_seconds, enrich_seconds, db_seconds, duration))
+
+        conn.commit()
+        conn.close()
+
+    def get_scrape_tasks(self, run_id: str = None, platform: str = None) -> List[Dict]:
+        """Obtiene las tareas registradas de una corrida (por defecto la última)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        if not run_id:
+            cursor.execute('''
+                SELECT run_id FROM scraping_logs WHERE run_id IS NOT NULL
+                ORDER BY id DESC LIMIT 1
+            ''')
+            row = cursor.fetchone()
+            if not row:
+                conn.close()
+                return []
+            run_id = row[0]
+
+        platform_filter = "AND platform = ?" if platform else ""
+        params = (run_id, platform) if platform else (run_id,)
+
+        cursor.execute(f'''
+            SELECT * FROM scraping_logs
+            WHERE run_id = ? AND scrape_type != 'full' {platform_filter}
+            ORDER BY started_at ASC
+        ''', params)
+
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def get_slowest_sources(self, days: int = 30, limit: int = 10, platform: str = None) -> List[Dict]:
+        """Fuentes (plataforma + keyword/cuenta) con mayor duración promedio en el período"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+        platform_filter = "AND platform = ?" if platform else ""
+        params = [date_filter.isoformat()] + ([platform] if platform else []) + [limit]
+
+        cursor.execute(f'''
+            SELECT
+                platform, scrape_type, target,
+                COUNT(*) as runs,
+                AVG(duration_seconds) as avg_seconds,
+                MAX(duration_seconds) as max_seconds,
+                AVG(fetch_seconds) as avg_fetch_seconds,
+                AVG(parse_seconds + enrich_seconds) as avg_processing_seconds,
+                AVG(db_seconds) as avg_db_seconds,
+                SUM(compute_units) as compute_units,
+                SUM(items_fetched) as items_fetched,
+                SUM(posts_new) as posts_new,
+                SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) as errors
+            FROM scraping_logs
+            WHERE started_at >= ? AND target IS NOT NULL {platform_filter}
+            GROUP BY platform, scrape_type, target
+            ORDER BY avg_seconds DESC
+            LIMIT ?
+        ''', params)
+
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def get_source_yield(self, platform: str, days: int = 14, recent_days: int = 3) -> Dict[tuple, Dict]:
+        """Rendimiento histórico de cada fuente (tipo, keyword/cuenta) según scraping_logs"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        now = datetime.now()
+        date_filter = (now - timedelta(days=days)).isoformat()
+        recent_filter = (now - timedelta(days=recent_days)).isoformat()
+
+        # Las corridas con error u omitidas (presupuesto, circuito abierto) no miden el
+        # rendimiento de la fuente, ni las de lotes en que sus items pudieron quedar sin
+        # asignar ('partial'): no cuentan como corridas ni en el engagement
+        completed = "status NOT IN ('error', 'skipped', 'partial')"
+
+        cursor.execute(f'''
+            SELECT
+                scrape_type, target,
+                SUM(CASE WHEN {completed} THEN 1 ELSE 0 END) as runs,
+                SUM(posts_new) as posts_new,
+                SUM(mobilization_hits) as mobilization_hits,
+                SUM(items_fetched) as items_fetched,
+                SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) as errors,
+                SUM(CASE WHEN status = 'skipped' THEN 1 ELSE 0 END) as skipped,
+                MAX(CASE WHEN {completed} THEN started_at END) as last_run_at,
+                AVG(CASE WHEN {completed} AND started_at >= ? THEN engagement END) as recent_engagement,
+                AVG(CASE WHEN {completed} AND started_at < ? THEN engagement END) as prior_engagement
+            FROM scraping_logs
+            WHERE platform = ? AND started_at >= ? AND target IS NOT NULL
+              AND scrape_type IN ('keyword', 'account')
+            GROUP BY scrape_type, target
+        ''', (recent_filter, recent_filter, platform, date_filter))
+
+        rows = cursor.fetchall()
+        conn.close()
+        return {(row['scrape_type'], row['target']): dict(row) for row in rows}
+
+    def log_apify_call(self, platform: str, actor_id: str, status: str, requested_items: int = 0,
+                       items: int = 0, compute_units: float = 0, usage_usd: float = 0,
+                       apify_run_id: str = None, run_id: str = None) -> None:
+        """Registra una llamada a un actor de Apify y su costo"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO apify_calls
+            (run_id, platform, actor_id, apify_run_id, status, requested_items,
+             items, compute_units, usage_usd, called_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (run_id, platform, actor_id, apify_run_id, status, requested_items,
+              items, compute_units or 0, usage_usd or 0, datetime.now().isoformat()))
+
+        conn.commit()
+        conn.close()
+
+    def get_actor_cost_history(self, actor_id: str, days: int = 30) -> Dict:
+        """Costo histórico de un actor: llamadas, items y USD (solo corridas exitosas)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = datetime.now() - timedelta(days=days)
+
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(items), 0), COALESCE(SUM(usage_usd), 0),
+                   COALESCE(MIN(usage_usd), 0)
+            FROM apify_calls
+            WHERE actor_id = ? AND called_at >= ? AND status = 'success'
+        ''', (actor_id, date_filter.isoformat()))
 
+        calls, items, usage_usd, min_usd = cursor.fetchone()
         conn.close()
-        return keywords
+        return {'calls': calls, 'items': items, 'usage_usd': usage_usd, 'min_call_usd': min_usd}
 
-    def add_keyword(self, keyword: str, category: str = "custom") -> bool:
-        """Agrega una nueva palabra clave"""
+    def get_apify_spend(self, since: str = None, run_id: str = None, platform: str = None) -> float:
+        """Gasto en USD de Apify desde una fecha y/o de una corrida"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO search_keywords (keyword, category)
-                VALUES (?, ?)
-            ''', (keyword, category))
-            conn.commit()
-            conn.close()
-            return True
-        except:
-            conn.close()
-            return False
+        query = "SELECT COALESCE(SUM(usage_usd), 0) FROM apify_calls WHERE 1=1"
+        params = []
+        if since:
+            query += " AND called_at >= ?"
+            params.append(since)
+        if run_id:
+            query += " AND run_id = ?"
+            params.append(run_id)
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
 
-    # ========== MÉTODOS PARA CUENTAS ==========
+        cursor.execute(query, params)
+        spend = cursor.fetchone()[0]
+        conn.close()
+        return spend
 
-    def get_monitored_accounts(self, platform: str = None) -> List[Dict]:
-        """Obtiene cuentas monitoreadas"""
+    def get_apify_spend_by_platform(self, days: int = 30, run_id: str = None) -> List[Dict]:
+        """Gasto de Apify por plataforma (llamadas, items, compute units y USD)"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
-        if platform:
-            cursor.execute('''
-                SELECT * FROM monitored_accounts WHERE platform = ?
-                ORDER BY is_key_account DESC, followers DESC
-            ''', (platform,))
+        if run_id:
+            where, params = "run_id = ?", (run_id,)
         else:
-            cursor.execute('''
-                SELECT * FROM monitored_accounts
-                ORDER BY is_key_account DESC, followers DESC
-            ''')
+            where, params = "called_at >= ?", ((datetime.now() - timedelta(days=days)).isoformat(),)
 
-        columns = [desc[0] for desc in cursor.description]
-        accounts = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.execute(f'''
+            SELECT
+                platform,
+                COUNT(*) as calls,
+                SUM(CASE WHEN status = 'skipped' THEN 1 ELSE 0 END) as skipped,
+                SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) as errors,
+                SUM(items) as items,
+                SUM(compute_units) as compute_units,
+                SUM(usage_usd) as usage_usd
+            FROM apify_calls
+            WHERE {where}
+            GROUP BY platform
+            ORDER BY usage_usd DESC
+        ''', params)
 
+        rows = cursor.fetchall()
         conn.close()
-        return accounts
+        return [dict(row) for row in rows]
 
-    def add_monitored_account(self, platform: str, username: str,
-                              display_name: str = None, account_type: str = None,
-                              is_key: bool = False) -> bool:
-        """Agrega una cuenta para monitorear"""
+    def get_actor_health(self, actor_id: str) -> Optional[Dict]:
+        """Estado del circuit breaker de un actor"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO monitored_accounts
-                (platform, username, display_name, account_type, is_key_account)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (platform, username, display_name, account_type, is_key))
-            conn.commit()
-            conn.close()
-            return True
-        except:
-            conn.close()
-            return False
-
-    # ========== MÉTODOS PARA CONVOCATORIAS ==========
+        cursor.execute('SELECT * FROM actor_health WHERE actor_id = ?', (actor_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
 
-    def add_mobilization_call(self, post_id: int, event_date: str = None,
-                               location: str = None, event_type: str = None,
-                               description: str = None) -> bool:
-        """Registra una convocatoria a movilización"""
+    def save_actor_health(self, health: Dict) -> None:
+        """Guarda (inserta o reemplaza) el estado de un actor"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                INSERT INTO mobilization_calls
-                (post_id, event_date, event_location, event_type, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (post_id, event_date, location, event_type, description))
-            conn.commit()
-            conn.close()
-            return True
-        except:
-            conn.close()
-            return False
+        columns = ['actor_id', 'platform', 'state', 'consecutive_failures', 'total_calls',
+                   'total_failures', 'health_score', 'avg_seconds', 'cooldown_minutes',
+                   'last_error', 'last_success_at', 'last_failure_at', 'retry_at', 'probe_started_at']
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO actor_health ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        ''', [health.get(column) for column in columns])
 
-    def get_mobilization_calls(self, days: int = 14) -> List[Dict]:
-        """Obtiene convocatorias detectadas"""
+        conn.commit()
+        conn.close()
+
+    def claim_actor_probe(self, actor_id: str, now: str, stale_before: str) -> bool:
+        """
+        Toma la llamada de prueba de un actor con el circuito abierto y la espera vencida.
+        Solo un llamador la obtiene: la que quedó en curso bloquea al resto hasta terminar
+        (o hasta `stale_before`, si el proceso que la hacía se cortó).
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        date_filter = datetime.now() - timedelta(days=days)
-
         cursor.execute('''
-            SELECT mc.*, p.post_url, p.platform, p.author_username, p.content
-            FROM mobilization_calls mc
-            JOIN posts p ON mc.post_id = p.id
-            WHERE mc.detected_at >= ?
-            ORDER BY mc.event_date ASC
-        ''', (date_filter.isoformat(),))
+            UPDATE actor_health SET state = 'half_open', probe_started_at = ?
+            WHERE actor_id = ? AND state IN ('open', 'half_open') AND retry_at <= ?
+              AND (probe_started_at IS NULL OR probe_started_at < ?)
+        ''', (now, actor_id, now, stale_before))
+        claimed = cursor.rowcount == 1
 
-        columns = [desc[0] for desc in cursor.description]
-        calls = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.commit()
+        conn.close()
+        return claimed
+
+    def get_actors_health(self, platform: str = None) -> List[Dict]:
+        """Estado de todos los actores registrados (opcionalmente de una plataforma)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        if platform:
+            cursor.execute('SELECT * FROM actor_health WHERE platform = ? ORDER BY health_score', (platform,))
+        else:
+            cursor.execute('SELECT * FROM actor_health ORDER BY platform, health_score')
 
+        rows = cursor.fetchall()
         conn.close()
-        return calls
+        return [dict(row) for row in rows]
 
-    # ========== MÉTODOS PARA LOGS ==========
+    def save_scrape_metrics(self, run_id: str, summary: List[Dict]) -> None:
+        """Guarda el resumen de instrumentación de una corrida"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO scrape_metrics (run_id, span, calls, total_seconds, max_seconds, rows)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (run_id, item['name'], item['calls'], item['total_seconds'],
+             item['max_seconds'], item.get('rows') or 0)
+            for item in summary
+        ])
+        conn.commit()
+        conn.close()
 
-    def log_scrape(self, platform: str, scrape_type: str, status: str,
-                   posts_found: int = 0, posts_new: int = 0,
-                   error_message: str = None) -> None:
-        """Registra una operación de scraping"""
+    def get_scrape_metrics(self, run_id: str = None, limit: int = 50) -> List[Dict]:
+        """Obtiene las métricas de una corrida (por defecto la última)"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
+        if not run_id:
+            cursor.execute('SELECT run_id FROM scrape_metrics ORDER BY id DESC LIMIT 1')
+            row = cursor.fetchone()
+            if not row:
+                conn.close()
+                return []
+            run_id = row[0]
+
         cursor.execute('''
-            INSERT INTO scraping_logs
-            (platform, scrape_type, status, posts_found, posts_new, error_message,
-             started_at, completed_at)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-        ''', (platform, scrape_type, status, posts_found, posts_new, error_message))
+            SELECT run_id, span, calls, total_seconds, max_seconds, rows, recorded_at
+            FROM scrape_metrics
+            WHERE run_id = ?
+            ORDER BY total_seconds DESC
+            LIMIT ?
+        ''', (run_id, limit))
 
-        conn.commit()
+        rows = cursor.fetchall()
         conn.close()
+        return [dict(row) for row in rows]
 
     # ========== MÉTODOS PARA MEDIOS DE COMUNICACIÓN ==========
 
@@ -802,18 +2551,112 @@ class SocialDatabase:
         conn.close()
         return articles
 
-    def get_media_stats(self, table: str = 'top_stories') -> List[Dict]:
-        """Obtiene estadísticas de medios"""
+    # Columnas de cada tabla de noticias que se muestran en el dashboard
+    NEWS_COLUMNS = {
+        'top_stories': ['title', 'link', 'source', 'source_logo', 'date_published', 'thumbnail', 'is_live', 'created_at'],
+        'news_results': ['title', 'link', 'source', 'snippet', 'date_published', 'thumbnail', 'created_at'],
+    }
+
+    def _news_filter(self, source: str = None, hours: int = None) -> tuple:
+        conditions, params = [], []
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if hours:
+            conditions.append("created_at >= datetime('now', ? || ' hours')")
+            params.append(f'-{hours}')
+        return conditions, params
+
+    def get_news_page(self, table: str = 'news_results', source: str = None, hours: int = None,
+                      page_size: int = 25, after: tuple = None) -> Dict:
+        """
+        Una página de noticias, de la más reciente a la más vieja.
+        after es el cursor (created_at, id) de la última fila de la página anterior;
+        la respuesta incluye el cursor de la página siguiente (None si no hay más).
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        conditions, params = self._news_filter(source, hours)
+        if after:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        columns = self.NEWS_COLUMNS[table]
+        cursor.execute(f'''
+            SELECT {', '.join(columns)}, id FROM {table}
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params + [page_size + 1])
+        rows = cursor.fetchall()
+        conn.close()
+
+        # Se pide una fila de más para saber si hay página siguiente
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        items = [dict(zip(columns, row[:-1])) for row in rows]
+        next_cursor = (rows[-1][columns.index('created_at')], rows[-1][-1]) if has_more else None
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def count_news(self, table: str = 'news_results', source: str = None, hours: int = None) -> int:
+        """Cantidad de noticias con los mismos filtros que get_news_page"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        conditions, params = self._news_filter(source, hours)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f'SELECT COUNT(*) FROM {table} {where}', params)
+        count = cursor.fetchone()[0]
+
+        conn.close()
+        return count
+
+    def get_posts_page(self, platform: str = None, days: int = 14, page_size: int = 25,
+                       after: tuple = None) -> Dict:
+        """Una página de posts por fecha de scraping (cursor (scraped_at, id), como get_news_page)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        date_filter = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        conditions, params = ["scraped_at >= ?"], [date_filter]
+        if platform:
+            conditions.append("platform = ?")
+            params.append(platform)
+        if after:
+            conditions.append("(scraped_at, id) < (?, ?)")
+            params.extend(after)
+
+        cursor.execute(f'''
+            SELECT * FROM posts
+            WHERE {' AND '.join(conditions)}
+            ORDER BY scraped_at DESC, id DESC
+            LIMIT ?
+        ''', params + [page_size + 1])
+
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+        conn.close()
+
+        has_more = len(rows) > page_size
+        items = [dict(zip(columns, row)) for row in rows[:page_size]]
+        next_cursor = (items[-1]['scraped_at'], items[-1]['id']) if has_more else None
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def get_media_stats(self, table: str = 'top_stories', hours: int = None) -> List[Dict]:
+        """Obtiene estadísticas de medios (opcionalmente de las últimas `hours` horas)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
+        conditions, params = self._news_filter(hours=hours)
         cursor.execute(f'''
             SELECT source, COUNT(*) as count
             FROM {table}
-            WHERE source IS NOT NULL
+            WHERE source IS NOT NULL {''.join(' AND ' + condition for condition in conditions)}
             GROUP BY source
             ORDER BY count DESC
-        ''')
+        ''', params)
 
         stats = [{'source': row[0], 'count': row[1]} for row in cursor.fetchall()]
 
@@ -840,8 +2683,14 @@ class SocialDatabase:
 
     # ========== METODOS PARA YOUTUBE VIEWERS HISTORY ==========
 
+    # Formatos de bucket para cada resolución de agregado
+    VIEWERS_ROLLUP_FORMATS = {
+        'minute': '%Y-%m-%d %H:%M:00',
+        'hour': '%Y-%m-%d %H:00:00',
+    }
+
     def record_youtube_viewers(self, video_id: str, viewers_count: int, video_title: str = None, is_live: bool = True) -> bool:
-        """Registra el conteo de viewers de un video de YouTube"""
+        """Registra el conteo de viewers de un video de YouTube y actualiza agregados"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         try:
@@ -849,6 +2698,42 @@ class SocialDatabase:
                 INSERT INTO youtube_viewers_history (video_id, video_title, viewers_count, is_live)
                 VALUES (?, ?, ?, ?)
             ''', (video_id, video_title, viewers_count, is_live))
+            sample_id = cursor.lastrowid
+            cursor.execute(
+                'SELECT recorded_at FROM youtube_viewers_history WHERE id = ?',
+                (sample_id,)
+            )
+            recorded_at = cursor.fetchone()[0]
+
+            for resolution, bucket_format in self.VIEWERS_ROLLUP_FORMATS.items():
+                cursor.execute('''
+                    INSERT INTO youtube_viewers_rollup
+                    (video_id, resolution, bucket_start, min_viewers, max_viewers, sum_viewers, samples)
+                    VALUES (?, ?, strftime(?, ?), ?, ?, ?, 1)
+                    ON CONFLICT(video_id, resolution, bucket_start) DO UPDATE SET
+                        min_viewers = MIN(min_viewers, excluded.min_viewers),
+                        max_viewers = MAX(max_viewers, excluded.max_viewers),
+                        sum_viewers = sum_viewers + excluded.sum_viewers,
+                        samples = samples + 1
+                ''', (video_id, resolution, bucket_format, recorded_at,
+                      viewers_count, viewers_count, viewers_count))
+
+            cursor.execute('''
+                INSERT INTO youtube_viewers_stats
+                (video_id, video_title, max_viewers, min_viewers, sum_viewers, total_records,
+                 last_viewers, first_record, last_record, first_sample_id)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    video_title = COALESCE(excluded.video_title, video_title),
+                    max_viewers = MAX(max_viewers, excluded.max_viewers),
+                    min_viewers = MIN(min_viewers, excluded.min_viewers),
+                    sum_viewers = sum_viewers + excluded.sum_viewers,
+                    total_records = total_records + 1,
+                    last_viewers = excluded.last_viewers,
+                    last_record = excluded.last_record
+            ''', (video_id, video_title, viewers_count, viewers_count, viewers_count,
+                  viewers_count, recorded_at, recorded_at, sample_id))
+
             conn.commit()
             return True
         except Exception as e:
@@ -857,13 +2742,34 @@ class SocialDatabase:
         finally:
             conn.close()
 
-    def get_youtube_viewers_history(self, video_id: str, hours: int = 24) -> List[Dict]:
-        """Obtiene el historico de viewers de un video"""
+    def get_youtube_viewers_history(self, video_id: str, hours: int = 24, resolution: str = 'raw') -> List[Dict]:
+        """
+        Obtiene el historico de viewers de un video
+
+        resolution: 'raw' (cada registro), 'minute' u 'hour' (agregados con
+        viewers_count promedio más min_viewers/max_viewers por bucket)
+        """
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
         cutoff = datetime.now() - timedelta(hours=hours)
+
+        if resolution in self.VIEWERS_ROLLUP_FORMATS:
+            cursor.execute('''
+                SELECT
+                    CAST(sum_viewers / samples AS INTEGER) as viewers_count,
+                    min_viewers, max_viewers, samples,
+                    bucket_start as recorded_at
+                FROM youtube_viewers_rollup
+                WHERE video_id = ? AND resolution = ? AND bucket_start >= ?
+                ORDER BY bucket_start ASC
+            ''', (video_id, resolution, cutoff.isoformat()))
+
+            rows = cursor.fetchall()
+            conn.close()
+            return [dict(row) for row in rows]
+
         cursor.execute('''
             SELECT viewers_count, recorded_at, is_live
             FROM youtube_viewers_history
@@ -880,6 +2786,26 @@ class SocialDatabase:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
+        # Estadísticas acumuladas (sin recorrer el histórico)
+        cursor.execute('''
+            SELECT max_viewers, min_viewers, sum_viewers, total_records, first_record, last_record
+            FROM youtube_viewers_stats
+            WHERE video_id = ?
+        ''', (video_id,))
+
+        row = cursor.fetchone()
+        if row and row[3]:
+            conn.close()
+            return {
+                'max_viewers': row[0],
+                'min_viewers': row[1],
+                'avg_viewers': int(row[2] / row[3]),
+                'total_records': row[3],
+                'first_record': row[4],
+                'last_record': row[5]
+            }
+
+        # Videos registrados antes de existir las estadísticas acumuladas
         cursor.execute('''
             SELECT
                 MAX(viewers_count) as max_viewers,
@@ -906,6 +2832,258 @@ class SocialDatabase:
             }
         return {}
 
+    def backfill_youtube_viewers_rollups(self) -> None:
+        """
+        Suma a los agregados y estadísticas los registros que todavía no están en ellos:
+        los de videos sin estadísticas y los anteriores al primer registro agregado en línea
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        legacy_rows = '''
+            SELECT h.id, h.video_id, h.video_title, h.viewers_count, h.recorded_at
+            FROM youtube_viewers_history h
+            LEFT JOIN youtube_viewers_stats s ON s.video_id = h.video_id
+            WHERE s.video_id IS NULL OR h.id < s.first_sample_id
+        '''
+
+        # Se combinan con los buckets que ya tienen registros nuevos
+        for resolution, bucket_format in self.VIEWERS_ROLLUP_FORMATS.items():
+            cursor.execute(f'''
+                INSERT INTO youtube_viewers_rollup
+                (video_id, resolution, bucket_start, min_viewers, max_viewers, sum_viewers, samples)
+                SELECT video_id, ?, strftime(?, recorded_at),
+                       MIN(viewers_count), MAX(viewers_count), SUM(viewers_count), COUNT(*)
+                FROM ({legacy_rows})
+                GROUP BY video_id, strftime(?, recorded_at)
+                ON CONFLICT(video_id, resolution, bucket_start) DO UPDATE SET
+                    min_viewers = MIN(min_viewers, excluded.min_viewers),
+                    max_viewers = MAX(max_viewers, excluded.max_viewers),
+                    sum_viewers = sum_viewers + excluded.sum_viewers,
+                    samples = samples + excluded.samples
+            ''', (resolution, bucket_format, bucket_format))
+
+        cursor.execute(f'''
+            INSERT INTO youtube_viewers_stats
+            (video_id, video_title, max_viewers, min_viewers, sum_viewers, total_records,
+             last_viewers, first_record, last_record, first_sample_id)
+            SELECT g.video_id, g.video_title, g.max_viewers, g.min_viewers, g.sum_viewers, g.total_records,
+                   latest.viewers_count, g.first_record, g.last_record, 0
+            FROM (
+                SELECT video_id, MAX(video_title) as video_title, MAX(viewers_count) as max_viewers,
+                       MIN(viewers_count) as min_viewers, SUM(viewers_count) as sum_viewers,
+                       COUNT(*) as total_records, MIN(recorded_at) as first_record,
+                       MAX(recorded_at) as last_record, MAX(id) as last_id
+                FROM ({legacy_rows})
+                GROUP BY video_id
+            ) g
+            JOIN youtube_viewers_history latest ON latest.id = g.last_id
+            WHERE true
+            ON CONFLICT(video_id) DO UPDATE SET
+                video_title = COALESCE(video_title, excluded.video_title),
+                max_viewers = MAX(max_viewers, excluded.max_viewers),
+                min_viewers = MIN(min_viewers, excluded.min_viewers),
+                sum_viewers = sum_viewers + excluded.sum_viewers,
+                total_records = total_records + excluded.total_records,
+                first_record = MIN(first_record, excluded.first_record),
+                first_sample_id = 0
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def compact_youtube_viewers(self, raw_retention_hours: int = 48, minute_retention_days: int = 30) -> Dict:
+        """
+        Aplica la política de retención del histórico de viewers
+
+        Los registros crudos se conservan `raw_retention_hours` horas y los
+        agregados por minuto `minute_retention_days` días; los agregados por
+        hora y las estadísticas acumuladas se conservan siempre.
+        """
+        # Los registros previos a los agregados se consolidan antes de borrarlos
+        self.backfill_youtube_viewers_rollups()
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        raw_cutoff = f'-{raw_retention_hours} hours'
+        minute_cutoff = f'-{minute_retention_days} days'
+
+        cursor.execute('''
+            DELETE FROM youtube_viewers_history WHERE recorded_at < datetime('now', ?)
+        ''', (raw_cutoff,))
+        raw_deleted = cursor.rowcount
+
+        cursor.execute('''
+            DELETE FROM youtube_viewers_rollup
+            WHERE resolution = 'minute' AND bucket_start < datetime('now', ?)
+        ''', (minute_cutoff,))
+        minute_deleted = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+
+        return {'raw_deleted': raw_deleted, 'minute_buckets_deleted': minute_deleted}
+
+    # ========== METODOS PARA TRANSCRIPCIONES ==========
+
+    def create_transcript(self, video_id: str, video_url: str = None, language: str = None,
+                          method: str = None, model: str = None, is_live: bool = False) -> int:
+        """Crea una transcripción vacía y devuelve su id"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO transcripts (video_id, video_url, language, method, model, is_live)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (video_id, video_url, language, method, model, is_live))
+        transcript_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return transcript_id
+
+    def add_transcript_segments(self, transcript_id: int, segments: List[Dict]) -> int:
+        """Inserta segmentos en bloque y actualiza el resumen de la transcripción"""
+        if not segments:
+            return 0
+
+        rows = []
+        for seg in segments:
+            start = float(seg.get('start', 0))
+            end = seg.get('end')
+            if end is None and seg.get('duration') is not None:
+                end = start + float(seg['duration'])
+            rows.append((transcript_id, start, end, seg.get('text', '')))
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.executemany('''
+                INSERT INTO transcript_segments (transcript_id, start_time, end_time, text)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+
+            last_end = max((r[2] if r[2] is not None else r[1]) for r in rows)
+            cursor.execute('''
+                UPDATE transcripts SET
+                    segment_count = segment_count + ?,
+                    duration = MAX(duration, ?),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (len(rows), last_end, transcript_id))
+
+            conn.commit()
+            return len(rows)
+        except Exception as e:
+            print(f"Error insertando segmentos: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    def save_transcript(self, transcript: Dict) -> int:
+        """Guarda una transcripción completa (cabecera + segmentos) y devuelve su id"""
+        transcript_id = self.create_transcript(
+            video_id=transcript.get('video_id', 'unknown'),
+            video_url=transcript.get('video_url'),
+            language=transcript.get('language'),
+            method=transcript.get('method'),
+            model=transcript.get('model'),
+            is_live=transcript.get('is_live', False)
+        )
+        self.add_transcript_segments(transcript_id, transcript.get('segments', []))
+        return transcript_id
+
+    def get_transcripts(self, video_id: str = None, limit: int = 50) -> List[Dict]:
+        """Obtiene las transcripciones almacenadas, opcionalmente de un video"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        if video_id:
+            cursor.execute('''
+                SELECT * FROM transcripts WHERE video_id = ?
+                ORDER BY created_at DESC LIMIT ?
+            ''', (video_id, limit))
+        else:
+            cursor.execute('''
+                SELECT * FROM transcripts ORDER BY created_at DESC LIMIT ?
+            ''', (limit,))
+
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def get_transcript_text(self, transcript_id: int, start: float = None, end: float = None) -> str:
+        """Reconstruye el texto de una transcripción (o de un tramo) con marcas de tiempo"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        # Segmentos que se superponen con el tramo (incluye el que ya empezó en `start`)
+        cursor.execute('''
+            SELECT start_time, text FROM transcript_segments
+            WHERE transcript_id = ? AND COALESCE(end_time, start_time) >= ? AND start_time <= ?
+            ORDER BY start_time ASC
+        ''', (transcript_id, start or 0, end if end is not None else float('inf')))
+
+        lines = [
+            f"[{int(row[0] // 60):02d}:{int(row[0] % 60):02d}] {row[1]}"
+            for row in cursor.fetchall()
+        ]
+        conn.close()
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def search_transcript_segments(self, query: str, video_id: str = None, transcript_id: int = None,
+                                   start: float = None, end: float = None, limit: int = 100) -> List[Dict]:
+        """
+        Busca segmentos que mencionan un texto, opcionalmente entre dos tiempos (segundos).
+        Con FTS5 el texto se busca como frase (sin distinguir acentos; la última palabra
+        puede estar incompleta); sin FTS5, como subcadena literal.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        # Sin texto se devuelven todos los segmentos del tramo
+        where_clauses, params = [], []
+        if query and query.strip():
+            if self.transcript_fts:
+                where_clauses.append(
+                    "s.id IN (SELECT rowid FROM transcript_segments_fts WHERE transcript_segments_fts MATCH ?)"
+                )
+                params.append('"' + query.replace('"', '""') + '"*')
+            else:
+                escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                where_clauses.append("s.text LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+
+        if transcript_id is not None:
+            where_clauses.append("s.transcript_id = ?")
+            params.append(transcript_id)
+        if video_id:
+            where_clauses.append("t.video_id = ?")
+            params.append(video_id)
+        # Segmentos que se superponen con el tramo pedido
+        if start is not None:
+            where_clauses.append("COALESCE(s.end_time, s.start_time) >= ?")
+            params.append(start)
+        if end is not None:
+            where_clauses.append("s.start_time <= ?")
+            params.append(end)
+
+        params.append(limit)
+
+        cursor.execute(f'''
+            SELECT s.transcript_id, t.video_id, t.video_url, s.start_time, s.end_time, s.text
+            FROM transcript_segments s
+            JOIN transcripts t ON s.transcript_id = t.id
+            WHERE {" AND ".join(where_clauses) or "1"}
+            ORDER BY s.transcript_id, s.start_time ASC
+            LIMIT ?
+        ''', params)
+
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
 
 if __name__ == "__main__":
     # Test de la base de datos
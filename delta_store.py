@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Exportación e importación incremental de la base de datos.
+
+En lugar de versionar social_monitor.db completo, cada corrida escribe solo las
+filas nuevas o modificadas (y las borradas) como archivos JSONL comprimidos con
+gzip, particionados por día y de solo agregado:
+
+    data/deltas/2026-10-19/posts-20261019T100312.jsonl.gz
+
+La base se reconstruye (o se completa incrementalmente) aplicando los archivos
+en orden; delta_files registra cuáles ya se aplicaron y delta_state el hash de
+cada fila exportada o importada, para que la próxima exportación solo incluya cambios.
+
+Uso: python delta_store.py [export|import] [--deltas-dir DIR] [--since-days N]
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from database import SocialDatabase
+
+DELTAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "deltas")
+
+# Tablas internas que no se exportan. post_minhash y lsh_buckets (unas 17 filas por post)
+# tampoco: exportarlas multiplica por diez el tiempo de cada exportación y el tamaño de
+# delta_state, así que una base reconstruida desde los deltas vuelve a firmar todos sus
+# posts en la primera ingesta (unos 2 s cada 10.000 posts, medido con benchmarks/).
+# phrase_sketches sí se exporta (una fila por día) junto con posts.phrases_indexed.
+EXCLUDED_TABLES = {'sqlite_sequence', 'delta_state', 'delta_files', 'jobs',
+                   'post_minhash', 'lsh_buckets'}
+
+
+def _tables(conn) -> Dict[str, Dict]:
+    """Columnas y clave primaria de cada tabla exportable"""
+    tables = {}
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"):
+        # El índice FTS de transcripciones (y sus tablas internas) lo mantienen los triggers
+        if name in EXCLUDED_TABLES or name.startswith('transcript_segments_fts'):
+            continue
+        info = conn.execute(f"PRAGMA table_info({name})").fetchall()
+        columns = [row[1] for row in info]
+        primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+        tables[name] = {'columns': columns, 'key': primary_key or columns}
+    return tables
+
+
+def _json_default(value):
+    # Columnas BLOB (p. ej. reportes comprimidos) se guardan en base64
+    if isinstance(value, bytes):
+        return {'$base64': base64.b64encode(value).decode('ascii')}
+    return str(value)
+
+
+def _decode(value):
+    if isinstance(value, dict) and '$base64' in value:
+        return base64.b64decode(value['$base64'])
+    return value
+
+
+def _row_hash(row: List) -> str:
+    return hashlib.md5(json.dumps(row, default=str, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _row_key(row: Dict, key_columns: List[str]) -> str:
+    return json.dumps([row.get(column) for column in key_columns], default=str, ensure_ascii=False)
+
+
+def export_deltas(db: SocialDatabase, deltas_dir: str = DELTAS_DIR) -> Dict[str, int]:
+    """
+    Escribe las filas nuevas, modificadas o borradas desde la última exportación.
+    Devuelve la cantidad de filas exportadas por tabla.
+    """
+    now = datetime.now()
+    partition = os.path.join(deltas_dir, now.strftime('%Y-%m-%d'))
+    stamp = now.strftime('%Y%m%dT%H%M%S')
+
+    conn = sqlite3.connect(db.db_path)
+    cursor = conn.cursor()
+    exported = {}
+
+    for table, meta in _tables(conn).items():
+        columns, key_columns = meta['columns'], meta['key']
+        known = dict(cursor.execute(
+            'SELECT row_key, row_hash FROM delta_state WHERE table_name = ?', (table,)
+        ).fetchall())
+
+        changes = []
+        state = []
+        current_keys = set()
+        for values in conn.execute(f"SELECT {', '.join(columns)} FROM {table}"):
+            row = dict(zip(columns, values))
+            row_key = _row_key(row, key_columns)
+            row_hash = _row_hash(list(values))
+            current_keys.add(row_key)
+            if known.get(row_key) != row_hash:
+                changes.append(row)
+                state.append((table, row_key, row_hash))
+
+        # Filas que ya no están (p. ej. compactación del histórico de viewers)
+        deleted = [key for key in known if key not in current_keys]
+        for row_key in deleted:
+            changes.append({'_deleted': True, **dict(zip(key_columns, json.loads(row_key)))})
+
+        if not changes:
+            continue
+
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f"{table}-{stamp}.jsonl.gz")
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for row in changes:
+                f.write(json.dumps(row, default=_json_default, ensure_ascii=False) + '\n')
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO delta_state (table_name, row_key, row_hash) VALUES (?, ?, ?)
+        ''', state)
+        cursor.executemany(
+            'DELETE FROM delta_state WHERE table_name = ? AND row_key = ?',
+            [(table, row_key) for row_key in deleted]
+        )
+        cursor.execute('INSERT OR IGNORE INTO delta_files (name) VALUES (?)',
+                       (os.path.relpath(path, deltas_dir),))
+        exported[table] = len(changes)
+
+    conn.commit()
+    conn.close()
+    return exported
+
+
+def _partition_files(deltas_dir: str, since_days: int = None) -> List[str]:
+    """Archivos de delta en orden de aplicación (día y hora de exportación)"""
+    if not os.path.isdir(deltas_dir):
+        return []
+
+    oldest = (datetime.now() - timedelta(days=since_days)).strftime('%Y-%m-%d') if since_days else None
+    files = []
+    for day in sorted(os.listdir(deltas_dir)):
+        day_dir = os.path.join(deltas_dir, day)
+        if not os.path.isdir(day_dir) or (oldest and day < oldest):
+            continue
+        for name in os.listdir(day_dir):
+            if name.endswith('.jsonl.gz'):
+                files.append(os.path.join(day, name))
+
+    # posts-20261019T100312 -> ordenar por el sello de tiempo y no por el nombre de la tabla
+    return sorted(files, key=lambda name: (os.path.dirname(name), name.rsplit('-', 1)[-1], name))
+
+
+def has_deltas(deltas_dir: str = DELTAS_DIR) -> bool:
+    """Indica si la base se alimenta de archivos de delta (corrida diaria versionada)"""
+    return bool(_partition_files(deltas_dir))
+
+
+def import_deltas(db: SocialDatabase, deltas_dir: str = DELTAS_DIR, since_days: int = None) -> Dict[str, int]:
+    """
+    Aplica los archivos de delta que todavía no se aplicaron a esta base.
+    since_days limita la carga a las particiones recientes (arranque en frío más rápido);
+    si una carga posterior trae particiones más viejas, se reaplica todo desde ellas en orden.
+    Devuelve la cantidad de filas aplicadas por tabla.
+    """
+    conn = sqlite3.connect(db.db_path)
+    # INSERT OR REPLACE debe disparar los triggers de borrado (índice FTS de transcripciones)
+    conn.execute('PRAGMA recursive_triggers = ON')
+    cursor = conn.cursor()
+
+    applied = {name for (name,) in cursor.execute('SELECT name FROM delta_files')}
+    files = _partition_files(deltas_dir, since_days)
+    pending = [name for name in files if name not in applied]
+    if not pending:
+        conn.close()
+        return {}
+
+    # Archivos más viejos que otros ya aplicados (una carga anterior con since_days los
+    # salteó): se reaplican también los posteriores para que sus filas no queden pisadas
+    # por versiones viejas ni vuelvan filas ya borradas
+    pending = files[files.index(pending[0]):]
+    replayed = sum(1 for name in pending if name in applied)
+    if replayed:
+        print(f"   {replayed} archivos ya aplicados se reaplican después de otros más viejos")
+
+    tables = _tables(conn)
+    imported = {}
+
+    for name in pending:
+        table = os.path.basename(name).rsplit('-', 1)[0]
+        meta = tables.get(table)
+        if meta is None:
+            print(f"   Tabla desconocida en {name}, se omite")
+            continue
+
+        columns, key_columns = meta['columns'], meta['key']
+        upserts, state, deletes = [], [], []
+
+        with gzip.open(os.path.join(deltas_dir, name), 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                row_key = _row_key(row, key_columns)
+                if row.pop('_deleted', False):
+                    deletes.append([row.get(column) for column in key_columns])
+                    continue
+                values = [_decode(row.get(column)) for column in columns]
+                upserts.append(values)
+                state.append((table, row_key, _row_hash(values)))
+
+        cursor.executemany(f'''
+            INSERT OR REPLACE INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        ''', upserts)
+        cursor.executemany(
+            f"DELETE FROM {table} WHERE {' AND '.join(f'{column} = ?' for column in key_columns)}",
+            deletes
+        )
+        cursor.executemany('''
+            INSERT OR REPLACE INTO delta_state (table_name, row_key, row_hash) VALUES (?, ?, ?)
+        ''', state)
+        cursor.executemany(
+            'DELETE FROM delta_state WHERE table_name = ? AND row_key = ?',
+            [(table, _row_key(dict(zip(key_columns, key)), key_columns)) for key in deletes]
+        )
+        cursor.execute('INSERT OR IGNORE INTO delta_files (name) VALUES (?)', (name,))
+        imported[table] = imported.get(table, 0) + len(upserts) + len(deletes)
+
+    conn.commit()
+    conn.close()
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportación/importación incremental de la base de datos')
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('--deltas-dir', default=DELTAS_DIR, help='Directorio de particiones (default: data/deltas)')
+    parser.add_argument('--since-days', type=int, default=None,
+                        help='Solo importar particiones de los últimos N días')
+    args = parser.parse_args()
+
+    db = SocialDatabase()
+
+    if args.command == 'export':
+        counts = export_deltas(db, args.deltas_dir)
+        print(f"Filas exportadas: {sum(counts.values())}")
+    else:
+        counts = import_deltas(db, args.deltas_dir, args.since_days)
+        print(f"Filas importadas: {sum(counts.values())}")
+
+    for table, count in sorted(counts.items()):
+        print(f"  {table:<28} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Importación de exportaciones CSV de Apify (p. ej. data/psjcobre_instagram.csv).
+
+Apify aplana los items al exportar a CSV: cada campo anidado es una columna
+(childPosts/0/url, latestComments/3/text, authorMeta/name) y un export puede tener
+cientos de columnas con URLs de CDN largas. El importador lee el archivo fila por
+fila, conserva solo las columnas que usa el parse_post del scraper de la
+plataforma, arma los campos anidados recién cuando parse_post los pide y guarda
+los posts por lotes, con memoria acotada sin importar el tamaño del archivo.
+
+Uso: python import_apify_csv.py ARCHIVO.csv [--platform PLATFORM] [--batch-size N]
+"""
+
+import argparse
+import csv
+import inspect
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List
+
+from scrapers import InstagramScraper, FacebookScraper, TikTokScraper, TwitterScraper
+from scrapers.dedup import canonical_url, metrics_of
+from analysis import emerging_narratives, near_duplicates, text_stats
+
+SCRAPERS = {
+    'instagram': InstagramScraper,
+    'facebook': FacebookScraper,
+    'tiktok': TikTokScraper,
+    'twitter': TwitterScraper,
+}
+
+# Claves que lee un parse_post: raw_data.get('x'), author.get('x'), raw_data['x']
+FIELD_PATTERN = re.compile(r"""(?:\.get\(|\[)['"]([A-Za-z_]\w*)['"]""")
+
+# Campos de texto que no se convierten a número aunque lo parezcan
+TEXT_FIELDS = {
+    'caption', 'text', 'desc', 'full_text', 'tweetText', 'message', 'postText', 'alt',
+    'firstComment', 'name', 'nickName', 'nickname', 'ownerFullName', 'pageName',
+    'displayName', 'username', 'userName', 'ownerUsername', 'screen_name', 'shortCode', 'code',
+}
+
+INT_PATTERN = re.compile(r'^-?\d+$')
+FLOAT_PATTERN = re.compile(r'^-?\d+\.\d+$')
+
+
+def _coerce(field: str, value: str):
+    """Recupera el tipo que el CSV perdió (números y booleanos)"""
+    if field in TEXT_FIELDS:
+        return value
+    if value == 'True' or value == 'False':
+        return value == 'True'
+    if INT_PATTERN.match(value):
+        return int(value)
+    if FLOAT_PATTERN.match(value):
+        return float(value)
+    return value
+
+
+def _unflatten(items: List[tuple]):
+    """[(('0', 'url'), '...'), (('1', 'url'), '...')] -> [{'url': ...}, {'url': ...}]"""
+    tree = {}
+    for path, value in items:
+        node = tree
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return _as_lists(tree)
+
+
+def _as_lists(node):
+    # Los nodos con claves 0..N eran listas en el item original
+    if not isinstance(node, dict):
+        return node
+    if node and all(key.isdigit() for key in node):
+        return [_as_lists(node[key]) for key in sorted(node, key=int)]
+    return {key: _as_lists(value) for key, value in node.items()}
+
+
+class FlatRecord(dict):
+    """
+    Fila de un CSV aplanado con la interfaz de un item de Apify.
+    Los campos simples se cargan directo; los anidados se arman al primer acceso.
+    Las celdas vacías se tratan como campos ausentes.
+    """
+
+    __slots__ = ('_nested',)
+
+    def __init__(self, values: Dict, nested: Dict[str, List[tuple]]):
+        super().__init__(values)
+        self._nested = nested
+
+    def _expand(self, key) -> None:
+        items = self._nested.pop(key, None)
+        if items is not None:
+            self[key] = _unflatten(items)
+
+    def get(self, key, default=None):
+        self._expand(key)
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self._expand(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or key in self._nested
+
+
+def parse_fields(scraper) -> set:
+    """Claves que usa el parse_post del scraper (columnas a conservar del CSV)"""
+    return set(FIELD_PATTERN.findall(inspect.getsource(type(scraper).parse_post)))
+
+
+def read_records(path: str, fields: set) -> Iterator[FlatRecord]:
+    """Lee el CSV fila por fila proyectando solo las columnas de `fields`"""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+
+        # (índice, campo, ruta anidada) de las columnas conservadas
+        columns = []
+        for index, column in enumerate(header):
+            path = column.split('/')
+            if path[0] in fields:
+                columns.append((index, path[0], tuple(path[1:])))
+
+        for row in reader:
+            values, nested = {}, {}
+            for index, field, path in columns:
+                if index >= len(row) or row[index] == '':
+                    continue
+                if path:
+                    nested.setdefault(field, []).append((path, _coerce(path[-1], row[index])))
+                else:
+                    values[field] = _coerce(field, row[index])
+            yield FlatRecord(values, nested)
+
+
+def _store_batch(scraper, posts: List[Dict], totals: Dict) -> None:
+    """Guarda un lote: enriquece solo los posts nuevos y actualiza métricas de los existentes"""
+    db = scraper.db
+    stored = db.get_posts_metrics([post['post_url'] for post in posts])
+
+    rows, new_posts = [], []
+    for post in posts:
+        existing = stored.get(canonical_url(post['post_url']))
+        if existing is None:
+            new_posts.append(scraper.enrich_post(post))
+        elif existing == metrics_of(post):
+            totals['unchanged'] += 1
+            continue
+        else:
+            totals['updated'] += 1
+        rows.append(post)
+
+    ids = db.bulk_upsert_posts(rows)
+    totals['new'] += len(new_posts)
+
+    for post in new_posts:
+        if post['has_mobilization_call'] and post['post_url'] in ids:
+            content = post.get('content') or ''
+            db.add_mobilization_call(
+                post_id=ids[post['post_url']],
+                event_date=scraper._extract_date_from_text(content),
+                description=content[:200] if content else None
+            )
+            totals['mobilization'] += 1
+
+
+def import_csv(path: str, platform: str, batch_size: int = 500) -> Dict[str, int]:
+    """Importa un export CSV de Apify; devuelve los conteos de la importación"""
+    scraper = SCRAPERS[platform]()
+    fields = parse_fields(scraper)
+    totals = {'rows': 0, 'new': 0, 'updated': 0, 'unchanged': 0,
+              'duplicates': 0, 'skipped': 0, 'mobilization': 0}
+
+    batch = []
+    for record in read_records(path, fields):
+        totals['rows'] += 1
+        try:
+            post = scraper.parse_post(record)
+        except Exception as e:
+            print(f"   Fila {totals['rows']}: error parseando ({e})")
+            totals['skipped'] += 1
+            continue
+
+        if not post or not post.get('post_url'):
+            totals['skipped'] += 1
+            continue
+        if scraper.dedup.is_duplicate(post):
+            totals['duplicates'] += 1
+            continue
+        scraper.dedup.remember(post)
+
+        batch.append(post)
+        if len(batch) >= batch_size:
+            _store_batch(scraper, batch, totals)
+            batch = []
+
+    if batch:
+        _store_batch(scraper, batch, totals)
+
+    # Conteos de palabras, narrativas y frases y firmas de casi-duplicados de los posts nuevos
+    if totals['new']:
+        text_stats.index_pending_posts(scraper.db)
+        near_duplicates.index_pending_posts(scraper.db)
+        emerging_narratives.index_pending_posts(scraper.db)
+
+    scraper.db.log_scrape(
+        platform=platform,
+        scrape_type='import',
+        status='success',
+        posts_found=totals['rows'],
+        posts_new=totals['new'],
+        target=os.path.basename(path),
+        items_fetched=totals['rows'],
+        posts_updated=totals['updated'],
+        mobilization_hits=totals['mobilization']
+    )
+    return totals
+
+
+def detect_platform(path: str) -> str:
+    """Plataforma según el nombre del archivo (psjcobre_instagram.csv -> instagram)"""
+    name = os.path.basename(path).lower()
+    for platform in SCRAPERS:
+        if platform in name:
+            return platform
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa exportaciones CSV de Apify a la base de datos')
+    parser.add_argument('paths', nargs='+', help='Archivos CSV exportados desde Apify')
+    parser.add_argument('--platform', choices=list(SCRAPERS.keys()),
+                        help='Plataforma del export (default: según el nombre del archivo)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Posts por lote (default: 500)')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        platform = args.platform or detect_platform(path)
+        if not platform:
+            print(f"No se pudo determinar la plataforma de {path}; usar --platform")
+            continue
+
+        print(f"\nImportando {path} ({platform})...")
+        t0 = time.perf_counter()
+        totals = import_csv(path, platform, args.batch_size)
+        print(f"   Filas: {totals['rows']} | Nuevos: {totals['new']} | "
+              f"Actualizados: {totals['updated']} | Sin cambios: {totals['unchanged']} | "
+              f"Repetidos: {totals['duplicates']} | Omitidos: {totals['skipped']} | "
+              f"Convocatorias: {totals['mobilization']} ({time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Instrumentación liviana para scrapers, base de datos y analizador
+Registra tiempo, cantidad de llamadas y filas procesadas por cada paso
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List
+
+
+class MetricsRegistry:
+    """Acumula métricas por nombre de span (tiempos inclusivos)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+
+    def record(self, name: str, seconds: float, rows: int = None) -> None:
+        with self._lock:
+            span = self.spans.get(name)
+            if span is None:
+                span = self.spans[name] = {
+                    'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'rows': 0
+                }
+            span['calls'] += 1
+            span['total_seconds'] += seconds
+            span['max_seconds'] = max(span['max_seconds'], seconds)
+            if rows:
+                span['rows'] += rows
+
+    def summary(self) -> List[Dict]:
+        """Spans ordenados por tiempo total descendente"""
+        with self._lock:
+            items = [dict(name=name, **data) for name, data in self.spans.items()]
+        for item in items:
+            item['total_seconds'] = round(item['total_seconds'], 6)
+            item['max_seconds'] = round(item['max_seconds'], 6)
+            item['avg_seconds'] = round(item['total_seconds'] / item['calls'], 6) if item['calls'] else 0
+        return sorted(items, key=lambda x: x['total_seconds'], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans = {}
+
+
+# Registro global del proceso
+METRICS = MetricsRegistry()
+
+
+def _count_rows(result) -> int:
+    """Infiere la cantidad de filas de un resultado (listas, tuplas o resúmenes de proceso)"""
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict) and 'total_processed' in result:
+        return result['total_processed']
+    return None
+
+
+@contextmanager
+def span(name: str):
+    """Context manager que mide un bloque; el bloque puede fijar info['rows']"""
+    info = {'rows': None}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        METRICS.record(name, time.perf_counter() - start, info['rows'])
+
+
+def timed(name: str = None, rows: Callable = _count_rows):
+    """Decorador que registra tiempo, llamadas y filas de una función"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                METRICS.record(span_name, time.perf_counter() - start, rows(result) if rows else None)
+
+        wrapper.__instrumented__ = True
+        return wrapper
+    return decorator
+
+
+def instrument_methods(cls, prefix: str, methods: Iterable[str] = None):
+    """Envuelve métodos de una clase con `timed` (por defecto todos los públicos)"""
+    if methods is None:
+        methods = [
+            attr for attr, value in vars(cls).items()
+            if callable(value) and not attr.startswith('_')
+        ]
+
+    for attr in methods:
+        func = vars(cls).get(attr)
+        if func is None or getattr(func, '__instrumented__', False):
+            continue
+        setattr(cls, attr, timed(f"{prefix}.{attr}")(func))
+
+    return cls
+
+
+def instrumented(prefix: str):
+    """Decorador de clase: instrumenta todos sus métodos públicos"""
+    def decorator(cls):
+        return instrument_methods(cls, prefix)
+    return decorator
@@ -0,0 +1,107 @@
+"""
+Trabajos en segundo plano - El dashboard encola el scraping en la tabla jobs y un
+hilo lo ejecuta mientras la página sigue respondiendo; el avance se guarda en la
+base y la interfaz lo consulta sin bloquearse.
+Un pedido repetido mientras hay un trabajo igual activo recibe el mismo trabajo.
+Cada trabajo queda a nombre del ejecutor (proceso) que lo creó; al arrancar, un
+ejecutor da por fallidos los trabajos activos de los anteriores.
+"""
+
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+
+from database import SocialDatabase
+
+
+def run_news_job(on_progress: Callable[[float, str], None]) -> Dict:
+    """
+    Búsqueda de noticias en SerpAPI (botón 'Actualizar Noticias').
+    Con deltas las noticias quedan solo en la base local hasta que la próxima
+    importación las reemplace por las de la corrida diaria.
+    """
+    from news_scraper import MineriaNewsScraper
+    summary = MineriaNewsScraper().run(on_progress=on_progress)
+    if 'error' in summary:
+        raise RuntimeError(summary['error'])
+    return summary
+
+
+def run_social_job(on_progress: Callable[[float, str], None], platforms: list = None) -> Dict:
+    """
+    Scraping de redes sociales con Apify (botón 'Actualizar Datos').
+    El dashboard no lo encola si la base se alimenta de deltas (ver has_deltas).
+    """
+    from run_scraper import run_all_scrapers
+    results = run_all_scrapers(platforms=platforms, on_progress=on_progress)
+    return {
+        platform: {'error': result['error']} if 'error' in result else {
+            'new': result.get('totals', {}).get('new', 0),
+            'updated': result.get('totals', {}).get('updated', 0),
+        }
+        for platform, result in results.items()
+    }
+
+
+JOB_KINDS = {
+    'news': run_news_job,
+    'social': run_social_job,
+}
+
+
+class JobRunner:
+    """Ejecuta los trabajos de la tabla jobs en hilos del proceso actual"""
+
+    def __init__(self, db: SocialDatabase = None):
+        self.db = db or SocialDatabase()
+        self.runner_id = uuid.uuid4().hex
+        self._threads: Dict[int, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+        # Trabajos que quedaron activos de un proceso anterior: sin esto los pedidos
+        # nuevos se engancharían a un trabajo que nadie ejecuta
+        interrupted = self.db.fail_orphaned_jobs(self.runner_id)
+        if interrupted:
+            print(f"   {interrupted} trabajos interrumpidos marcados como fallidos")
+
+    def submit(self, kind: str, **params) -> int:
+        """Encola un trabajo (o devuelve el activo equivalente) y lo inicia en un hilo"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+
+        with self._lock:
+            job_id, created = self.db.create_job(kind, params, self.runner_id)
+            if created:
+                thread = threading.Thread(
+                    target=self._execute, args=(job_id, kind, params),
+                    name=f"job-{kind}-{job_id}", daemon=True
+                )
+                self._threads[job_id] = thread
+                thread.start()
+        return job_id
+
+    def _execute(self, job_id: int, kind: str, params: Dict) -> None:
+        self.db.start_job(job_id)
+
+        def on_progress(progress: float, message: str = None) -> None:
+            self.db.update_job_progress(job_id, round(progress, 1), message)
+
+        try:
+            result = JOB_KINDS[kind](on_progress, **params)
+            self.db.finish_job(job_id, result=result)
+        except Exception as e:
+            print(f"Error en trabajo {kind} #{job_id}: {e}")
+            self.db.finish_job(job_id, error=str(e))
+        finally:
+            with self._lock:
+                self._threads.pop(job_id, None)
+
+    def status(self, job_id: int) -> Optional[Dict]:
+        return self.db.get_job(job_id)
+
+    def latest(self, kind: str) -> Optional[Dict]:
+        """Trabajo activo de un tipo o, si no hay, el último terminado"""
+        return self.db.get_latest_job(kind)
+
+    def is_active(self, job: Optional[Dict]) -> bool:
+        return bool(job) and job['status'] in ('queued', 'running')
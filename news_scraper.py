@@ -5,7 +5,7 @@ Obtiene Top Stories y News Results de Google News
 
 import os
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Callable, List, Dict
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,6 +18,7 @@ except ImportError:
     SERPAPI_AVAILABLE = False
 
 from database import SocialDatabase
+from instrumentation import timed
 
 
 class MineriaNewsScraper:
@@ -34,6 +35,7 @@ class MineriaNewsScraper:
             "ley de glaciares minería"
         ]
 
+    @timed('news.fetch_top_stories')
     def fetch_top_stories(self, query: str = "minería Mendoza") -> Dict:
         """Consulta SerpApi para obtener Top Stories sobre minería"""
         if not SERPAPI_AVAILABLE or not self.api_key:
@@ -55,6 +57,7 @@ class MineriaNewsScraper:
             print(f"Error al consultar Top Stories: {e}")
             return {}
 
+    @timed('news.fetch_recent_news')
     def fetch_recent_news(self, query: str = "minería Mendoza", hours: int = 48) -> Dict:
         """Consulta SerpApi para obtener noticias recientes (últimas 48 horas)"""
         if not SERPAPI_AVAILABLE or not self.api_key:
@@ -80,6 +83,7 @@ class MineriaNewsScraper:
             print(f"Error al consultar News Results: {e}")
             return {}
 
+    @timed('news.parse_and_store_top_stories')
     def parse_and_store_top_stories(self, results: Dict) -> int:
         """Parsea y almacena Top Stories"""
         if not results or 'top_stories' not in results:
@@ -101,6 +105,7 @@ class MineriaNewsScraper:
 
         return new_articles_count
 
+    @timed('news.parse_and_store_news_results')
     def parse_and_store_news_results(self, results: Dict) -> int:
         """Parsea y almacena News Results"""
         if not results or 'news_results' not in results:
@@ -132,8 +137,12 @@ class MineriaNewsScraper:
 
         return new_articles_count
 
-    def run(self) -> Dict:
-        """Ejecuta el proceso completo de scraping y almacenamiento"""
+    @timed('news.run')
+    def run(self, on_progress: Callable[[float, str], None] = None) -> Dict:
+        """
+        Ejecuta el proceso completo de scraping y almacenamiento.
+        on_progress(porcentaje, mensaje) recibe el avance después de cada búsqueda.
+        """
         print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Iniciando búsqueda de noticias sobre minería...")
 
         if not SERPAPI_AVAILABLE:
@@ -181,6 +190,8 @@ class MineriaNewsScraper:
             new_top_stories = self.parse_and_store_top_stories(top_stories_results)
             total_new_top_stories += new_top_stories
             print(f"[{progress:5.1f}%] -> {new_top_stories} Top Stories nuevas")
+            if on_progress:
+                on_progress(progress, f"'{keyword}': {new_top_stories} Top Stories nuevas")
 
             # Obtener noticias recientes (últimas 48 horas)
             completed_tasks += 1
@@ -190,6 +201,8 @@ class MineriaNewsScraper:
             new_news = self.parse_and_store_news_results(recent_news_results)
             total_new_news += new_news
             print(f"[{progress:5.1f}%] -> {new_news} noticias nuevas")
+            if on_progress:
+                on_progress(progress, f"'{keyword}': {new_news} noticias nuevas")
 
         summary = {
             'timestamp': datetime.now().isoformat(),
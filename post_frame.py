@@ -0,0 +1,186 @@
+"""
+PostFrame - Posts en columnas para análisis
+Las columnas numéricas son arrays NumPy, las categóricas (plataforma, nivel de alcance,
+sentimiento, ...) se guardan como códigos sobre una lista de valores únicos y el
+contenido de los posts se lee de la base recién cuando se pide
+"""
+
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+NUMERIC_COLUMNS = {
+    'id': np.int64,
+    'likes': np.int64,
+    'comments': np.int64,
+    'shares': np.int64,
+    'views': np.int64,
+    'engagement_total': np.int64,
+    'author_followers': np.int64,
+    'has_mobilization_call': np.int8,
+}
+
+CATEGORICAL_COLUMNS = {'platform', 'reach_level', 'sentiment', 'post_type', 'author_username', 'author_name'}
+
+# El resto de las columnas quedan como listas de texto (content se lee aparte, con content())
+TEXT_COLUMNS = {'post_id', 'post_url', 'keywords_matched', 'post_date', 'scraped_at', 'updated_at'}
+
+FRAME_COLUMNS = set(NUMERIC_COLUMNS) | CATEGORICAL_COLUMNS | TEXT_COLUMNS
+
+
+class Categorical:
+    """Columna de texto repetitivo: códigos int32 sobre categorías únicas (None = -1)"""
+
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes: np.ndarray, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        code = self.codes[i]
+        return None if code < 0 else self.categories[code]
+
+    def take(self, indices: np.ndarray) -> 'Categorical':
+        return Categorical(self.codes[indices], self.categories)
+
+    def code_of(self, value: str) -> int:
+        return self.categories.index(value) if value in self.categories else -1
+
+    def counts(self) -> Dict[str, int]:
+        """Cantidad de filas por categoría"""
+        valid = self.codes[self.codes >= 0]
+        totals = np.bincount(valid, minlength=len(self.categories))
+        return {category: int(total) for category, total in zip(self.categories, totals) if total}
+
+    def to_list(self) -> List[Optional[str]]:
+        return [None if code < 0 else self.categories[code] for code in self.codes.tolist()]
+
+
+class PostFrame:
+    """Resultado columnar de SocialDatabase.get_post_frame"""
+
+    def __init__(self, columns: Dict, db_path: str = None):
+        self.columns = columns
+        self.db_path = db_path
+        self._content: Dict[int, str] = {}
+        lengths = {len(values) for values in columns.values()}
+        self.length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_cursor(cls, names: List[str], cursor, db_path: str = None,
+                    chunk_size: int = 10000) -> 'PostFrame':
+        """Convierte el resultado de una consulta en columnas, de a `chunk_size` filas"""
+        parts = {name: [] for name in names}
+        indexes = {name: {} for name in names if name in CATEGORICAL_COLUMNS}
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for position, name in enumerate(names):
+                values = (row[position] for row in rows)
+                if name in NUMERIC_COLUMNS:
+                    parts[name].append(np.fromiter(
+                        (value or 0 for value in values), dtype=NUMERIC_COLUMNS[name], count=len(rows)
+                    ))
+                elif name in indexes:
+                    index = indexes[name]
+                    parts[name].append(np.fromiter(
+                        (-1 if value is None else index.setdefault(value, len(index)) for value in values),
+                        dtype=np.int32, count=len(rows)
+                    ))
+                else:
+                    parts[name].extend(values)
+
+        columns = {}
+        for name in names:
+            if name in NUMERIC_COLUMNS:
+                columns[name] = np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=NUMERIC_COLUMNS[name])
+            elif name in indexes:
+                codes = np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=np.int32)
+                columns[name] = Categorical(codes, list(indexes[name]))
+            else:
+                columns[name] = parts[name]
+        return cls(columns, db_path)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def take(self, indices) -> 'PostFrame':
+        """Subconjunto de filas (por índices o máscara booleana)"""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+
+        columns = {}
+        for name, values in self.columns.items():
+            if isinstance(values, np.ndarray):
+                columns[name] = values[indices]
+            elif isinstance(values, Categorical):
+                columns[name] = values.take(indices)
+            else:
+                columns[name] = [values[i] for i in indices.tolist()]
+
+        frame = PostFrame(columns, self.db_path)
+        frame._content = self._content
+        return frame
+
+    def where(self, name: str, value: str) -> 'PostFrame':
+        """Filas cuya columna categórica `name` es igual a `value`"""
+        column = self.columns[name]
+        return self.take(column.codes == column.code_of(value))
+
+    def group_sum(self, by: str, name: str) -> Dict[str, int]:
+        """Suma de una columna numérica por categoría"""
+        column = self.columns[by]
+        valid = column.codes >= 0
+        totals = np.bincount(column.codes[valid], weights=self.columns[name][valid],
+                             minlength=len(column.categories))
+        return {category: int(total) for category, total in zip(column.categories, totals)}
+
+    def content(self, i: int = None):
+        """Contenido de una fila (o de todas si no se indica); se lee de la base la primera vez"""
+        ids = self.columns['id'].tolist()
+        wanted = ids if i is None else [ids[i]]
+        missing = [post_id for post_id in wanted if post_id not in self._content]
+
+        if missing:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                cursor.execute(f'''
+                    SELECT id, content FROM posts WHERE id IN ({', '.join('?' for _ in chunk)})
+                ''', chunk)
+                self._content.update(cursor.fetchall())
+            conn.close()
+
+        if i is None:
+            return [self._content.get(post_id) for post_id in ids]
+        return self._content.get(ids[i])
+
+    def to_records(self, with_content: bool = False) -> List[Dict]:
+        """Lista de dicts como la de get_posts (para código que todavía la necesita)"""
+        names = list(self.columns)
+        lists = [
+            values.to_list() if isinstance(values, Categorical)
+            else values.tolist() if isinstance(values, np.ndarray) else values
+            for values in self.columns.values()
+        ]
+        records = [dict(zip(names, row)) for row in zip(*lists)]
+        if with_content and 'id' in self.columns:
+            for record, content in zip(records, self.content()):
+                record['content'] = content
+        return records
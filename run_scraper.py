@@ -5,15 +5,71 @@ Uso: python run_scraper.py [--platform PLATFORM] [--keywords-only] [--accounts-o
 """
 
 import argparse
+import json
 from datetime import datetime
 
 from scrapers import InstagramScraper, FacebookScraper, TikTokScraper, TwitterScraper
-from analysis import ImpactAnalyzer
+from analysis import ImpactAnalyzer, AccountProfiler, RiskEngine
+from analysis.emerging_narratives import update_narratives
+from scrapers.budget import ApifyBudget
+from instrumentation import METRICS
+
+
+def export_metrics(db, run_id: str, output_path: str = None, top: int = 15) -> list:
+    """Guarda las métricas de instrumentación en scrape_metrics y en un resumen JSON"""
+    summary = METRICS.summary()
+    db.save_scrape_metrics(run_id, summary)
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'run_id': run_id, 'spans': summary}, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "="*80)
+    print("TIEMPOS POR PASO (top por tiempo total)")
+    print("="*80)
+    print(f"  {'Paso':<50} {'Llamadas':>8} {'Total(s)':>10} {'Filas':>8}")
+    for item in summary[:top]:
+        print(f"  {item['name']:<50} {item['calls']:>8} {item['total_seconds']:>10.2f} {item['rows']:>8}")
+    if output_path:
+        print(f"\n  Resumen JSON: {output_path}")
+    print("="*80)
+
+    return summary
+
+
+def print_apify_spend(db, run_id: str) -> list:
+    """Muestra el gasto de Apify de la corrida por plataforma y el acumulado del día y del mes"""
+    spend = db.get_apify_spend_by_platform(run_id=run_id)
+    budget = ApifyBudget(db, 'all')
+    now = datetime.now()
+    today = db.get_apify_spend(since=now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat())
+    month = db.get_apify_spend(since=now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat())
+
+    print("\n" + "="*80)
+    print("GASTO EN APIFY")
+    print("="*80)
+    print(f"  {'Plataforma':<12} {'Llamadas':>8} {'Omitidas':>8} {'Items':>8} {'CU':>8} {'USD':>8}")
+    for row in spend:
+        print(f"  {row['platform']:<12} {row['calls']:>8} {row['skipped']:>8} {row['items'] or 0:>8} "
+              f"{row['compute_units'] or 0:>8.3f} {row['usage_usd'] or 0:>8.3f}")
+
+    daily_cap = f" / ${budget.daily_cap:.2f}" if budget.daily_cap is not None else ""
+    monthly_cap = f" / ${budget.monthly_cap:.2f}" if budget.monthly_cap is not None else ""
+    print(f"\n  Hoy: ${today:.3f}{daily_cap} | Mes: ${month:.3f}{monthly_cap}")
+    print("="*80)
+
+    return spend
 
 
 def run_all_scrapers(platforms=None, fetch_keywords=True, fetch_accounts=True,
-                     max_per_keyword=30, max_per_account=15):
-    """Ejecuta scrapers para todas las plataformas especificadas"""
+                     max_per_keyword=30, max_per_account=15, metrics_output=None,
+                     adaptive=True, concurrent=False, batched=False, on_progress=None):
+    """
+    Ejecuta scrapers para todas las plataformas especificadas.
+    on_progress(porcentaje, mensaje) recibe el avance después de cada plataforma.
+    """
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    METRICS.reset()
 
     all_scrapers = {
         'instagram': InstagramScraper,
@@ -53,7 +109,11 @@ def run_all_scrapers(platforms=None, fetch_keywords=True, fetch_accounts=True,
                 fetch_by_keywords=fetch_keywords,
                 fetch_by_accounts=fetch_accounts,
                 max_per_keyword=max_per_keyword,
-                max_per_account=max_per_account
+                max_per_account=max_per_account,
+                run_id=run_id,
+                adaptive=adaptive,
+                concurrent=concurrent,
+                batched=batched
             )
             results[platform] = result
             print(f"[{platform_progress:5.1f}%] {platform.upper()} completado")
@@ -61,6 +121,10 @@ def run_all_scrapers(platforms=None, fetch_keywords=True, fetch_accounts=True,
             print(f"\n[{platform_progress:5.1f}%] Error en {platform}: {e}")
             results[platform] = {'error': str(e)}
 
+        if on_progress:
+            # El análisis posterior cuenta como el último tramo de la corrida
+            on_progress(platform_progress * 0.9, f"{platform.upper()} completado")
+
     # Resumen final
     print("\n" + "="*80)
     print("RESUMEN FINAL DE SCRAPING")
@@ -84,9 +148,62 @@ def run_all_scrapers(platforms=None, fetch_keywords=True, fetch_accounts=True,
 
     # Generar análisis de impacto
     print("\n📊 Generando análisis de impacto...")
+    if on_progress:
+        on_progress(90, "Generando análisis de impacto")
     analyzer = ImpactAnalyzer()
+
+    # Retención del histórico de viewers de YouTube (agregados por minuto/hora)
+    compacted = analyzer.db.compact_youtube_viewers()
+    if compacted['raw_deleted']:
+        print(f"   Histórico de viewers compactado: {compacted['raw_deleted']} registros crudos consolidados")
+
+    # Frases que crecen respecto de su línea base (se guardan en narratives antes de
+    # generar el reporte, que las incluye)
+    emerging = update_narratives(analyzer.db)
+    for item in emerging[:5]:
+        print(f"   Frase emergente: \"{item['phrase']}\" {item['count']} posts "
+              f"({item['ratio']:.1f}x lo esperado)")
+
     analyzer.print_report(days=14)
 
+    # Cambios respecto del reporte anterior
+    changes = analyzer.report_changes(days=14)
+    if changes:
+        summary = changes['summary']
+        print(f"   Cambios desde {changes['from'][:16]}: "
+              f"{summary['total_posts']['change']:+} posts, "
+              f"{summary['total_engagement']['change']:+,} interacciones, "
+              f"riesgo {changes['risk_level']['before']} -> {changes['risk_level']['after']}, "
+              f"{len(changes['new_mobilization_calls'])} convocatorias nuevas")
+
+    # Serie diaria del índice de riesgo (solo los días alcanzados por datos nuevos)
+    recomputed = RiskEngine(analyzer).update()
+    if recomputed:
+        print(f"   Serie de riesgo actualizada: {recomputed} días recalculados")
+
+    # Perfiles de actividad de las cuentas clave (solo se suman los posts nuevos)
+    profiles = AccountProfiler(analyzer.db).profile_key_accounts()
+    if profiles:
+        print(f"   Perfiles de cuentas clave actualizados: {len(profiles)}")
+
+    export_metrics(analyzer.db, run_id, metrics_output)
+    print_apify_spend(analyzer.db, run_id)
+
+    # Actores con el circuito abierto o en prueba
+    unhealthy = [actor for actor in analyzer.db.get_actors_health() if actor['state'] != 'closed']
+    for actor in unhealthy:
+        print(f"  Actor {actor['actor_id']} ({actor['platform']}): {actor['state']}, "
+              f"reintento {(actor['retry_at'] or '-')[:16]} | {actor['last_error']}")
+
+    # Fuentes más lentas de los últimos 30 días (planificación de capacidad)
+    slowest = analyzer.db.get_slowest_sources(days=30, limit=5)
+    if slowest:
+        print("\nFuentes más lentas (30 días):")
+        for source in slowest:
+            print(f"  {source['platform']:<10} {source['scrape_type']:<8} {source['target'][:30]:<30} "
+                  f"{source['avg_seconds']:>7.1f}s prom. | {source['compute_units'] or 0:.3f} CU | "
+                  f"{source['posts_new'] or 0} nuevos")
+
     return results
 
 
@@ -121,6 +238,31 @@ def main():
         help='Máximo de resultados por búsqueda (default: 30)'
     )
 
+    parser.add_argument(
+        '--fixed-schedule',
+        action='store_true',
+        help='Desactiva el scheduler adaptativo (primeras 5 keywords y todas las cuentas)'
+    )
+
+    parser.add_argument(
+        '--async',
+        dest='concurrent',
+        action='store_true',
+        help='Lanza las corridas de Apify de cada plataforma en paralelo'
+    )
+
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Agrupa keywords y cuentas de cada plataforma en una sola corrida de actor'
+    )
+
+    parser.add_argument(
+        '--metrics-json',
+        default='scrape_metrics.json',
+        help='Archivo JSON con los tiempos por paso de la corrida (default: scrape_metrics.json)'
+    )
+
     args = parser.parse_args()
 
     platforms = None if args.platform == 'all' else [args.platform]
@@ -133,7 +275,11 @@ def main():
         fetch_keywords=fetch_keywords,
         fetch_accounts=fetch_accounts,
         max_per_keyword=args.max_results,
-        max_per_account=args.max_results // 2
+        max_per_account=args.max_results // 2,
+        metrics_output=args.metrics_json,
+        adaptive=not args.fixed_schedule,
+        concurrent=args.concurrent,
+        batched=args.batch
     )
 
 
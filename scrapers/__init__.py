@@ -3,11 +3,13 @@ from .instagram_scraper import InstagramScraper
 from .facebook_scraper import FacebookScraper
 from .tiktok_scraper import TikTokScraper
 from .twitter_scraper import TwitterScraper
+from .scheduler import ScrapeScheduler
 
 __all__ = [
     'BaseScraper',
     'InstagramScraper',
     'FacebookScraper',
     'TikTokScraper',
-    'TwitterScraper'
+    'TwitterScraper',
+    'ScrapeScheduler'
 ]
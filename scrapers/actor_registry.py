@@ -0,0 +1,170 @@
+"""
+Registro de actores de Apify - Actores alternativos por plataforma y propósito,
+con un circuit breaker cuyo estado (salud de cada actor) persiste en actor_health
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+# Propósito del registro de actores que atiende cada tipo de tarea
+TASK_PURPOSES = {'keyword': 'search', 'account': 'profile'}
+
+
+class ActorUnavailable(Exception):
+    """El circuito del actor está abierto (falló repetidamente y todavía no toca reintentar)"""
+    pass
+
+
+class ActorHealth:
+    """
+    Circuit breaker por actor:
+      closed    -> se usa normalmente
+      open      -> tras `failure_threshold` fallos seguidos; no se llama hasta retry_at
+      half_open -> vencido retry_at, un solo llamador hace la llamada de prueba (el resto lo
+                   sigue viendo abierto); si funciona se cierra, si falla se vuelve a abrir
+                   con el doble de espera (hasta max_cooldown_hours)
+    """
+
+    def __init__(self, db, platform: str, failure_threshold: int = 3,
+                 cooldown_minutes: int = 60, max_cooldown_hours: int = 24,
+                 probe_timeout_minutes: int = 60):
+        self.db = db
+        self.platform = platform
+        self.failure_threshold = failure_threshold
+        self.cooldown = timedelta(minutes=cooldown_minutes)
+        self.max_cooldown = timedelta(hours=max_cooldown_hours)
+        # Una prueba más vieja que esto se considera abandonada (proceso cortado)
+        self.probe_timeout = timedelta(minutes=probe_timeout_minutes)
+
+    def get(self, actor_id: str) -> Dict:
+        health = self.db.get_actor_health(actor_id)
+        if health:
+            return health
+        return {
+            'actor_id': actor_id,
+            'platform': self.platform,
+            'state': 'closed',
+            'consecutive_failures': 0,
+            'total_calls': 0,
+            'total_failures': 0,
+            'health_score': 1.0,
+            'avg_seconds': 0.0,
+            'cooldown_minutes': 0,
+            'last_error': None,
+            'last_success_at': None,
+            'last_failure_at': None,
+            'retry_at': None,
+            'probe_started_at': None,
+        }
+
+    def available(self, actor_id: str) -> bool:
+        """Indica si el actor se puede intentar, sin cambiar su estado (para ordenar candidatos)"""
+        health = self.get(actor_id)
+        if health['state'] == 'closed':
+            return True
+
+        now = datetime.now()
+        if not health['retry_at'] or now < datetime.fromisoformat(health['retry_at']):
+            return False
+        probe = health.get('probe_started_at')
+        return not probe or now - datetime.fromisoformat(probe) >= self.probe_timeout
+
+    def allow(self, actor_id: str) -> bool:
+        """
+        Se llama justo antes de llamar al actor. Con el circuito abierto y la espera
+        vencida toma la llamada de prueba (half_open); si otro la tiene en curso, no permite.
+        """
+        if self.get(actor_id)['state'] == 'closed':
+            return True
+
+        now = datetime.now()
+        if not self.db.claim_actor_probe(actor_id, now.isoformat(), (now - self.probe_timeout).isoformat()):
+            return False
+
+        print(f"      -> Probando recuperación de {actor_id}")
+        return True
+
+    def record_success(self, actor_id: str, seconds: float) -> None:
+        health = self.get(actor_id)
+        if health['state'] == 'half_open':
+            print(f"      -> {actor_id} recuperado")
+
+        health.update({
+            'state': 'closed',
+            'consecutive_failures': 0,
+            'total_calls': health['total_calls'] + 1,
+            'health_score': 0.8 * health['health_score'] + 0.2,
+            'avg_seconds': seconds if not health['avg_seconds'] else 0.8 * health['avg_seconds'] + 0.2 * seconds,
+            'cooldown_minutes': 0,
+            'last_success_at': datetime.now().isoformat(),
+            'retry_at': None,
+            'probe_started_at': None,
+        })
+        self.db.save_actor_health(health)
+
+    def record_failure(self, actor_id: str, error: str) -> None:
+        health = self.get(actor_id)
+        now = datetime.now()
+
+        health.update({
+            'consecutive_failures': health['consecutive_failures'] + 1,
+            'total_calls': health['total_calls'] + 1,
+            'total_failures': health['total_failures'] + 1,
+            'health_score': 0.8 * health['health_score'],
+            'last_error': (error or '')[:500],
+            'last_failure_at': now.isoformat(),
+            'probe_started_at': None,
+        })
+
+        if health['state'] == 'half_open' or health['consecutive_failures'] >= self.failure_threshold:
+            # Cada reapertura duplica la espera
+            previous = timedelta(minutes=health['cooldown_minutes'] or 0)
+            cooldown = min(previous * 2, self.max_cooldown) if previous else self.cooldown
+            health.update({
+                'state': 'open',
+                'cooldown_minutes': int(cooldown.total_seconds() // 60),
+                'retry_at': (now + cooldown).isoformat(),
+            })
+            print(f"      -> Circuito abierto para {actor_id} hasta {health['retry_at'][:16]}")
+
+        self.db.save_actor_health(health)
+
+
+class ActorRegistry:
+    """Actores disponibles por propósito (search, profile, ...) en orden de preferencia"""
+
+    def __init__(self, health: ActorHealth):
+        self.health = health
+        self.actors: Dict[str, List[Dict]] = {}
+
+    def register(self, purpose: str, actor_id: str, build_input: Callable,
+                 skip_errors: bool = False, batch_limit: str = None) -> None:
+        """
+        Agrega un actor; build_input(targets, max_results) arma su run_input para una
+        lista de objetivos (keywords o cuentas).
+        skip_errors descarta los items de error que algunos actores dejan en el dataset.
+        batch_limit indica si el actor admite varios objetivos en una corrida y cómo
+        interpreta el límite de resultados: 'per_target' (por objetivo) o 'total'.
+        """
+        self.actors.setdefault(purpose, []).append({
+            'actor_id': actor_id,
+            'build_input': build_input,
+            'skip_errors': skip_errors,
+            'batch_limit': batch_limit,
+        })
+
+    def candidates(self, purpose: str) -> List[Dict]:
+        """
+        Actores a intentar: primero los de circuito cerrado o listos para prueba en orden de
+        preferencia (a igual estado, el de mejor salud); los de circuito abierto quedan afuera.
+        No cambia el estado de ningún circuito: la prueba se toma recién al llamar al actor.
+        """
+        available = []
+        for order, actor in enumerate(self.actors.get(purpose, [])):
+            if self.health.available(actor['actor_id']):
+                score = self.health.get(actor['actor_id'])['health_score']
+                # Un actor con salud muy baja cede el primer lugar aunque tenga el circuito cerrado
+                available.append((score < 0.5, order, actor))
+
+        available.sort(key=lambda item: (item[0], item[1]))
+        return [actor for _, _, actor in available]
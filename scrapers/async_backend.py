@@ -0,0 +1,108 @@
+"""
+Backend asíncrono de Apify - Lanza las corridas de todas las tareas de un scraper
+a la vez con ApifyClientAsync, las espera en paralelo y entrega cada dataset
+apenas termina su corrida, sin esperar al resto
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
+
+from apify_client import ApifyClientAsync
+
+from .actor_registry import ActorUnavailable, TASK_PURPOSES
+from .budget import BudgetExceeded
+
+
+class AsyncApifyBackend:
+    """Ejecuta en paralelo las tareas (keyword/cuenta) planificadas para un scraper"""
+
+    def __init__(self, scraper, max_concurrency: int = 5):
+        self.scraper = scraper
+        self.client = ApifyClientAsync(scraper.apify_token)
+        # Apify limita la cantidad de corridas simultáneas según el plan de la cuenta
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Los fetch sincrónicos usan scraper.actor_runs/task_error: de a uno por vez
+        self.sync_lock = asyncio.Lock()
+
+    async def _call_actor(self, actor: Dict, target: str, max_results: int) -> tuple:
+        """Arranca la corrida, espera que termine y lee su dataset; devuelve (items, corrida)"""
+        scraper = self.scraper
+        call = scraper._prepare_call(actor['actor_id'], actor['build_input']([target], max_results))
+
+        t0 = time.perf_counter()
+        try:
+            run = await self.client.actor(actor['actor_id']).start(run_input=call['run_input'])
+            run = await self.client.run(run['id']).wait_for_finish() or run
+            items = [
+                item async for item in self.client.dataset(run['defaultDatasetId']).iterate_items()
+                if not (actor['skip_errors'] and item.get('error'))
+            ]
+        except Exception as e:
+            scraper._call_failed(call, e)
+            raise
+
+        return items, scraper._finish_call(call, run, items, time.perf_counter() - t0)
+
+    async def run_task(self, task: Dict) -> Dict:
+        """Ejecuta una tarea probando los actores registrados en orden de salud"""
+        scraper = self.scraper
+        outcome = {'task': task, 'items': [], 'actor_runs': [], 'error': None, 'status': None,
+                   'started_at': datetime.now()}
+
+        candidates = scraper.actors.candidates(TASK_PURPOSES[task['scrape_type']])
+        if not candidates:
+            # Sin actores disponibles (p. ej. búsqueda en Facebook): fetch sincrónico en un hilo
+            return await self._run_sync_fetch(task, outcome)
+
+        async with self.semaphore:
+            outcome['started_at'] = datetime.now()
+            t0 = time.perf_counter()
+            failed = False
+            for actor in candidates:
+                try:
+                    items, actor_run = await self._call_actor(actor, task['target'], task['max_results'])
+                    outcome['items'] = items
+                    outcome['actor_runs'].append(actor_run)
+                    outcome['error'] = None
+                    break
+                except BudgetExceeded as e:
+                    outcome['error'] = str(e)
+                    break
+                except Exception as e:
+                    print(f"      -> Error en {actor['actor_id']} ({task['target']}): {e}")
+                    outcome['error'] = str(e)
+                    failed = failed or not isinstance(e, ActorUnavailable)
+
+        # Sin ninguna llamada hecha (sin saldo o circuitos abiertos) la tarea se omitió
+        if outcome['error']:
+            outcome['status'] = 'error' if failed else 'skipped'
+        outcome['fetch_seconds'] = time.perf_counter() - t0
+        return outcome
+
+    async def _run_sync_fetch(self, task: Dict, outcome: Dict) -> Dict:
+        """Ejecuta fetch_by_keyword/fetch_by_account sin bloquear el loop ni saltear el semáforo"""
+        scraper = self.scraper
+        fetch = scraper.fetch_by_keyword if task['scrape_type'] == 'keyword' else scraper.fetch_by_account
+
+        async with self.semaphore, self.sync_lock:
+            outcome['started_at'] = datetime.now()
+            t0 = time.perf_counter()
+            scraper.actor_runs, scraper.task_error = [], None
+            try:
+                outcome['items'] = await asyncio.to_thread(fetch, task['target'], task['max_results'])
+            except Exception as e:
+                outcome['error'], outcome['status'] = str(e), 'error'
+            outcome['actor_runs'] = list(scraper.actor_runs)
+            if scraper.task_error and not outcome['items']:
+                outcome['error'] = scraper.task_error['message']
+                outcome['status'] = scraper.task_error['status']
+
+        outcome['fetch_seconds'] = time.perf_counter() - t0
+        return outcome
+
+    async def stream(self, tasks: List[Dict]) -> AsyncIterator[Dict]:
+        """Lanza todas las tareas y las entrega en orden de finalización"""
+        for finished in asyncio.as_completed([self.run_task(task) for task in tasks]):
+            yield await finished
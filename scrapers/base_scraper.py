@@ -2,8 +2,10 @@
 Base Scraper - Clase base para todos los scrapers de redes sociales
 """
 
+import asyncio
 import os
 import re
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import List, Dict, Optional
@@ -12,6 +14,13 @@ from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import SocialDatabase
+from analysis import emerging_narratives, near_duplicates, text_stats
+from instrumentation import timed, instrument_methods
+from .scheduler import ScrapeScheduler
+from .budget import ApifyBudget, BudgetExceeded, LIMIT_FIELDS
+from .actor_registry import ActorHealth, ActorRegistry, ActorUnavailable, TASK_PURPOSES
+from .async_backend import AsyncApifyBackend
+from .dedup import RunDedupCache, canonical_url, metrics_of
 
 load_dotenv()
 
@@ -19,11 +28,41 @@ load_dotenv()
 class BaseScraper(ABC):
     """Clase base abstracta para scrapers de redes sociales"""
 
+    # Métodos de cada scraper concreto que se cronometran
+    instrumented_methods = [
+        'fetch_by_keyword', 'fetch_by_account', 'parse_post',
+        'fetch_post_details', 'fetch_video_details', 'fetch_video_comments',
+    ]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls, f"scraper.{cls.__name__}", cls.instrumented_methods)
+
     def __init__(self, platform: str):
         self.platform = platform
         self.db = SocialDatabase()
         self.apify_token = os.getenv('APIFY_TOKEN')
 
+        # Corridas de actores de Apify de la tarea en curso (para el registro de scraping)
+        self.actor_runs = []
+
+        # Falla de la tarea en curso ({'status': 'error'|'skipped', 'message': ...}); la deja
+        # _call_with_failover porque los fetch_by_* atrapan la excepción y devuelven []
+        self.task_error = None
+
+        # Posts ya procesados en la corrida (se repiten entre keywords y cuentas)
+        self.dedup = RunDedupCache()
+
+        # Posts que _demultiplex ya parseó para repartir un lote: clave del item -> (item, post)
+        self.parsed_items = {}
+
+        # Estimación de costo y topes de gasto en Apify
+        self.budget = ApifyBudget(self.db, platform)
+
+        # Salud de los actores (circuit breaker) y actores alternativos por propósito
+        self.actor_health = ActorHealth(self.db, platform)
+        self.actors = ActorRegistry(self.actor_health)
+
         # Palabras clave para búsqueda
         self.keywords = [kw['keyword'] for kw in self.db.get_active_keywords()]
 
@@ -43,17 +82,11 @@ class BaseScraper(ABC):
             r'\d{1,2}\s+de\s+(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)',
         ]
 
-        # Consignas conocidas
-        self.known_narratives = [
-            "el agua vale más que el oro",
-            "el agua de mendoza no se negocia",
-            "no a san jorge",
-            "la 7722 no se toca",
-            "el agua es vida",
-            "mendoza es hija del agua",
-            "la megaminería es saqueo",
-            "no a la mina",
-            "la 7722 se defiende en la calle",
+        # Consignas conocidas y las frases emergentes ya detectadas (tabla narratives)
+        self.known_narratives = [narrative.lower() for narrative in text_stats.KNOWN_NARRATIVES]
+        self.known_narratives += [
+            narrative['narrative_text'].lower() for narrative in self.db.get_narratives()
+            if narrative['narrative_text'] and narrative['narrative_text'].lower() not in self.known_narratives
         ]
 
     @abstractmethod
@@ -71,6 +104,210 @@ class BaseScraper(ABC):
         """Parsea datos crudos de la API a formato estándar"""
         pass
 
+    def _prepare_call(self, actor_id: str, run_input: Dict, requested_items: int = None) -> Dict:
+        """
+        Controles previos a una llamada: circuito del actor y presupuesto.
+        Reduce la cantidad de resultados pedida si no entra completa en el presupuesto,
+        lanza BudgetExceeded si no hay saldo y ActorUnavailable si el circuito está abierto.
+        requested_items permite informar el total esperado cuando el límite es por objetivo.
+        """
+        if not self.actor_health.available(actor_id):
+            raise ActorUnavailable(f"circuito abierto para {actor_id}")
+
+        limit_field = next((field for field in LIMIT_FIELDS if field in run_input), None)
+        requested = requested_items or (run_input[limit_field] if limit_field else 1)
+
+        try:
+            allowed = self.budget.approve(actor_id, requested)
+        except BudgetExceeded:
+            self.budget.record(actor_id, 'skipped', requested)
+            raise
+
+        # Con el circuito abierto, la llamada de prueba se toma recién acá (una sola a la vez)
+        if not self.actor_health.allow(actor_id):
+            raise ActorUnavailable(f"circuito abierto para {actor_id} (prueba en curso)")
+
+        if limit_field and allowed < requested:
+            limit = max(1, int(run_input[limit_field] * allowed / requested))
+            print(f"      -> Presupuesto: {limit_field} reducido de {run_input[limit_field]} a {limit}")
+            run_input = {**run_input, limit_field: limit}
+
+        return {
+            'actor_id': actor_id,
+            'run_input': run_input,
+            'requested': requested,
+            'reserved': self.budget.reserve(actor_id, allowed),
+        }
+
+    def _call_failed(self, call: Dict, error: Exception) -> None:
+        """Registra una llamada que no llegó a terminar (error de la API o del cliente)"""
+        self.budget.record(call['actor_id'], 'error', call['requested'], reserved=call['reserved'])
+        self.actor_health.record_failure(call['actor_id'], str(error))
+
+    def _finish_call(self, call: Dict, run: Dict, items: List[Dict], seconds: float) -> Dict:
+        """Registra costo y salud de una corrida terminada; lanza RuntimeError si el actor falló"""
+        actor_id = call['actor_id']
+        status = 'success' if run.get('status') in (None, 'SUCCEEDED') else run['status'].lower()
+        self.budget.record(actor_id, status, call['requested'], run, len(items), reserved=call['reserved'])
+
+        if status != 'success':
+            self.actor_health.record_failure(actor_id, f"estado {run['status']}")
+            raise RuntimeError(f"el actor {actor_id} terminó con estado {run['status']}")
+        self.actor_health.record_success(actor_id, seconds)
+
+        return {
+            'actor_id': actor_id,
+            'apify_run_id': run.get('id'),
+            'compute_units': (run.get('stats') or {}).get('computeUnits') or 0,
+            'usage_usd': self.budget.run_cost(run),
+            'items': len(items),
+        }
+
+    def _call_actor(self, actor_id: str, run_input: Dict, skip_errors: bool = False,
+                    requested_items: int = None) -> List[Dict]:
+        """Ejecuta un actor de Apify, devuelve los items de su dataset y registra la corrida"""
+        call = self._prepare_call(actor_id, run_input, requested_items)
+
+        t0 = time.perf_counter()
+        try:
+            run = self.client.actor(actor_id).call(run_input=call['run_input'])
+            items = [
+                item for item in self.client.dataset(run["defaultDatasetId"]).iterate_items()
+                if not (skip_errors and item.get('error'))
+            ]
+        except Exception as e:
+            self._call_failed(call, e)
+            raise
+
+        self.actor_runs.append(self._finish_call(call, run, items, time.perf_counter() - t0))
+        return items
+
+    def _call_with_failover(self, purpose: str, target: str, max_results: int) -> List[Dict]:
+        """
+        Llama a los actores registrados para `purpose` en orden de salud hasta que uno responda.
+        Los actores con el circuito abierto se saltean sin esperar a que fallen.
+        """
+        candidates = self.actors.candidates(purpose)
+        if not candidates:
+            error = ActorUnavailable(f"ningún actor disponible para {self.platform}/{purpose}")
+            self.task_error = {'status': 'skipped', 'message': str(error)}
+            raise error
+
+        last_error, failed = None, False
+        for position, actor in enumerate(candidates):
+            if position:
+                print(f"      -> Intentando actor alternativo {actor['actor_id']}...")
+            try:
+                return self._call_actor(actor['actor_id'], actor['build_input']([target], max_results),
+                                        skip_errors=actor['skip_errors'])
+            except BudgetExceeded as e:
+                # Sin saldo no tiene sentido reintentar con otro actor
+                self.task_error = {'status': 'skipped', 'message': str(e)}
+                raise
+            except Exception as e:
+                print(f"      -> Error en {actor['actor_id']}: {e}")
+                last_error = e
+                failed = failed or not isinstance(e, ActorUnavailable)
+
+        # Si ningún actor llegó a llamarse (circuitos abiertos) la tarea se omitió, no falló
+        self.task_error = {'status': 'error' if failed else 'skipped', 'message': str(last_error)}
+        raise last_error
+
+    def item_source(self, raw_data: Dict) -> Optional[str]:
+        """
+        Objetivo (hashtag, búsqueda, perfil) que el actor informa en cada item, si lo hace.
+        Los scrapers lo redefinen según los campos de su actor.
+        """
+        return None
+
+    def raw_post_key(self, raw_data: Dict) -> Optional[str]:
+        """Clave del item crudo (URL canónica o id del post) para descartar repetidos antes de parsear"""
+        for field in ('url', 'postUrl', 'webVideoUrl', 'tweetUrl', 'videoUrl'):
+            if isinstance(raw_data.get(field), str) and raw_data[field]:
+                return canonical_url(raw_data[field])
+        for field in ('id', 'postId', 'id_str', 'tweetId', 'videoId', 'shortCode'):
+            if raw_data.get(field):
+                return f"{self.platform}:{raw_data[field]}"
+        return None
+
+    def _source_key(self, value: str) -> str:
+        """Forma comparable de un objetivo: sin @/#, espacios ni prefijo de URL"""
+        value = (value or '').strip().lower()
+        if '://' in value:
+            value = [part for part in value.split('?')[0].split('/') if part][-1]
+        return value.replace('@', '').replace('#', '').replace(' ', '')
+
+    def _demultiplex(self, items: List[Dict], scrape_type: str, targets: List[str]) -> tuple:
+        """
+        Reparte los items de una corrida por lotes entre sus objetivos.
+        Usa el objetivo que informa el actor y, si no hay, el autor (cuentas) o el
+        texto del post (keywords; si aparecen varias, la más larga: un post de
+        "megaminería" no es de "minería"). Devuelve ({objetivo: items}, items_sin_asignar).
+        """
+        keys = {self._source_key(target): target for target in targets}
+        by_target = {target: [] for target in targets}
+        unmatched = []
+
+        for item in items:
+            target = keys.get(self._source_key(self.item_source(item)))
+
+            if target is None:
+                try:
+                    post = self.parse_post(item) or {}
+                except Exception:
+                    post = {}
+                # process_and_store reutiliza el post en lugar de volver a parsear el item
+                raw_key = self.raw_post_key(item)
+                if post and raw_key:
+                    self.parsed_items[raw_key] = (item, post)
+
+                if scrape_type == 'account':
+                    target = keys.get(self._source_key(post.get('author_username')))
+                else:
+                    text = (post.get('content') or '').lower()
+                    matches = [t for t in targets if t.lower() in text or f"#{self._source_key(t)}" in text]
+                    target = max(matches, key=len) if matches else None
+
+            if target is None:
+                unmatched.append(item)
+            else:
+                by_target[target].append(item)
+
+        return by_target, unmatched
+
+    def _fetch_batch(self, scrape_type: str, limits: Dict[str, int]) -> Optional[tuple]:
+        """
+        Pide todos los objetivos de `limits` ({objetivo: max_results}) en una sola corrida.
+        Devuelve el resultado de _demultiplex o None si ningún actor admite lotes.
+        """
+        candidates = [actor for actor in self.actors.candidates(TASK_PURPOSES[scrape_type])
+                      if actor['batch_limit']]
+        if not candidates:
+            return None
+
+        last_error = None
+        for actor in candidates:
+            if actor['batch_limit'] == 'total':
+                limit = sum(limits.values())
+                requested = limit
+            else:
+                # _run_batched arma lotes de igual profundidad: el máximo es el límite de todos
+                limit = max(limits.values())
+                requested = limit * len(limits)
+
+            try:
+                items = self._call_actor(actor['actor_id'], actor['build_input'](list(limits), limit),
+                                         skip_errors=actor['skip_errors'], requested_items=requested)
+                return self._demultiplex(items, scrape_type, list(limits))
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"      -> Error en lote con {actor['actor_id']}: {e}")
+                last_error = e
+
+        raise last_error
+
+    @timed('scraper.analyze_sentiment')
     def analyze_sentiment(self, text: str) -> str:
         """Analiza el sentimiento de un texto"""
         if not text:
@@ -90,6 +327,7 @@ class BaseScraper(ABC):
         except:
             return "neutral"
 
+    @timed('scraper.detect_mobilization_call')
     def detect_mobilization_call(self, text: str) -> bool:
         """Detecta si el texto contiene una convocatoria a movilización"""
         if not text:
@@ -103,6 +341,7 @@ class BaseScraper(ABC):
 
         return False
 
+    @timed('scraper.extract_narratives')
     def extract_narratives(self, text: str) -> List[str]:
         """Extrae narrativas/consignas conocidas del texto"""
         if not text:
@@ -117,6 +356,7 @@ class BaseScraper(ABC):
 
         return found_narratives
 
+    @timed('scraper.match_keywords')
     def match_keywords(self, text: str) -> List[str]:
         """Identifica qué palabras clave aparecen en el texto"""
         if not text:
@@ -131,46 +371,121 @@ class BaseScraper(ABC):
 
         return matched
 
+    def enrich_post(self, post: Dict) -> Dict:
+        """Agrega sentimiento, convocatoria, keywords y narrativas a un post parseado"""
+        content = post.get('content', '')
+        post['sentiment'] = self.analyze_sentiment(content)
+        post['has_mobilization_call'] = self.detect_mobilization_call(content)
+        post['keywords_matched'] = self.match_keywords(content)
+        post['narratives'] = self.extract_narratives(content)
+        return post
+
+    @timed('scraper.process_and_store')
     def process_and_store(self, posts: List[Dict]) -> Dict:
-        """Procesa y almacena una lista de posts"""
+        """
+        Procesa y almacena una lista de posts.
+        Los items que el actor ya devolvió iguales en la corrida se descartan sin parsearse,
+        y los posts repetidos con igual contenido y métricas después de parsearlos; los que
+        ya están en la BD (por URL canónica) solo actualizan métricas si cambiaron, sin
+        re-enriquecerse.
+        """
         new_count = 0
         updated_count = 0
-
+        unchanged_count = 0
+        duplicate_count = 0
+        mobilization_count = 0
+        engagement = 0
+        timings = {'parse': 0.0, 'enrich': 0.0, 'db': 0.0}
+
+        # Parsear a formato estándar y descartar repetidos de la corrida
+        parsed = []
         for raw_post in posts:
-            try:
-                # Parsear a formato estándar
-                post = self.parse_post(raw_post)
+            raw_key = self.raw_post_key(raw_post)
+            cached = self.parsed_items.pop(raw_key, None) if raw_key else None
+            if self.dedup.is_raw_duplicate(raw_key, raw_post):
+                duplicate_count += 1
+                continue
+
+            if cached and cached[0] is raw_post:
+                post = cached[1]
+            else:
+                t0 = time.perf_counter()
+                try:
+                    post = self.parse_post(raw_post)
+                except Exception as e:
+                    print(f"Error procesando post: {e}")
+                    continue
+                finally:
+                    timings['parse'] += time.perf_counter() - t0
+
+            if not post or not post.get('post_url'):
+                continue
+            self.dedup.remember_raw(raw_key, raw_post)
+            if self.dedup.is_duplicate(post):
+                duplicate_count += 1
+                continue
+            parsed.append(post)
+
+        # Métricas guardadas de todo el lote en una sola consulta (por URL canónica)
+        t0 = time.perf_counter()
+        stored = self.db.get_posts_metrics([post['post_url'] for post in parsed])
+        timings['db'] += time.perf_counter() - t0
 
-                if not post or not post.get('post_url'):
+        for post in parsed:
+            try:
+                self.dedup.remember(post)
+                engagement += (post.get('likes') or 0) + (post.get('comments') or 0) + (post.get('shares') or 0)
+
+                key = canonical_url(post['post_url'])
+                existing = stored.get(key)
+                if existing is not None:
+                    t0 = time.perf_counter()
+                    if existing == metrics_of(post):
+                        unchanged_count += 1
+                    elif self.db.update_post(post):
+                        updated_count += 1
+                        stored[key] = metrics_of(post)
+                    timings['db'] += time.perf_counter() - t0
                     continue
 
-                # Enriquecer con análisis
-                content = post.get('content', '')
-                post['sentiment'] = self.analyze_sentiment(content)
-                post['has_mobilization_call'] = self.detect_mobilization_call(content)
-                post['keywords_matched'] = self.match_keywords(content)
-                post['narratives'] = self.extract_narratives(content)
+                # Enriquecer con análisis (solo posts nuevos)
+                t1 = time.perf_counter()
+                self.enrich_post(post)
+                t2 = time.perf_counter()
+                timings['enrich'] += t2 - t1
 
                 # Guardar en BD
-                if self.db.post_exists(post['post_url']):
-                    if self.db.update_post(post):
-                        updated_count += 1
-                else:
-                    if self.db.insert_post(post):
-                        new_count += 1
+                if self.db.insert_post(post):
+                    new_count += 1
+                    stored[key] = metrics_of(post)
 
-                        # Si tiene convocatoria, registrarla
-                        if post['has_mobilization_call']:
-                            self._register_mobilization(post)
+                    # Si tiene convocatoria, registrarla
+                    if post['has_mobilization_call']:
+                        mobilization_count += 1
+                        self._register_mobilization(post)
+                timings['db'] += time.perf_counter() - t2
 
             except Exception as e:
                 print(f"Error procesando post: {e}")
                 continue
 
+        # Conteos de palabras, narrativas y frases, y firma MinHash de los posts nuevos (una sola vez por post)
+        if new_count:
+            t0 = time.perf_counter()
+            text_stats.index_pending_posts(self.db)
+            near_duplicates.index_pending_posts(self.db)
+            emerging_narratives.index_pending_posts(self.db)
+            timings['db'] += time.perf_counter() - t0
+
         return {
             'new': new_count,
             'updated': updated_count,
-            'total_processed': len(posts)
+            'unchanged': unchanged_count,
+            'duplicates': duplicate_count,
+            'mobilization': mobilization_count,
+            'engagement': engagement,
+            'total_processed': len(posts),
+            'timings': timings
         }
 
     def _register_mobilization(self, post: Dict) -> None:
@@ -228,71 +543,253 @@ class BaseScraper(ABC):
 
         return None
 
+    def _run_task(self, scrape_type: str, target: str, fetch, max_results: int, run_id: str) -> Dict:
+        """Ejecuta una tarea (keyword o cuenta) y la registra en scraping_logs con sus tiempos"""
+        started_at = datetime.now()
+        self.actor_runs = []
+        self.task_error = None
+        status, error_message = None, None
+
+        t0 = time.perf_counter()
+        try:
+            posts = fetch(target, max_results)
+        except Exception as e:
+            status, error_message = 'error', str(e)
+            posts = []
+        fetch_seconds = time.perf_counter() - t0
+
+        # Los fetch_by_* devuelven [] ante errores; la falla real queda en task_error
+        if self.task_error and not posts:
+            status, error_message = self.task_error['status'], self.task_error['message']
+
+        return self._store_task(scrape_type, target, posts, run_id, started_at, fetch_seconds,
+                                self.actor_runs, error_message, status)
+
+    def _store_task(self, scrape_type: str, target: str, posts: List[Dict], run_id: str,
+                    started_at: datetime, fetch_seconds: float, actor_runs: List[Dict],
+                    error_message: str = None, status: str = None) -> Dict:
+        """
+        Procesa los items de una tarea y deja su fila en scraping_logs.
+        status: 'success' (default), 'error' (default si hay error_message), 'skipped'
+        (presupuesto agotado o circuitos abiertos: no se llamó a ningún actor) o 'partial'
+        (lote con items que no se pudieron asignar a su objetivo).
+        """
+        status = status or ('error' if error_message else 'success')
+        result = {'new': 0, 'updated': 0, 'total_processed': 0, 'timings': {}}
+        if error_message:
+            result['error'] = error_message
+            result['status'] = status
+        elif posts:
+            result = self.process_and_store(posts)
+
+        timings = result.get('timings', {})
+        self.db.log_scrape(
+            platform=self.platform,
+            scrape_type=scrape_type,
+            status=status,
+            posts_found=result['new'] + result['updated'],
+            posts_new=result['new'],
+            error_message=error_message,
+            started_at=started_at.isoformat(),
+            completed_at=datetime.now().isoformat(),
+            run_id=run_id,
+            target=target,
+            apify_run_id=",".join(r['apify_run_id'] for r in actor_runs if r.get('apify_run_id')) or None,
+            compute_units=sum(r['compute_units'] for r in actor_runs),
+            items_fetched=len(posts),
+            posts_updated=result['updated'],
+            mobilization_hits=result.get('mobilization', 0),
+            engagement=result.get('engagement', 0),
+            fetch_seconds=fetch_seconds,
+            parse_seconds=timings.get('parse', 0),
+            enrich_seconds=timings.get('enrich', 0),
+            db_seconds=timings.get('db', 0)
+        )
+
+        result['items_fetched'] = len(posts)
+        return result
+
+    def _report_task(self, progress: float, task: Dict, result: Dict, results: Dict) -> None:
+        """Acumula el resultado de una tarea en el resumen de la corrida y lo muestra"""
+        target = task['target']
+        bucket = results['by_keyword'] if task['scrape_type'] == 'keyword' else results['by_account']
+
+        if 'error' in result:
+            label = 'Omitida' if result.get('status') == 'skipped' else 'Error'
+            print(f"   [{progress:5.1f}%] -> {label}: {result['error']}")
+            bucket[target] = {'error': result['error']}
+        elif result['items_fetched']:
+            bucket[target] = result
+            results['totals']['new'] += result['new']
+            results['totals']['updated'] += result['updated']
+            print(f"   [{progress:5.1f}%] -> {result['new']} nuevos, {result['updated']} actualizados")
+        else:
+            print(f"   [{progress:5.1f}%] -> Sin resultados")
+
+    def _run_batched(self, plan: List[Dict], run_id: str, results: Dict, batch_size: int) -> List[Dict]:
+        """
+        Agrupa las tareas del plan por tipo y profundidad (max_results del scheduler) y las
+        pide en corridas de hasta `batch_size` objetivos; cada objetivo queda registrado por
+        separado en scraping_logs.
+        Devuelve las tareas que no se pudieron agrupar (se ejecutan una por una).
+        """
+        remaining = []
+        groups = {}
+        for task in plan:
+            # Misma profundidad por lote: una fuente fría no se pide con el límite de una caliente
+            groups.setdefault((task['scrape_type'], task['max_results']), []).append(task)
+
+        for (scrape_type, _), tasks in groups.items():
+            for start in range(0, len(tasks), batch_size):
+                chunk = tasks[start:start + batch_size]
+                if len(chunk) < 2:
+                    remaining.extend(chunk)
+                    continue
+
+                limits = {task['target']: task['max_results'] for task in chunk}
+                label = 'keywords' if scrape_type == 'keyword' else 'cuentas'
+                print(f"\n   Lote de {len(chunk)} {label}: {', '.join(limits)}")
+
+                started_at = datetime.now()
+                self.actor_runs = []
+                t0 = time.perf_counter()
+                try:
+                    batch = self._fetch_batch(scrape_type, limits)
+                except BudgetExceeded as e:
+                    print(f"   -> Lote omitido: {e}")
+                    for position, task in enumerate(chunk, 1):
+                        result = self._store_task(scrape_type, task['target'], [], run_id, started_at, 0,
+                                                  [], str(e), 'skipped')
+                        self._report_task(position / len(chunk) * 100, task, result, results)
+                    continue
+                except Exception as e:
+                    print(f"   -> Lote fallido ({e}), se piden por separado")
+                    remaining.extend(chunk)
+                    continue
+
+                if batch is None:
+                    remaining.extend(chunk)
+                    continue
+
+                fetch_seconds = time.perf_counter() - t0
+                by_target, unmatched = batch
+                total_items = sum(len(items) for items in by_target.values()) + len(unmatched)
+                print(f"   -> {total_items} items en {fetch_seconds:.1f}s ({len(unmatched)} sin asignar)")
+
+                # Tiempo y compute units de la corrida se prorratean por items
+                shares = [(task['target'], by_target[task['target']]) for task in chunk]
+                if unmatched:
+                    shares.append((None, unmatched))
+
+                for position, (target, items) in enumerate(shares, 1):
+                    share = len(items) / total_items if total_items else 1 / len(shares)
+                    actor_runs = [{**run, 'compute_units': run['compute_units'] * share} for run in self.actor_runs]
+                    # Con items sin asignar, un objetivo sin items puede tener los suyos entre ellos:
+                    # 'partial' no cuenta como corrida sin rendimiento para el scheduler
+                    status = 'partial' if unmatched and (target is None or not items) else 'success'
+                    result = self._store_task(scrape_type, target, items, run_id, started_at,
+                                              fetch_seconds * share, actor_runs, status=status)
+
+                    progress = position / len(shares) * 100
+                    if target is None:
+                        results['totals']['new'] += result['new']
+                        results['totals']['updated'] += result['updated']
+                        print(f"   [{progress:5.1f}%] sin asignar -> {result['new']} nuevos, {result['updated']} actualizados")
+                    else:
+                        print(f"   [{progress:5.1f}%] {target}: {len(items)} items")
+                        self._report_task(progress, {'scrape_type': scrape_type, 'target': target}, result, results)
+
+        return remaining
+
+    async def _run_tasks_async(self, plan: List[Dict], run_id: str, results: Dict,
+                               max_concurrency: int) -> None:
+        """Lanza todas las tareas en paralelo y procesa cada dataset apenas termina su corrida"""
+        backend = AsyncApifyBackend(self, max_concurrency=max_concurrency)
+        completed_tasks = 0
+
+        async for outcome in backend.stream(plan):
+            completed_tasks += 1
+            task = outcome['task']
+            progress = (completed_tasks / len(plan)) * 100
+            label = f"'{task['target']}'" if task['scrape_type'] == 'keyword' else f"@{task['target']}"
+            print(f"   [{progress:5.1f}%] {label}: {len(outcome['items'])} items en {outcome['fetch_seconds']:.1f}s")
+
+            result = self._store_task(task['scrape_type'], task['target'], outcome['items'], run_id,
+                                      outcome['started_at'], outcome['fetch_seconds'],
+                                      outcome['actor_runs'], outcome['error'], outcome['status'])
+            self._report_task(progress, task, result, results)
+
+    @timed('scraper.run')
     def run(self, fetch_by_keywords: bool = True, fetch_by_accounts: bool = True,
-            max_per_keyword: int = 50, max_per_account: int = 20) -> Dict:
-        """Ejecuta el proceso completo de scraping"""
+            max_per_keyword: int = 50, max_per_account: int = 20, run_id: str = None,
+            adaptive: bool = True, concurrent: bool = False, max_concurrency: int = 5,
+            batched: bool = False, batch_size: int = 20) -> Dict:
+        """
+        Ejecuta el proceso completo de scraping.
+        Con adaptive=True el ScrapeScheduler decide qué keywords/cuentas se consultan
+        y con cuántos resultados, según su rendimiento en corridas anteriores.
+        Con concurrent=True las corridas de Apify se lanzan en paralelo (ApifyClientAsync)
+        y cada dataset se procesa apenas termina.
+        Con batched=True las keywords y las cuentas se piden en corridas por lotes
+        (un arranque de actor por lote) y los items se reparten entre sus objetivos.
+        """
+        started_at = datetime.now()
+        run_id = run_id or started_at.strftime('%Y%m%d_%H%M%S')
+        self.budget.run_id = run_id
+        self.dedup.clear()
+        self.parsed_items.clear()
+
         print(f"\n{'='*60}")
         print(f"SCRAPING DE {self.platform.upper()}")
         print(f"{'='*60}")
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]")
+        print(f"[{started_at.strftime('%Y-%m-%d %H:%M:%S')}]")
 
         results = {
             'platform': self.platform,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': started_at.isoformat(),
+            'run_id': run_id,
             'by_keyword': {},
             'by_account': {},
             'totals': {'new': 0, 'updated': 0}
         }
 
-        # Calcular total de tareas para mostrar progreso
-        keywords_to_process = self.keywords[:5] if fetch_by_keywords else []
-        accounts = self.db.get_monitored_accounts(platform=self.platform) if fetch_by_accounts else []
-        total_tasks = len(keywords_to_process) + len(accounts)
-        completed_tasks = 0
-
-        # Búsqueda por palabras clave
-        if fetch_by_keywords:
-            print(f"\n1. Buscando por palabras clave ({len(keywords_to_process)} keywords)...")
-            for i, keyword in enumerate(keywords_to_process):
-                completed_tasks += 1
-                progress = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
-                print(f"   [{progress:5.1f}%] Buscando: '{keyword}'...")
-                try:
-                    posts = self.fetch_by_keyword(keyword, max_per_keyword)
-                    if posts:
-                        result = self.process_and_store(posts)
-                        results['by_keyword'][keyword] = result
-                        results['totals']['new'] += result['new']
-                        results['totals']['updated'] += result['updated']
-                        print(f"   [{progress:5.1f}%] -> {result['new']} nuevos, {result['updated']} actualizados")
-                    else:
-                        print(f"   [{progress:5.1f}%] -> Sin resultados")
-                except Exception as e:
-                    print(f"   [{progress:5.1f}%] -> Error: {e}")
-                    results['by_keyword'][keyword] = {'error': str(e)}
-
-        # Búsqueda por cuentas monitoreadas
-        if fetch_by_accounts:
-            print(f"\n2. Obteniendo posts de cuentas monitoreadas ({len(accounts)} cuentas)...")
-
-            for account in accounts:
-                completed_tasks += 1
-                progress = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
-                username = account['username']
-                print(f"   [{progress:5.1f}%] Cuenta: @{username}...")
-                try:
-                    posts = self.fetch_by_account(username, max_per_account)
-                    if posts:
-                        result = self.process_and_store(posts)
-                        results['by_account'][username] = result
-                        results['totals']['new'] += result['new']
-                        results['totals']['updated'] += result['updated']
-                        print(f"   [{progress:5.1f}%] -> {result['new']} nuevos, {result['updated']} actualizados")
-                    else:
-                        print(f"   [{progress:5.1f}%] -> Sin resultados")
-                except Exception as e:
-                    print(f"   [{progress:5.1f}%] -> Error: {e}")
-                    results['by_account'][username] = {'error': str(e)}
+        # Planificar tareas (keyword/cuenta y cantidad de resultados)
+        keywords = self.keywords if fetch_by_keywords else []
+        accounts = [account['username'] for account in self.db.get_monitored_accounts(platform=self.platform)] \
+            if fetch_by_accounts else []
+
+        if adaptive:
+            plan = ScrapeScheduler(self.db, self.platform).plan(keywords, accounts, max_per_keyword, max_per_account)
+            skipped = len(keywords) + len(accounts) - len(plan)
+            print(f"\nPlan adaptativo: {len(plan)} tareas ({skipped} fuentes pospuestas)")
+        else:
+            plan = (
+                [{'scrape_type': 'keyword', 'target': keyword, 'max_results': max_per_keyword}
+                 for keyword in keywords[:5]] +
+                [{'scrape_type': 'account', 'target': account, 'max_results': max_per_account}
+                 for account in accounts]
+            )
+
+        if batched and plan:
+            plan = self._run_batched(plan, run_id, results, batch_size)
+
+        fetchers = {'keyword': self.fetch_by_keyword, 'account': self.fetch_by_account}
+        total_tasks = len(plan)
+
+        if concurrent and plan:
+            print(f"\nLanzando {total_tasks} corridas en paralelo (máx. {max_concurrency} simultáneas)...")
+            asyncio.run(self._run_tasks_async(plan, run_id, results, max_concurrency))
+            plan = []
+
+        for completed_tasks, task in enumerate(plan, 1):
+            scrape_type, target = task['scrape_type'], task['target']
+            progress = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
+            label = f"Buscando: '{target}'" if scrape_type == 'keyword' else f"Cuenta: @{target}"
+            detail = f" ({task['max_results']} máx, {task['reason']})" if 'reason' in task else ""
+            print(f"   [{progress:5.1f}%] {label}{detail}...")
+
+            result = self._run_task(scrape_type, target, fetchers[scrape_type], task['max_results'], run_id)
+            self._report_task(progress, task, result, results)
 
         # Log del scraping
         self.db.log_scrape(
@@ -300,13 +797,18 @@ class BaseScraper(ABC):
             scrape_type='full',
             status='success',
             posts_found=results['totals']['new'] + results['totals']['updated'],
-            posts_new=results['totals']['new']
+            posts_new=results['totals']['new'],
+            started_at=started_at.isoformat(),
+            completed_at=datetime.now().isoformat(),
+            run_id=run_id,
+            posts_updated=results['totals']['updated']
         )
 
         print(f"\n{'='*60}")
         print(f"RESUMEN {self.platform.upper()}:")
         print(f"  Posts nuevos: {results['totals']['new']}")
         print(f"  Posts actualizados: {results['totals']['updated']}")
+        print(f"  Repetidos omitidos: {self.dedup.hits}")
         print(f"{'='*60}\n")
 
         return results
@@ -0,0 +1,138 @@
+"""
+Presupuesto de Apify - Estima el costo de cada llamada a un actor según el
+historial de apify_calls y aplica topes diarios, mensuales y por corrida
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+# Campos de run_input que fijan la cantidad de resultados de cada actor
+LIMIT_FIELDS = ['resultsLimit', 'maxTweets', 'maxItems', 'resultsPerPage', 'maxComments']
+
+# Costos de referencia cuando el actor todavía no tiene historial (USD)
+DEFAULT_COST_PER_ITEM = 0.0005
+DEFAULT_COST_PER_CALL = 0.005
+
+# Precio de una compute unit, para corridas que no informan usageTotalUsd
+DEFAULT_CU_PRICE = 0.4
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        print(f"Valor inválido para {name}: {value}")
+        return None
+
+
+class BudgetExceeded(Exception):
+    """La llamada al actor no entra en el presupuesto disponible"""
+    pass
+
+
+class ApifyBudget:
+    """
+    Controla el gasto en Apify de un scraper.
+    Topes (USD) configurables por variables de entorno:
+      APIFY_MONTHLY_BUDGET_USD, APIFY_DAILY_BUDGET_USD, APIFY_RUN_BUDGET_USD.
+    Si no se define el tope diario se usa el mensual / 30. Sin topes solo se registra el gasto.
+    """
+
+    def __init__(self, db, platform: str, min_items: int = 5, history_days: int = 30):
+        self.db = db
+        self.platform = platform
+        self.min_items = min_items
+        self.history_days = history_days
+        self.run_id = None
+
+        # Costo estimado de llamadas aprobadas que todavía no terminaron (modo async)
+        self.pending = 0.0
+
+        self.monthly_cap = _env_float('APIFY_MONTHLY_BUDGET_USD')
+        self.daily_cap = _env_float('APIFY_DAILY_BUDGET_USD')
+        if self.daily_cap is None and self.monthly_cap is not None:
+            self.daily_cap = self.monthly_cap / 30
+        self.run_cap = _env_float('APIFY_RUN_BUDGET_USD')
+        self.cu_price = _env_float('APIFY_CU_PRICE_USD') or DEFAULT_CU_PRICE
+
+    def estimate_cost(self, actor_id: str, items: int) -> float:
+        """Costo estimado (USD) de pedir `items` resultados a un actor"""
+        per_item, per_call = self._cost_model(actor_id)
+        return per_call + per_item * items
+
+    def _cost_model(self, actor_id: str) -> tuple:
+        history = self.db.get_actor_cost_history(actor_id, days=self.history_days)
+        if not history['calls'] or not history['usage_usd']:
+            return DEFAULT_COST_PER_ITEM, DEFAULT_COST_PER_CALL
+
+        # Costo fijo por llamada ~ la llamada más barata; el resto se reparte por item
+        per_call = history['min_call_usd']
+        variable = max(history['usage_usd'] - per_call * history['calls'], 0)
+        per_item = variable / history['items'] if history['items'] else DEFAULT_COST_PER_ITEM
+        return per_item, per_call
+
+    def remaining(self) -> Optional[float]:
+        """Presupuesto restante (USD) según el tope más restrictivo; None si no hay topes"""
+        now = datetime.now()
+        limits = []
+
+        if self.daily_cap is not None:
+            today = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            limits.append(self.daily_cap - self.db.get_apify_spend(since=today))
+        if self.monthly_cap is not None:
+            month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
+            limits.append(self.monthly_cap - self.db.get_apify_spend(since=month))
+        if self.run_cap is not None and self.run_id:
+            limits.append(self.run_cap - self.db.get_apify_spend(run_id=self.run_id))
+
+        return min(limits) - self.pending if limits else None
+
+    def approve(self, actor_id: str, requested_items: int) -> int:
+        """
+        Devuelve cuántos items se pueden pedir sin superar el presupuesto.
+        Reduce el pedido si no entra completo; lanza BudgetExceeded si ni el mínimo entra.
+        """
+        remaining = self.remaining()
+        if remaining is None or self.estimate_cost(actor_id, requested_items) <= remaining:
+            return requested_items
+
+        per_item, per_call = self._cost_model(actor_id)
+        affordable = int((remaining - per_call) / per_item) if per_item else 0
+        if affordable < min(self.min_items, requested_items):
+            raise BudgetExceeded(
+                f"presupuesto agotado (restan ${max(remaining, 0):.3f}, "
+                f"estimado ${self.estimate_cost(actor_id, requested_items):.3f})"
+            )
+        return min(affordable, requested_items)
+
+    def reserve(self, actor_id: str, items: int) -> float:
+        """Reserva el costo estimado de una llamada en curso; devuelve el monto reservado"""
+        amount = self.estimate_cost(actor_id, items)
+        self.pending += amount
+        return amount
+
+    def run_cost(self, run: Dict) -> float:
+        """Costo real de una corrida de Apify (usageTotalUsd o compute units * precio)"""
+        usage = run.get('usageTotalUsd')
+        if usage:
+            return usage
+        return ((run.get('stats') or {}).get('computeUnits') or 0) * self.cu_price
+
+    def record(self, actor_id: str, status: str, requested_items: int = 0,
+               run: Dict = None, items: int = 0, reserved: float = 0) -> None:
+        """Registra la llamada en apify_calls y libera lo reservado"""
+        self.pending = max(self.pending - reserved, 0.0)
+        run = run or {}
+        self.db.log_apify_call(
+            platform=self.platform,
+            actor_id=actor_id,
+            status=status,
+            requested_items=requested_items,
+            items=items,
+            compute_units=(run.get('stats') or {}).get('computeUnits') or 0,
+            usage_usd=self.run_cost(run) if run else 0,
+            apify_run_id=run.get('id'),
+            run_id=self.run_id
+        )
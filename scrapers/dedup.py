@@ -0,0 +1,74 @@
+"""
+Deduplicación por corrida - El mismo post aparece bajo varias keywords y cuentas
+en una misma corrida; esta caché evita volver a enriquecerlo y escribirlo
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import canonical_url
+
+METRIC_FIELDS = ('likes', 'comments', 'shares', 'views')
+
+# Campos de los items crudos que dependen de la búsqueda o perfil consultado, no del post
+REQUEST_FIELDS = {'inputUrl', 'facebookUrl', 'searchQuery', 'searchTerm', 'input', 'query'}
+
+
+def content_hash(post: Dict) -> str:
+    return hashlib.md5((post.get('content') or '').encode('utf-8')).hexdigest()
+
+
+def metrics_of(post: Dict) -> tuple:
+    return tuple(int(post.get(field) or 0) for field in METRIC_FIELDS)
+
+
+def raw_hash(raw_data: Dict) -> str:
+    """Hash del item crudo del actor, sin los campos que solo indican qué búsqueda lo trajo"""
+    fields = {key: value for key, value in raw_data.items() if key not in REQUEST_FIELDS}
+    return hashlib.md5(json.dumps(fields, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class RunDedupCache:
+    """
+    Posts vistos en la corrida: URL canónica -> (hash del contenido, métricas), y clave
+    del item crudo -> hash del item, para descartar repetidos antes de parsearlos
+    """
+
+    def __init__(self):
+        self.seen: Dict[str, tuple] = {}
+        self.raw_seen: Dict[str, str] = {}
+        self.hits = 0
+
+    def is_raw_duplicate(self, key: Optional[str], raw_data: Dict) -> bool:
+        """True si el actor ya devolvió en esta corrida el mismo item (sin parsearlo)"""
+        if key and self.raw_seen.get(key) == raw_hash(raw_data):
+            self.hits += 1
+            return True
+        return False
+
+    def remember_raw(self, key: Optional[str], raw_data: Dict) -> None:
+        if key:
+            self.raw_seen[key] = raw_hash(raw_data)
+
+    def lookup(self, post: Dict) -> Optional[tuple]:
+        return self.seen.get(canonical_url(post.get('post_url')))
+
+    def is_duplicate(self, post: Dict) -> bool:
+        """True si el post ya se procesó en esta corrida con el mismo contenido y métricas"""
+        previous = self.lookup(post)
+        if previous is not None and previous == (content_hash(post), metrics_of(post)):
+            self.hits += 1
+            return True
+        return False
+
+    def remember(self, post: Dict) -> None:
+        self.seen[canonical_url(post.get('post_url'))] = (content_hash(post), metrics_of(post))
+
+    def clear(self) -> None:
+        self.seen.clear()
+        self.raw_seen.clear()
+        self.hits = 0
@@ -18,6 +18,22 @@ class FacebookScraper(BaseScraper):
         # Actor de Apify para Facebook (probado y funciona)
         self.posts_actor = "apify/facebook-posts-scraper"
 
+        # resultsLimit se aplica a cada página de startUrls
+        self.actors.register('profile', self.posts_actor, lambda usernames, n: {
+            "startUrls": [{"url": self._page_url(username)} for username in usernames],
+            "resultsLimit": n,
+        }, batch_limit='per_target')
+
+    def _page_url(self, username: str) -> str:
+        """Para Facebook, el username puede ser una URL o el nombre de la página"""
+        if not username.startswith('http'):
+            return f"https://www.facebook.com/{username}"
+        return username
+
+    def item_source(self, raw_data: Dict) -> str:
+        """Página consultada (URL de startUrls)"""
+        return raw_data.get('inputUrl') or raw_data.get('facebookUrl')
+
     def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
         """Facebook no soporta búsqueda por keyword, retorna lista vacía"""
         # Facebook search requiere autenticación, usamos solo scraping de páginas
@@ -26,26 +42,10 @@ class FacebookScraper(BaseScraper):
 
     def fetch_by_account(self, username: str, max_results: int = 20) -> List[Dict]:
         """Obtiene publicaciones de una página de Facebook"""
-
-        # Para Facebook, el username puede ser una URL o el nombre de la página
-        if not username.startswith('http'):
-            page_url = f"https://www.facebook.com/{username}"
-        else:
-            page_url = username
-
-        run_input = {
-            "startUrls": [{"url": page_url}],
-            "resultsLimit": max_results,
-        }
-
         try:
             print(f"      Ejecutando Apify actor para página: {username}")
 
-            run = self.client.actor(self.posts_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
+            posts = self._call_with_failover('profile', username, max_results)
 
             print(f"      -> Obtenidos {len(posts)} posts")
             return posts
@@ -63,12 +63,8 @@ class FacebookScraper(BaseScraper):
         }
 
         try:
-            run = self.client.actor(self.posts_actor).call(run_input=run_input)
-
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                return item
-
-            return {}
+            items = self._call_actor(self.posts_actor, run_input)
+            return items[0] if items else {}
 
         except Exception as e:
             print(f"Error obteniendo detalles del post: {e}")
@@ -21,26 +21,32 @@ class InstagramScraper(BaseScraper):
         self.hashtag_actor = "shu8hern/instagram-scraper"
         self.post_actor = "shu8hern/instagram-scraper"
 
-    def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
-        """Busca publicaciones por hashtag/palabra clave en Instagram"""
+        # resultsLimit se aplica a cada hashtag/usuario de la lista
+        self.actors.register('search', self.hashtag_actor, lambda keywords, n: {
+            "hashtags": [self._hashtag(keyword) for keyword in keywords],
+            "resultsLimit": n,
+            "searchType": "hashtag",
+        }, batch_limit='per_target')
+        # Filtrar errores: el actor deja items de error para perfiles privados o inexistentes
+        self.actors.register('profile', self.profile_actor, lambda usernames, n: {
+            "username": [username.replace("@", "") for username in usernames],
+            "resultsLimit": n,
+        }, skip_errors=True, batch_limit='per_target')
 
-        # Convertir keyword a hashtag format
-        hashtag = keyword.replace(" ", "").replace("#", "").lower()
+    def _hashtag(self, keyword: str) -> str:
+        """Convierte una keyword a formato hashtag"""
+        return keyword.replace(" ", "").replace("#", "").lower()
 
-        run_input = {
-            "hashtags": [hashtag],
-            "resultsLimit": max_results,
-            "searchType": "hashtag",
-        }
+    def item_source(self, raw_data: Dict) -> str:
+        """El actor informa la URL del hashtag o perfil consultado en inputUrl"""
+        return raw_data.get('inputUrl')
 
+    def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
+        """Busca publicaciones por hashtag/palabra clave en Instagram"""
         try:
-            print(f"      Ejecutando Apify actor para hashtag: #{hashtag}")
+            print(f"      Ejecutando Apify actor para hashtag: #{self._hashtag(keyword)}")
 
-            run = self.client.actor(self.hashtag_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
+            posts = self._call_with_failover('search', keyword, max_results)
 
             print(f"      -> Obtenidos {len(posts)} posts")
             return posts
@@ -55,22 +61,10 @@ class InstagramScraper(BaseScraper):
         # Limpiar username
         username = username.replace("@", "")
 
-        run_input = {
-            "username": [username],
-            "resultsLimit": max_results,
-        }
-
         try:
             print(f"      Ejecutando Apify actor para usuario: @{username}")
 
-            run = self.client.actor(self.profile_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                # Filtrar errores
-                if item.get('error'):
-                    continue
-                posts.append(item)
+            posts = self._call_with_failover('profile', username, max_results)
 
             print(f"      -> Obtenidos {len(posts)} posts")
             return posts
@@ -88,12 +82,8 @@ class InstagramScraper(BaseScraper):
         }
 
         try:
-            run = self.client.actor(self.post_actor).call(run_input=run_input)
-
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                return item
-
-            return {}
+            items = self._call_actor(self.post_actor, run_input)
+            return items[0] if items else {}
 
         except Exception as e:
             print(f"Error obteniendo detalles del post: {e}")
@@ -0,0 +1,146 @@
+"""
+Scheduler adaptativo - Reparte el presupuesto de resultados de una corrida
+entre keywords y cuentas según su rendimiento en scraping_logs
+"""
+
+from datetime import datetime
+from typing import List, Dict, Optional
+
+
+class ScrapeScheduler:
+    """Planifica qué fuentes scrapear y con qué profundidad en cada corrida"""
+
+    def __init__(self, db, platform: str, history_days: int = 14, keyword_slots: int = 5,
+                 min_results: int = 5, max_depth_factor: float = 2.0,
+                 mobilization_weight: float = 3.0, cold_factor: float = 0.25,
+                 cold_interval_hours: int = 24, dead_after_runs: int = 3,
+                 dead_interval_hours: int = 72):
+        self.db = db
+        self.platform = platform
+        self.history_days = history_days
+        # Cantidad de keywords a profundidad completa que cubre el presupuesto
+        # (equivale al antiguo keywords[:5] cuando no hay historial)
+        self.keyword_slots = keyword_slots
+        self.min_results = min_results
+        self.max_depth_factor = max_depth_factor
+        self.mobilization_weight = mobilization_weight
+        self.cold_factor = cold_factor
+        self.cold_interval_hours = cold_interval_hours
+        self.dead_after_runs = dead_after_runs
+        self.dead_interval_hours = dead_interval_hours
+
+    def score_source(self, stats: Dict) -> float:
+        """Puntaje de una fuente: posts nuevos y convocatorias por corrida, ajustado por crecimiento de engagement"""
+        runs = stats.get('runs') or 0
+        if not runs:
+            return 0.0
+
+        new_per_run = (stats.get('posts_new') or 0) / runs
+        mobilization_per_run = (stats.get('mobilization_hits') or 0) / runs
+
+        recent = stats.get('recent_engagement')
+        prior = stats.get('prior_engagement')
+        growth = 0.0
+        if recent is not None and prior:
+            growth = min(max(recent / prior - 1, 0.0), 3.0)
+
+        return new_per_run * (1 + growth) + self.mobilization_weight * mobilization_per_run
+
+    def is_dead(self, stats: Optional[Dict]) -> bool:
+        """Fuente que no produjo nada nuevo en sus últimas corridas completas (sin errores ni omisiones)"""
+        return bool(stats) and stats['runs'] >= self.dead_after_runs and \
+            not (stats.get('posts_new') or stats.get('mobilization_hits'))
+
+    def _hours_since(self, timestamp: Optional[str], now: datetime) -> float:
+        if not timestamp:
+            return float('inf')
+        try:
+            return (now - datetime.fromisoformat(timestamp)).total_seconds() / 3600
+        except ValueError:
+            return float('inf')
+
+    def plan(self, keywords: List[str], accounts: List[str],
+             max_per_keyword: int = 50, max_per_account: int = 20) -> List[Dict]:
+        """
+        Devuelve la lista ordenada de tareas de la corrida.
+        Cada tarea: scrape_type, target, max_results, score, reason.
+        """
+        now = datetime.now()
+        history = self.db.get_source_yield(self.platform, days=self.history_days)
+
+        # Orden base (desempate): las primeras keywords, las cuentas y luego el resto de keywords
+        candidates = (
+            [('keyword', keyword, max_per_keyword) for keyword in keywords[:self.keyword_slots]] +
+            [('account', account, max_per_account) for account in accounts] +
+            [('keyword', keyword, max_per_keyword) for keyword in keywords[self.keyword_slots:]]
+        )
+        if not candidates:
+            return []
+
+        budget = min(len(keywords), self.keyword_slots) * max_per_keyword + len(accounts) * max_per_account
+
+        scores = {
+            (scrape_type, target): self.score_source(history[(scrape_type, target)])
+            for scrape_type, target, _ in candidates if (scrape_type, target) in history
+        }
+        known = [score for score in scores.values() if score > 0]
+        mean_score = sum(known) / len(known) if known else 0.0
+
+        scored = []
+        for order, (scrape_type, target, base_results) in enumerate(candidates):
+            stats = history.get((scrape_type, target))
+
+            if stats is None or not stats['runs']:
+                # Fuente sin historial (o solo con corridas fallidas/omitidas): profundidad normal
+                factor, reason = 1.0, 'nueva'
+            elif self.is_dead(stats):
+                if self._hours_since(stats['last_run_at'], now) < self.dead_interval_hours:
+                    continue
+                factor, reason = 0.0, 'inactiva'
+            elif mean_score:
+                factor = min(scores[(scrape_type, target)] / mean_score, self.max_depth_factor)
+                reason = 'caliente' if factor >= 1 else 'normal'
+                if factor < self.cold_factor:
+                    if self._hours_since(stats['last_run_at'], now) < self.cold_interval_hours:
+                        continue
+                    reason = 'fria'
+            else:
+                factor, reason = 1.0, 'normal'
+
+            max_results = max(self.min_results, int(round(base_results * factor)))
+            scored.append((factor, order, scrape_type, target, base_results, max_results, reason))
+
+        # Las fuentes más calientes primero; a igual puntaje se respeta el orden original
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        tasks = []
+        remaining = budget
+        for factor, _, scrape_type, target, base_results, max_results, reason in scored:
+            if remaining < self.min_results:
+                break
+            max_results = min(max_results, remaining)
+            remaining -= max_results
+            tasks.append({
+                'scrape_type': scrape_type,
+                'target': target,
+                'max_results': max_results,
+                'max_depth': int(base_results * self.max_depth_factor),
+                'score': round(factor, 2),
+                'reason': reason,
+            })
+
+        # El presupuesto que liberan las fuentes frías/inactivas profundiza las calientes
+        for task in tasks:
+            if remaining <= 0:
+                break
+            if task['reason'] != 'caliente':
+                continue
+            extra = min(remaining, task['max_depth'] - task['max_results'])
+            if extra > 0:
+                task['max_results'] += extra
+                remaining -= extra
+
+        for task in tasks:
+            del task['max_depth']
+
+        return tasks
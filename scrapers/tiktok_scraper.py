@@ -20,26 +20,37 @@ class TikTokScraper(BaseScraper):
         self.comments_actor = "clockworks/tiktok-comments-scraper"
         self.search_actor = "clockworks/tiktok-search-scraper"
 
-    def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
-        """Busca videos por palabra clave en TikTok"""
-
-        # Usar el scraper principal con searchQueries
-        run_input = {
-            "searchQueries": [keyword],
-            "resultsPerPage": max_results,
+        # Se usa el scraper principal, que soporta búsquedas y perfiles
+        # (resultsPerPage se aplica a cada búsqueda/perfil de la lista)
+        self.actors.register('search', self.scraper_actor, lambda keywords, n: {
+            "searchQueries": list(keywords),
+            "resultsPerPage": n,
             "shouldDownloadVideos": False,
             "shouldDownloadCovers": False,
-        }
+        }, batch_limit='per_target')
+        self.actors.register('profile', self.scraper_actor, lambda usernames, n: {
+            "profiles": [self._profile_url(username) for username in usernames],
+            "resultsPerPage": n,
+            "shouldDownloadVideos": False,
+            "shouldDownloadCovers": False,
+        }, batch_limit='per_target')
 
+    def _profile_url(self, username: str) -> str:
+        """Construye la URL del perfil"""
+        if not username.startswith('@'):
+            username = f"@{username}"
+        return f"https://www.tiktok.com/{username}"
+
+    def item_source(self, raw_data: Dict) -> str:
+        """Búsqueda o perfil que originó el video"""
+        return raw_data.get('searchQuery') or raw_data.get('input')
+
+    def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
+        """Busca videos por palabra clave en TikTok"""
         try:
             print(f"      Ejecutando Apify actor para búsqueda: '{keyword}'")
 
-            # Usar el scraper principal que soporta búsquedas
-            run = self.client.actor(self.scraper_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
+            posts = self._call_with_failover('search', keyword, max_results)
 
             print(f"      -> Obtenidos {len(posts)} videos")
             return posts
@@ -50,28 +61,10 @@ class TikTokScraper(BaseScraper):
 
     def fetch_by_account(self, username: str, max_results: int = 20) -> List[Dict]:
         """Obtiene videos de un usuario de TikTok"""
-
-        # Construir URL del perfil
-        if not username.startswith('@'):
-            username = f"@{username}"
-
-        profile_url = f"https://www.tiktok.com/{username}"
-
-        run_input = {
-            "profiles": [profile_url],
-            "resultsPerPage": max_results,
-            "shouldDownloadVideos": False,
-            "shouldDownloadCovers": False,
-        }
-
         try:
             print(f"      Ejecutando Apify actor para usuario: {username}")
 
-            run = self.client.actor(self.scraper_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
+            posts = self._call_with_failover('profile', username, max_results)
 
             print(f"      -> Obtenidos {len(posts)} videos")
             return posts
@@ -90,12 +83,8 @@ class TikTokScraper(BaseScraper):
         }
 
         try:
-            run = self.client.actor(self.scraper_actor).call(run_input=run_input)
-
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                return item
-
-            return {}
+            items = self._call_actor(self.scraper_actor, run_input)
+            return items[0] if items else {}
 
         except Exception as e:
             print(f"Error obteniendo detalles del video: {e}")
@@ -110,11 +99,7 @@ class TikTokScraper(BaseScraper):
         }
 
         try:
-            run = self.client.actor(self.comments_actor).call(run_input=run_input)
-
-            comments = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                comments.append(item)
+            comments = self._call_actor(self.comments_actor, run_input)
 
             return comments
 
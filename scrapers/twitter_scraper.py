@@ -6,6 +6,7 @@ from apify_client import ApifyClient
 from datetime import datetime
 from typing import List, Dict
 from .base_scraper import BaseScraper
+from .budget import BudgetExceeded
 
 
 class TwitterScraper(BaseScraper):
@@ -24,55 +25,49 @@ class TwitterScraper(BaseScraper):
         self.alt_search_actor = "quacker/twitter-scraper"
         self.alt_profile_actor = "microworlds/twitter-scraper"
 
-    def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
-        """Busca tweets por palabra clave"""
-
-        # Agregar filtro de ubicación si es sobre Mendoza
-        search_query = keyword
-        if "mendoza" not in keyword.lower():
-            search_query = f"{keyword} Mendoza"
-
-        run_input = {
-            "searchTerms": [search_query],
-            "maxTweets": max_results,
+        # Orden de preferencia; el circuit breaker saltea los que vienen fallando
+        # (maxTweets/maxItems son totales de la corrida)
+        self.actors.register('search', self.search_actor, lambda keywords, n: {
+            "searchTerms": [self._search_query(keyword) for keyword in keywords],
+            "maxTweets": n,
             "sort": "Latest",  # Tweets más recientes
             "tweetLanguage": "es",
-        }
+        }, batch_limit='total')
+        self.actors.register('search', self.alt_search_actor, lambda keywords, n: {
+            "searchTerms": [self._search_query(keyword) for keyword in keywords],
+            "maxItems": n,
+            "sort": "Latest",
+        }, batch_limit='total')
+        self.actors.register('profile', self.profile_actor, lambda usernames, n: {
+            "handle": [username.replace("@", "") for username in usernames],
+            "maxTweets": n,
+            "mode": "user",
+        }, batch_limit='total')
+        self.actors.register('profile', self.alt_profile_actor, lambda usernames, n: {
+            "searchTerms": [f"from:{username.replace('@', '')}" for username in usernames],
+            "maxItems": n,
+            "sort": "Latest",
+        }, batch_limit='total')
 
-        try:
-            print(f"      Ejecutando Apify actor para búsqueda: '{search_query}'")
+    def _search_query(self, keyword: str) -> str:
+        """Agrega filtro de ubicación si la búsqueda no menciona Mendoza"""
+        if "mendoza" not in keyword.lower():
+            return f"{keyword} Mendoza"
+        return keyword
 
-            run = self.client.actor(self.search_actor).call(run_input=run_input)
+    def fetch_by_keyword(self, keyword: str, max_results: int = 50) -> List[Dict]:
+        """Busca tweets por palabra clave"""
+        try:
+            print(f"      Ejecutando Apify actor para búsqueda: '{self._search_query(keyword)}'")
 
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
+            posts = self._call_with_failover('search', keyword, max_results)
 
             print(f"      -> Obtenidos {len(posts)} tweets")
             return posts
 
-        except Exception as e:
-            print(f"      -> Error en actor principal, intentando alternativo...")
-            return self._fetch_by_keyword_alt(search_query, max_results)
-
-    def _fetch_by_keyword_alt(self, keyword: str, max_results: int) -> List[Dict]:
-        """Búsqueda alternativa si el actor principal falla"""
-
-        run_input = {
-            "searchTerms": [keyword],
-            "maxItems": max_results,
-            "sort": "Latest",
-        }
-
-        try:
-            run = self.client.actor(self.alt_search_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
-
-            print(f"      -> Obtenidos {len(posts)} tweets (actor alternativo)")
-            return posts
+        except BudgetExceeded as e:
+            print(f"      -> Búsqueda omitida: {e}")
+            return []
 
         except Exception as e:
             print(f"      -> Error en Apify: {e}")
@@ -84,20 +79,10 @@ class TwitterScraper(BaseScraper):
         # Limpiar username
         username = username.replace("@", "")
 
-        run_input = {
-            "handle": [username],
-            "maxTweets": max_results,
-            "mode": "user",
-        }
-
         try:
             print(f"      Ejecutando Apify actor para usuario: @{username}")
 
-            run = self.client.actor(self.profile_actor).call(run_input=run_input)
-
-            posts = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                posts.append(item)
+            posts = self._call_with_failover('profile', username, max_results)
 
             print(f"      -> Obtenidos {len(posts)} tweets")
             return posts
@@ -0,0 +1,138 @@
+"""
+Exportación e importación de deltas: una base reconstruida desde los archivos
+queda igual a la original, incluidos borrados, BLOBs y cargas parciales previas
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import delta_store
+from database import SocialDatabase
+
+
+class DeltaStoreRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.deltas_dir = os.path.join(self.tmpdir.name, 'deltas')
+        self.source = SocialDatabase(os.path.join(self.tmpdir.name, 'source.db'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _fresh_db(self, name: str) -> SocialDatabase:
+        return SocialDatabase(os.path.join(self.tmpdir.name, name))
+
+    def _insert_posts(self, count: int) -> None:
+        for i in range(count):
+            self.source.insert_post({
+                'platform': 'twitter',
+                'post_id': f'p{i}',
+                'post_url': f'https://x.com/cuenta/status/{i}',
+                'author_username': 'cuenta',
+                'content': f'Post {i} sobre la mina',
+                'likes': i,
+                'comments': 1,
+                'shares': 0,
+                'post_date': datetime.now().isoformat(),
+            })
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        conn = sqlite3.connect(self.source.db_path)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def _age_partition(self, days: int) -> None:
+        """Mueve la partición de hoy a una fecha anterior (exportación de hace `days` días)"""
+        today = os.path.join(self.deltas_dir, datetime.now().strftime('%Y-%m-%d'))
+        older = os.path.join(self.deltas_dir, (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'))
+        os.rename(today, older)
+
+    def _dump(self, db: SocialDatabase) -> dict:
+        conn = sqlite3.connect(db.db_path)
+        rows = {
+            table: sorted(conn.execute(f"SELECT {', '.join(meta['columns'])} FROM {table}").fetchall(), key=repr)
+            for table, meta in delta_store._tables(conn).items()
+        }
+        conn.close()
+        return rows
+
+    def test_export_then_import_rebuilds_same_rows(self):
+        self._insert_posts(5)
+        self.source.add_keyword('uranio', 'mineria')
+        self.source.record_youtube_viewers('live0', 120, 'Sesión')
+
+        exported = delta_store.export_deltas(self.source, self.deltas_dir)
+        target = self._fresh_db('target.db')
+        imported = delta_store.import_deltas(target, self.deltas_dir)
+
+        self.assertEqual(exported['posts'], 5)
+        self.assertEqual(imported['posts'], 5)
+        self.assertEqual(self._dump(target), self._dump(self.source))
+        self.assertEqual(delta_store.export_deltas(self.source, self.deltas_dir), {})
+
+    def test_deleted_rows_are_deleted_on_import(self):
+        self._insert_posts(3)
+        delta_store.export_deltas(self.source, self.deltas_dir)
+        self._age_partition(1)
+
+        self._execute("DELETE FROM posts WHERE post_id = 'p1'")
+        exported = delta_store.export_deltas(self.source, self.deltas_dir)
+
+        target = self._fresh_db('target.db')
+        delta_store.import_deltas(target, self.deltas_dir)
+
+        self.assertEqual(exported['posts'], 1)
+        self.assertEqual(target.get_post_count(), 2)
+        self.assertEqual(self._dump(target), self._dump(self.source))
+
+    def test_older_partitions_replay_before_newer_ones(self):
+        self._insert_posts(3)
+        delta_store.export_deltas(self.source, self.deltas_dir)
+        self._age_partition(10)
+
+        self._execute("UPDATE posts SET likes = 99 WHERE post_id = 'p0'")
+        self._execute("DELETE FROM posts WHERE post_id = 'p2'")
+        delta_store.export_deltas(self.source, self.deltas_dir)
+
+        # Primero solo las particiones recientes, después la carga completa
+        target = self._fresh_db('target.db')
+        delta_store.import_deltas(target, self.deltas_dir, since_days=3)
+        delta_store.import_deltas(target, self.deltas_dir)
+
+        conn = sqlite3.connect(target.db_path)
+        likes = dict(conn.execute('SELECT post_id, likes FROM posts').fetchall())
+        conn.close()
+
+        self.assertEqual(likes, {'p0': 99, 'p1': 1})
+        self.assertEqual(self._dump(target), self._dump(self.source))
+
+    def test_blob_columns_round_trip_through_base64(self):
+        report = {
+            'period': {'start': '2026-10-05', 'end': '2026-10-19'},
+            'summary': {'total_posts': 2, 'total_interactions': 7},
+            'narratives': {'agua': 3},
+        }
+        snapshot_id = self.source.save_report_snapshot(report, 14, 'v1')
+
+        delta_store.export_deltas(self.source, self.deltas_dir)
+        target = self._fresh_db('target.db')
+        delta_store.import_deltas(target, self.deltas_dir)
+
+        conn = sqlite3.connect(target.db_path)
+        data = conn.execute('SELECT report_data FROM reports WHERE id = ?', (snapshot_id,)).fetchone()[0]
+        conn.close()
+
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(target.get_report_snapshot(snapshot_id), self.source.get_report_snapshot(snapshot_id))
+        self.assertEqual(self._dump(target), self._dump(self.source))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Agregados e histórico de viewers de YouTube: los registros anteriores a los
+agregados no se pierden al compactar
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SocialDatabase
+
+
+class YoutubeViewersCompactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = SocialDatabase(os.path.join(self.tmpdir.name, 'test.db'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _insert_legacy_samples(self, video_id: str, counts: list, days_ago: int) -> None:
+        """Registros escritos antes de existir los agregados (sin pasar por record_youtube_viewers)"""
+        conn = sqlite3.connect(self.db.db_path)
+        conn.executemany('''
+            INSERT INTO youtube_viewers_history (video_id, viewers_count, recorded_at)
+            VALUES (?, ?, datetime('now', ?, ?))
+        ''', [(video_id, count, f'-{days_ago} days', f'+{i} minutes') for i, count in enumerate(counts)])
+        conn.commit()
+        conn.close()
+
+    def _hour_samples(self, video_id: str) -> int:
+        conn = sqlite3.connect(self.db.db_path)
+        samples = conn.execute('''
+            SELECT COALESCE(SUM(samples), 0) FROM youtube_viewers_rollup
+            WHERE video_id = ? AND resolution = 'hour'
+        ''', (video_id,)).fetchone()[0]
+        conn.close()
+        return samples
+
+    def test_legacy_samples_survive_new_sample_and_compaction(self):
+        self._insert_legacy_samples('live0', [100 + i for i in range(10)], days_ago=5)
+        self.db.record_youtube_viewers('live0', 500, 'Sesión')
+
+        result = self.db.compact_youtube_viewers()
+        stats = self.db.get_youtube_viewers_stats('live0')
+
+        self.assertEqual(result['raw_deleted'], 10)
+        self.assertEqual(self._hour_samples('live0'), 11)
+        self.assertEqual(stats['total_records'], 11)
+        self.assertEqual(stats['min_viewers'], 100)
+        self.assertEqual(stats['max_viewers'], 500)
+        self.assertLess(stats['first_record'], stats['last_record'])
+
+    def test_backfill_is_idempotent(self):
+        self._insert_legacy_samples('live0', [10, 20, 30], days_ago=1)
+        self.db.record_youtube_viewers('live0', 40)
+
+        self.db.backfill_youtube_viewers_rollups()
+        self.db.backfill_youtube_viewers_rollups()
+
+        self.assertEqual(self._hour_samples('live0'), 4)
+        self.assertEqual(self.db.get_youtube_viewers_stats('live0')['total_records'], 4)
+
+    def test_video_without_stats_is_backfilled(self):
+        self._insert_legacy_samples('live1', [5, 15], days_ago=3)
+
+        self.db.compact_youtube_viewers()
+        stats = self.db.get_youtube_viewers_stats('live1')
+
+        self.assertEqual(self._hour_samples('live1'), 2)
+        self.assertEqual(stats['total_records'], 2)
+        self.assertEqual(stats['avg_viewers'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,19 @@ Descarga subtítulos automáticos o transcribe audio con Whisper
 """
 
 import os
+import glob
+import json
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from database import SocialDatabase
+
 load_dotenv()
 
 # Intentar importar dependencias opcionales
@@ -29,6 +37,29 @@ class YouTubeTranscriber:
     def __init__(self):
         self.output_dir = os.path.join(os.path.dirname(__file__), "transcripts")
         os.makedirs(self.output_dir, exist_ok=True)
+        self.db = SocialDatabase()
+
+    def _format_timestamp(self, start_time: float) -> str:
+        """Formatea segundos como MM:SS"""
+        minutes = int(start_time // 60)
+        seconds = int(start_time % 60)
+        return f"{minutes:02d}:{seconds:02d}"
+
+    def build_full_text(self, segments: List[Dict]) -> str:
+        """Arma el texto completo con marcas de tiempo a partir de los segmentos"""
+        return "".join(f"[{seg['timestamp']}] {seg['text']}\n" for seg in segments)
+
+    def _whisper_segments(self, result: Dict, offset: float = 0) -> List[Dict]:
+        """Convierte la salida de Whisper en segmentos, desplazados `offset` segundos"""
+        return [
+            {
+                'timestamp': self._format_timestamp(offset + segment['start']),
+                'start': offset + segment['start'],
+                'end': offset + segment['end'],
+                'text': segment['text'].strip()
+            }
+            for segment in result['segments']
+        ]
 
     def extract_video_id(self, url: str) -> str:
         """Extrae el ID del video de una URL de YouTube"""
@@ -58,35 +89,25 @@ class YouTubeTranscriber:
 
             if transcript_data:
                 # Formatear transcripción
-                full_text = ""
-                segments = []
-
-                for entry in transcript_data:
-                    start_time = entry.start
-                    duration = entry.duration
-                    text = entry.text
-
-                    # Formato timestamp
-                    minutes = int(start_time // 60)
-                    seconds = int(start_time % 60)
-                    timestamp = f"{minutes:02d}:{seconds:02d}"
-
-                    segments.append({
-                        'timestamp': timestamp,
-                        'start': start_time,
-                        'duration': duration,
-                        'text': text
-                    })
-
-                    full_text += f"[{timestamp}] {text}\n"
+                segments = [
+                    {
+                        'timestamp': self._format_timestamp(entry.start),
+                        'start': entry.start,
+                        'duration': entry.duration,
+                        'end': entry.start + entry.duration,
+                        'text': entry.text
+                    }
+                    for entry in transcript_data
+                ]
 
                 return {
                     'video_id': video_id,
                     'video_url': video_url,
                     'language': language,
+                    'method': 'youtube',
                     'is_generated': True,
                     'segments': segments,
-                    'full_text': full_text,
+                    'full_text': self.build_full_text(segments),
                     'fetched_at': datetime.now().isoformat()
                 }
 
@@ -130,23 +151,7 @@ class YouTubeTranscriber:
             result = model.transcribe(audio_path, language="es")
 
             # Formatear resultado
-            segments = []
-            full_text = ""
-
-            for segment in result['segments']:
-                start_time = segment['start']
-                minutes = int(start_time // 60)
-                seconds = int(start_time % 60)
-                timestamp = f"{minutes:02d}:{seconds:02d}"
-
-                segments.append({
-                    'timestamp': timestamp,
-                    'start': start_time,
-                    'end': segment['end'],
-                    'text': segment['text'].strip()
-                })
-
-                full_text += f"[{timestamp}] {segment['text'].strip()}\n"
+            segments = self._whisper_segments(result)
 
             # Limpiar archivo de audio
             if os.path.exists(audio_path):
@@ -156,9 +161,10 @@ class YouTubeTranscriber:
                 'video_id': video_id,
                 'video_url': video_url,
                 'language': result.get('language', 'es'),
+                'method': 'whisper',
                 'model': model_size,
                 'segments': segments,
-                'full_text': full_text,
+                'full_text': self.build_full_text(segments),
                 'transcribed_at': datetime.now().isoformat()
             }
 
@@ -166,27 +172,288 @@ class YouTubeTranscriber:
             print(f"Error transcribiendo con Whisper: {e}")
             return None
 
-    def save_transcript(self, transcript: Dict, filename: str = None) -> str:
-        """Guarda la transcripción en un archivo"""
+    def _transcript_filepath(self, video_id: str, filename: str = None) -> str:
+        """Construye la ruta del archivo de transcripción"""
         if not filename:
-            video_id = transcript.get('video_id', 'unknown')
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"transcript_{video_id}_{timestamp}.txt"
+        return os.path.join(self.output_dir, filename)
 
-        filepath = os.path.join(self.output_dir, filename)
+    def _write_header(self, f, transcript: Dict) -> None:
+        """Escribe el encabezado del archivo de transcripción"""
+        f.write(f"# Transcripción de Video de YouTube\n")
+        f.write(f"# Video ID: {transcript.get('video_id')}\n")
+        f.write(f"# URL: {transcript.get('video_url')}\n")
+        f.write(f"# Idioma: {transcript.get('language')}\n")
+        f.write(f"# Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"# {'='*60}\n\n")
+
+    def save_transcript(self, transcript: Dict, filename: str = None) -> str:
+        """Guarda la transcripción en un archivo"""
+        filepath = self._transcript_filepath(transcript.get('video_id', 'unknown'), filename)
 
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"# Transcripción de Video de YouTube\n")
-            f.write(f"# Video ID: {transcript.get('video_id')}\n")
-            f.write(f"# URL: {transcript.get('video_url')}\n")
-            f.write(f"# Idioma: {transcript.get('language')}\n")
-            f.write(f"# Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"# {'='*60}\n\n")
+            self._write_header(f, transcript)
             f.write(transcript.get('full_text', ''))
 
         print(f"Transcripción guardada en: {filepath}")
         return filepath
 
+    def append_segments(self, filepath: str, segments: List[Dict]) -> None:
+        """Agrega segmentos al final de un archivo de transcripción existente"""
+        with open(filepath, 'a', encoding='utf-8') as f:
+            f.write(self.build_full_text(segments))
+            f.flush()
+
+    # ========== MODO EN VIVO (STREAMING) ==========
+
+    def get_live_info(self, video_url: str) -> Optional[Dict]:
+        """Obtiene título, estado en vivo y viewers actuales con yt-dlp"""
+        try:
+            result = subprocess.run(
+                ["yt-dlp", "--dump-json", "--skip-download", video_url],
+                check=True, capture_output=True, text=True, timeout=60
+            )
+            info = json.loads(result.stdout.splitlines()[0])
+            return {
+                'title': info.get('title'),
+                'is_live': bool(info.get('is_live')),
+                'viewers': info.get('concurrent_view_count'),
+            }
+        except FileNotFoundError:
+            print("yt-dlp no está instalado. Instalar con: pip install yt-dlp")
+            return None
+        except Exception as e:
+            print(f"Error obteniendo info del live: {e}")
+            return None
+
+    def get_live_audio_url(self, video_url: str) -> Optional[str]:
+        """Obtiene la URL directa del stream de audio (HLS) de un live"""
+        try:
+            result = subprocess.run(
+                ["yt-dlp", "-g", "-f", "bestaudio/best", video_url],
+                check=True, capture_output=True, text=True, timeout=60
+            )
+            urls = result.stdout.strip().splitlines()
+            return urls[0] if urls else None
+        except FileNotFoundError:
+            print("yt-dlp no está instalado. Instalar con: pip install yt-dlp")
+            return None
+        except subprocess.CalledProcessError as e:
+            print(f"Error obteniendo stream de audio: {e}")
+            return None
+
+    def _record_live_viewers(self, video_id: str, video_url: str) -> None:
+        """Registra el conteo de viewers actual en youtube_viewers_history"""
+        info = self.get_live_info(video_url)
+        if info and info.get('viewers') is not None:
+            self.db.record_youtube_viewers(
+                video_id, int(info['viewers']),
+                video_title=info.get('title'), is_live=info.get('is_live', True)
+            )
+
+    def _poll_live_viewers(self, video_id: str, video_url: str, interval: int,
+                           stop: threading.Event) -> None:
+        """Registra viewers cada `interval` segundos hasta que se pide parar (corre en un hilo aparte)"""
+        while not stop.is_set():
+            try:
+                self._record_live_viewers(video_id, video_url)
+            except Exception as e:
+                print(f"Error registrando viewers: {e}")
+            stop.wait(interval)
+
+    def _start_live_ffmpeg(self, stream_url: str, chunk_dir: str, part: int,
+                           window_seconds: int) -> tuple:
+        """
+        Lanza ffmpeg cortando el stream en ventanas chunk_<parte>_<n>.wav.
+        Devuelve (proceso, ruta del log de errores de ffmpeg).
+        """
+        log_path = os.path.join(chunk_dir, f"ffmpeg_{part:03d}.log")
+        with open(log_path, 'w') as log:
+            process = subprocess.Popen([
+                "ffmpeg", "-loglevel", "error",
+                "-i", stream_url,
+                "-vn", "-ac", "1", "-ar", "16000",
+                "-f", "segment", "-segment_time", str(window_seconds),
+                "-reset_timestamps", "1",
+                os.path.join(chunk_dir, f"chunk_{part:03d}_%05d.wav")
+            ], stdout=subprocess.DEVNULL, stderr=log)
+        return process, log_path
+
+    def _ffmpeg_error(self, log_path: str) -> str:
+        """Últimas líneas del log de errores de ffmpeg"""
+        try:
+            with open(log_path, encoding='utf-8', errors='replace') as f:
+                lines = [line.strip() for line in f if line.strip()]
+        except OSError:
+            return ''
+        return ' | '.join(lines[-3:])
+
+    def transcribe_live(self, video_url: str, window_seconds: int = 30,
+                        model_size: str = "base", max_windows: int = None,
+                        record_viewers: bool = True, max_restarts: int = 5) -> Optional[Dict]:
+        """
+        Transcribe un live de YouTube en ventanas de audio consecutivas
+
+        ffmpeg corta el stream en archivos de `window_seconds` segundos; cada
+        ventana completa se transcribe con Whisper apenas se cierra y sus
+        segmentos se agregan al archivo y a la tabla transcript_segments. La demora máxima
+        es una ventana más el tiempo de transcripción: los viewers se registran en un hilo
+        aparte para no sumarle la consulta a yt-dlp.
+
+        Si ffmpeg termina con error mientras el live sigue (p. ej. venció la URL del
+        stream HLS), se pide una URL nueva y se retoma, hasta `max_restarts` veces seguidas.
+
+        Args:
+            video_url: URL del live
+            window_seconds: duración de cada ventana de audio
+            model_size: modelo de Whisper
+            max_windows: cantidad máxima de ventanas (None = hasta que termine el live)
+            record_viewers: registrar viewers en la base de datos (una vez por ventana)
+            max_restarts: reintentos seguidos de ffmpeg sin ventanas nuevas
+
+        Returns:
+            Dict con la transcripción acumulada o None si falla
+        """
+        if not WHISPER_AVAILABLE:
+            print("Whisper no está instalado")
+            print("Instalar con: pip install openai-whisper")
+            return None
+
+        if not shutil.which("ffmpeg"):
+            print("ffmpeg no está instalado")
+            return None
+
+        video_id = self.extract_video_id(video_url)
+        stream_url = self.get_live_audio_url(video_url)
+        if not stream_url:
+            return None
+
+        transcript = {
+            'video_id': video_id,
+            'video_url': video_url,
+            'language': 'es',
+            'method': 'whisper',
+            'model': model_size,
+            'is_live': True,
+            'segments': [],
+            'started_at': datetime.now().isoformat()
+        }
+
+        transcript_id = self.db.create_transcript(
+            video_id, video_url=video_url, language='es',
+            method='whisper', model=model_size, is_live=True
+        )
+        transcript['transcript_id'] = transcript_id
+
+        filepath = self._transcript_filepath(video_id)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            self._write_header(f, transcript)
+        transcript['saved_to'] = filepath
+
+        print(f"Transcribiendo live {video_id} en ventanas de {window_seconds}s...")
+        print(f"Archivo: {filepath}")
+
+        model = whisper.load_model(model_size)
+        chunk_dir = tempfile.mkdtemp(prefix=f"live_{video_id}_")
+
+        # Cada arranque de ffmpeg es una parte; sus ventanas se ubican desde el momento del arranque
+        started = time.monotonic()
+        part = 0
+        part_offsets = {part: 0.0}
+        ffmpeg, ffmpeg_log = self._start_live_ffmpeg(stream_url, chunk_dir, part, window_seconds)
+
+        stop_viewers = threading.Event()
+        viewers_thread = None
+        if record_viewers:
+            viewers_thread = threading.Thread(
+                target=self._poll_live_viewers,
+                args=(video_id, video_url, window_seconds, stop_viewers),
+                daemon=True
+            )
+            viewers_thread.start()
+
+        windows_done = 0
+        restarts = 0
+
+        try:
+            while True:
+                stream_ended = ffmpeg.poll() is not None
+                chunks = sorted(glob.glob(os.path.join(chunk_dir, f"chunk_{part:03d}_*.wav")))
+
+                # El último archivo sigue escribiéndose mientras ffmpeg corre
+                ready = chunks if stream_ended else chunks[:-1]
+
+                for chunk_path in ready:
+                    index = int(os.path.basename(chunk_path)[10:15])
+                    offset = part_offsets[part] + index * window_seconds
+
+                    result = model.transcribe(chunk_path, language="es")
+                    new_segments = self._whisper_segments(result, offset=offset)
+
+                    if new_segments:
+                        self.append_segments(filepath, new_segments)
+                        self.db.add_transcript_segments(transcript_id, new_segments)
+                        transcript['segments'].extend(new_segments)
+
+                    os.remove(chunk_path)
+                    windows_done += 1
+                    restarts = 0
+                    print(f"  [{self._format_timestamp(offset)}] ventana {windows_done}: {len(new_segments)} segmentos")
+
+                    if max_windows and windows_done >= max_windows:
+                        break
+
+                if max_windows and windows_done >= max_windows:
+                    break
+                if stream_ended:
+                    failed = ffmpeg.returncode != 0
+                    if failed:
+                        print(f"✗ ffmpeg terminó con código {ffmpeg.returncode}: "
+                              f"{self._ffmpeg_error(ffmpeg_log) or 'sin detalle'}")
+
+                    # ffmpeg también termina si vence la URL del stream: seguir si el live sigue
+                    info = self.get_live_info(video_url)
+                    if not info or not info.get('is_live'):
+                        if failed:
+                            transcript['error'] = f"ffmpeg terminó con código {ffmpeg.returncode}"
+                        break
+                    if restarts >= max_restarts:
+                        transcript['error'] = f"{max_restarts} reconexiones seguidas sin audio nuevo"
+                        break
+
+                    restarts += 1
+                    stream_url = self.get_live_audio_url(video_url)
+                    if not stream_url:
+                        transcript['error'] = "no se pudo obtener una URL nueva del stream"
+                        break
+                    print(f"  Reconectando al stream (intento {restarts}/{max_restarts})...")
+                    part += 1
+                    part_offsets[part] = time.monotonic() - started
+                    ffmpeg, ffmpeg_log = self._start_live_ffmpeg(stream_url, chunk_dir, part, window_seconds)
+
+                time.sleep(1)
+
+        except KeyboardInterrupt:
+            print("\nTranscripción en vivo interrumpida")
+        finally:
+            stop_viewers.set()
+            if ffmpeg.poll() is None:
+                ffmpeg.terminate()
+                ffmpeg.wait()
+            if viewers_thread:
+                viewers_thread.join(timeout=5)
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+        transcript['finished_at'] = datetime.now().isoformat()
+        if transcript.get('error'):
+            print(f"✗ Transcripción del live interrumpida: {transcript['error']}")
+            if not windows_done:
+                return None
+
+        print(f"✓ Live transcripto: {windows_done} ventanas, {len(transcript['segments'])} segmentos")
+        return transcript
+
     def transcribe(self, video_url: str, method: str = "auto") -> Optional[Dict]:
         """
         Transcribe un video de YouTube
@@ -220,6 +487,7 @@ class YouTubeTranscriber:
         if transcript:
             filepath = self.save_transcript(transcript)
             transcript['saved_to'] = filepath
+            transcript['transcript_id'] = self.db.save_transcript(transcript)
             return transcript
         else:
             print("✗ No se pudo obtener la transcripción")
@@ -227,8 +495,18 @@ class YouTubeTranscriber:
 
 
 if __name__ == "__main__":
-    # URL del live de la Legislatura
-    VIDEO_URL = "https://www.youtube.com/live/OvG4zIP7Abc"
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Transcriptor de videos de YouTube')
+    parser.add_argument('url', nargs='?', default="https://www.youtube.com/live/OvG4zIP7Abc",
+                        help='URL del video (default: live de la Legislatura)')
+    parser.add_argument('--live', action='store_true',
+                        help='Transcribir un live en curso en ventanas consecutivas')
+    parser.add_argument('--window', type=int, default=30,
+                        help='Duración de cada ventana en segundos (default: 30)')
+    args = parser.parse_args()
+
+    VIDEO_URL = args.url
 
     transcriber = YouTubeTranscriber()
 
@@ -239,7 +517,10 @@ if __name__ == "__main__":
     print()
 
     # Transcribir
-    result = transcriber.transcribe(VIDEO_URL, method="auto")
+    if args.live:
+        result = transcriber.transcribe_live(VIDEO_URL, window_seconds=args.window)
+    else:
+        result = transcriber.transcribe(VIDEO_URL, method="auto")
 
     if result:
         print(f"\n{'='*60}")